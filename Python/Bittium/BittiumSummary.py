@@ -1,5 +1,6 @@
-import pyedflib
 from owcurate.Python.Bittium.ReadBittiumEDF import *
+from owcurate.Python.file.EDFFile import EDFFile
+from owcurate.Python.file.REDCapIndex import load_folder
 from os import listdir, remove
 from os.path import isfile, join
 import pandas as pd
@@ -29,14 +30,15 @@ ACC_FREQUENCY = 25
 
 
 # Initializing REDCap files and database
-REDCap_files = [f for f in listdir(path + REDCap_dir) if isfile(join(path + REDCap_dir, f))]
-df_Baseline = pd.read_csv(path + REDCap_dir + REDCap_files[0])
-df_Discharge = pd.read_csv(path + REDCap_dir + REDCap_files[1])
+REDCap_indexes = load_folder(path + REDCap_dir)
+REDCap_Baseline = REDCap_indexes[0]
+REDCap_Discharge = REDCap_indexes[1]
 
 
 for f in files:
-    curr_file = pyedflib.EdfReader(working_dir+f)
-    frequencies = curr_file.getSampleFrequencies()
+    curr_file = EDFFile(working_dir+f)
+    curr_file.read()
+    frequencies = [curr_file.sample_rates[signal] for signal in curr_file.signals]
     curr_file_name = BittiumFileName(working_dir+f)
     notes = ""
 
@@ -48,10 +50,10 @@ for f in files:
     curr_file_name.arr = curr_file_name.arr[0:3]
     file_name_to_test = "_".join(curr_file_name.arr)
 
-    if file_name_to_test not in df_Baseline["subject_id"].values:
+    if file_name_to_test not in REDCap_Baseline:
         notes += "Subject Code %s not in Baseline REDCap data\n" % file_name_to_test
         file_name_test = False
-    if file_name_to_test not in df_Discharge["subject_id"].values:
+    if file_name_to_test not in REDCap_Discharge:
         notes += "Subject Code %s not in Discharge REDCap data\n" % file_name_to_test
         file_name_test = False
 
@@ -74,8 +76,6 @@ for f in files:
 
     output_array = [file_name_to_test, str(file_name_test), str(frequency_test), notes]
     summary_df.loc[len(summary_df)] = output_array
-    curr_file._close()
-    del curr_file
 
 summary_df.duplicated(subset=["Subject ID"], keep='last')
 
@@ -4,10 +4,12 @@
 
 
 # ============================= IMPORTS ==========================
+import io
 import datetime
 from datetime import *
 import numpy as np
-import pandas as pd
+from owcurate.Python.file.GENEActivFile import decode_pages
+from owcurate.Python.file.PageScan import PageScan, resync_pages
 
 # ============================= CLASSES ==========================
 # FileInfo is an object that stores the first parts of every file
@@ -243,7 +245,6 @@ class ReadGENEActivBin:
         # ============================ VARIABLES
         self.location = directory
         self.file = open(self.location, "r")
-        self.file_instance_2 = open(self.location)
         self.fileInfo = FileInfo(self.file)
         self.InfoArray = [self.fileInfo.subject_code,
                           self.fileInfo.location_code,
@@ -259,19 +260,38 @@ class ReadGENEActivBin:
                           self.fileInfo.y_gain, self.fileInfo.y_offset,
                           self.fileInfo.z_gain, self.fileInfo.z_offset,
                           self.fileInfo.volts, self.fileInfo.lux]
-        self.actual_page_count = get_last_sequence_num(self.file_instance_2)
         self.DataChunk = []
         self.curr_line = self.file.readline()
-        for i in range(self.actual_page_count):
-            curr_data_chunk = Data(self.file)
+
+        # pages are found from their "Recorded Data" lines (instead of reading 10 lines at a time) so a
+        # truncated or corrupted page is skipped rather than shifting every page after it
+        page_lines, page_starts = resync_pages([line.rstrip("\n") for line in self.file.readlines()])
+        self.skipped_pages = []
+        for i in range(len(page_lines) // 10):
+            try:
+                curr_data_chunk = Data(io.StringIO("\n".join(page_lines[i * 10:(i + 1) * 10]) + "\n"))
+            except ValueError:
+                self.skipped_pages.append(i)
+                continue
             self.DataChunk.append(curr_data_chunk.flattened())
 
+        # pages that were read (ignores the header page count)
+        self.actual_page_count = len(self.DataChunk)
+
         # print(self.DataChunk)
 
         self.fullData = CompoundGENEActivData(self.fileInfo, self.DataChunk)
+        self._df = None
 
-        self.df = pd.DataFrame(data=self.DataChunk, columns=["Device Serial Code", "Sequence Number", "Page Time",
-                                                             "Temperature", "Hexadecimal Data"])
+    # DataFrame of the pages, created the first time it is used so that pandas is only imported by callers
+    # that need it (e.g. not when only the header or page count is checked)
+    @property
+    def df(self):
+        if self._df is None:
+            import pandas as pd
+            self._df = pd.DataFrame(data=self.DataChunk, columns=["Device Serial Code", "Sequence Number",
+                                                                  "Page Time", "Temperature", "Hexadecimal Data"])
+        return self._df
 
 
 class GENEActivFileName:
@@ -292,10 +312,11 @@ class GENEActivFileName:
 # ============================= DEFINITIONS
 # get_last_sequence_num(f) gets the actual page count (ignores the header page count)
 # f is a file object
+# the sequence number is taken from the last complete page with a valid sequence number
+# (found by an integrity scan) rather than a fixed line from the end of the file
 def get_last_sequence_num(f):
-    data = f.readlines()
-    curr_str = data[-8]
-    return int(curr_str[curr_str.index(":") + 1:]) + 1
+    page_scan = PageScan(f.name).scan()
+    return page_scan.last_sequence_num() + 1
 
 
 def twos_comp(val, bits):
@@ -312,59 +333,32 @@ def process_curr(x, output, iter, time, offsets, gains, write_to_file=False):
     #       output: the file to output (CSV)
     #       iter: the current sequence number -> used for indexing
     #       time: the start time for this entry
-    # x-arr is the array used for the raw hexadecimal strings split every 12 characters
-    # returned_arr is the final output array in tuple form of (x_comp, y_comp, z_comp, time)
+    # returned_arr is the final output array in tuple form of (index, time, x_comp, y_comp, z_comp)
     # x_comp is the x-component of accelerometer data
     # y_comp is the y-component of accelerometer data
     # z_comp is the z-component of accelerometer data
-    # curr is the current line that is going to be processed, must be unified to 48 length
-    # light is the light levels
-    # button is whether or not the button was pressed
-    # res is the reserved slot
-    # output_string is the final output string to be placed into the csv document
-    x_arr = []
-    returned_arr = []
-    x_comp = None
-    y_comp = None
-    z_comp = None
-    curr = None
-    light = None
-    button = None
-    res = None
-    output_string = ""
+    # ======== NOTE
+    #       all 300 measurements are decoded at once into arrays (see
+    #       GENEActivFile.decode_pages) rather than one 48 bit string at a time
     x_offset, y_offset, z_offset = offsets
     x_gain, y_gain, z_gain = gains
 
-    # First pre-process the data from the long hexadecimal string and parse every 12 characters
-    for i in range(300):
-        x_arr.append(x[i * 12: (i + 1) * 12])
-    # Run through the x_arr array 300 times and process the data into component forms
-    for j in range(300):
-        # Update current values:
-        curr = bin(int(x_arr[j], 16))[2:]
-        curr = curr.zfill(48)
-        x_comp = curr[0:12]
-        y_comp = curr[12:24]
-        z_comp = curr[24:36]
-        light = curr[36:46]
-        button = int(curr[46], 2)
-        res = int(curr[47], 2)
-
-        # run the twos component value on each composition which starts in binary form
-        x_comp = twos_comp(int(x_comp, 2), 12)
-        y_comp = twos_comp(int(y_comp, 2), 12)
-        z_comp = twos_comp(int(z_comp, 2), 12)
-        # run the modifiers as prescribed in the GENEActiv documentation
-        x_comp = (x_comp * 100 - x_offset) / x_gain
-        y_comp = (y_comp * 100 - y_offset) / y_gain
-        z_comp = (z_comp * 100 - z_offset) / z_gain
-        # update the time value based on 75Hz roughly (1000ms/75)
-        time += timedelta(milliseconds=13.3333)
-
-        if write_to_file:
-            output_string = "%i, " % (iter * 300 + j) + time.strftime("%Y-%m-%d %H:%M:%S.%f") + ", %.3f, %.3f, %.3f\n" % (x_comp, y_comp, z_comp)
-            output.write(output_string)
-
-        returned_arr.append(((iter * 300) + j, time, x_comp, y_comp, z_comp))
+    decoded = decode_pages([x])
+
+    # run the modifiers as prescribed in the GENEActiv documentation
+    x_comp = ((decoded["accel_x"].astype(float) * 100 - x_offset) / x_gain).tolist()
+    y_comp = ((decoded["accel_y"].astype(float) * 100 - y_offset) / y_gain).tolist()
+    z_comp = ((decoded["accel_z"].astype(float) * 100 - z_offset) / z_gain).tolist()
+
+    # update the time value based on 75Hz roughly (1000ms/75)
+    period = timedelta(milliseconds=13.3333)
+    times = [time + period * (j + 1) for j in range(300)]
+
+    returned_arr = list(zip(range(iter * 300, (iter + 1) * 300), times, x_comp, y_comp, z_comp))
+
+    if write_to_file:
+        for index, curr_time, x_val, y_val, z_val in returned_arr:
+            output.write("%i, " % index + curr_time.strftime("%Y-%m-%d %H:%M:%S.%f") +
+                         ", %.3f, %.3f, %.3f\n" % (x_val, y_val, z_val))
 
     return returned_arr
@@ -5,6 +5,7 @@
 
 # ======================================== IMPORTS =============================
 from owcurate.Python.GENEActiv.GENEActivReader import *
+from owcurate.Python.file.REDCapIndex import load_folder
 import pandas as pd
 from os import listdir, remove
 from os.path import isfile, join
@@ -52,9 +53,10 @@ except IOError:
 MEASUREMENT_FREQUENCY = 75
 
 
-REDCap_files = [f for f in listdir(path + REDCap_dir) if isfile(join(path + REDCap_dir, f))]
-df_Baseline = pd.read_csv(path + REDCap_dir + REDCap_files[0])
-df_Discharge = pd.read_csv(path + REDCap_dir + REDCap_files[0])
+# REDCap exports are indexed by subject id (cached on disk between runs)
+REDCap_indexes = load_folder(path + REDCap_dir)
+REDCap_Baseline = REDCap_indexes[0]
+REDCap_Discharge = REDCap_indexes[0]
 
 
 for f in files_to_check:
@@ -79,10 +81,10 @@ for f in files_to_check:
     curr_file_name.arr = curr_file_name.arr[0:3]
     file_name_to_test = "_".join(curr_file_name.arr)
 
-    if file_name_to_test not in df_Baseline["subject_id"].values:
+    if file_name_to_test not in REDCap_Baseline:
         notes += "Subject Code %s not in Baseline REDCap data\n" % file_name_to_test
         file_name_test = False
-    if file_name_to_test not in df_Discharge["subject_id"].values:
+    if file_name_to_test not in REDCap_Discharge:
         notes += "Subject Code %s not in Discharge REDCap data\n" % file_name_to_test
         file_name_test = False
 
@@ -6,19 +6,49 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import math
-from statistics import mean
 from matplotlib import style
 from pandas.plotting import register_matplotlib_converters
+
+from owcurate.Python.file.PageScan import read_page_health
+from owcurate.Python.file.SignalTools import TimeBins
+
 register_matplotlib_converters()
 style.use("ggplot")
 
 
 # ============================== DEFINITIONS ==============================
 def avg_temp(dataframe, numofsamples):
-    temperatures = []
-    for chunk in np.array_split(dataframe, numofsamples):
-        temperatures.append((chunk['Page Time'].iloc[0], mean(chunk['Temperature'])))
-    return temperatures
+    # mean temperature of each of numofsamples chunks of rows (the same chunks
+    # as np.array_split) with the page time of the first row of each chunk,
+    # averaged all at once with np.add.reduceat
+    temperatures = dataframe["Temperature"].to_numpy(dtype=float)
+    chunk_size, extra = divmod(len(temperatures), numofsamples)
+    sizes = np.array([chunk_size + 1] * extra + [chunk_size] * (numofsamples - extra))
+    sizes = sizes[sizes > 0]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    means = np.add.reduceat(temperatures, starts) / sizes
+    return list(zip(dataframe["Page Time"].iloc[starts], means))
+
+
+def page_health(bin_path, bin_minutes=60):
+    # mean, min and max temperature and battery voltage of each bin of
+    # bin_minutes from the page time, temperature and battery voltage lines
+    # of a .bin file only (the data lines are not decoded) as a dict of arrays
+    health = read_page_health(bin_path)
+
+    bins = TimeBins(bin_minutes * 60)
+    bins.add(health["time"], {"temperature": health["temperature"],
+                              "battery": health["battery"]})
+
+    summary = {"time": bins.bin_times(), "pages": bins.counts[:bins.size]}
+    for signal in ("temperature", "battery"):
+        for stat in ("mean", "min", "max"):
+            summary["%s_%s" % (signal, stat)] = bins.get(signal, stat)
+
+    # bins start at midnight, skip bins before the first page
+    first = np.flatnonzero(summary["pages"])[0] if summary["pages"].any() else 0
+    return {key: values[first:] for key, values in summary.items()}
 
 
 def percent_clipping(dataframe, pergroup):
@@ -72,14 +102,15 @@ def percent_clipping(dataframe, pergroup):
     # not sure how to tackle this one yet...
 
 
-acc_df = pd.read_csv("O:\\Data\\OND07\\Raw data\\GENEActiv\\Output\\OND07_WTL_3001_01_GA_LAnkle.csv",
-                     nrows=10000,
-                     names=["Index", "Time", "X-val", "Y-val", "Z-val"],
-                     index_col=['Index'])
+if __name__ == "__main__":
+    acc_df = pd.read_csv("O:\\Data\\OND07\\Raw data\\GENEActiv\\Output\\OND07_WTL_3001_01_GA_LAnkle.csv",
+                         nrows=10000,
+                         names=["Index", "Time", "X-val", "Y-val", "Z-val"],
+                         index_col=['Index'])
 
-clipping_percentages = percent_clipping(acc_df, 900)
-df = pd.DataFrame(data=clipping_percentages, columns=["X-clipping percent", "Y-clipping percent", "Z-clipping percent"])
+    clipping_percentages = percent_clipping(acc_df, 900)
+    df = pd.DataFrame(data=clipping_percentages, columns=["X-clipping percent", "Y-clipping percent", "Z-clipping percent"])
 
-df = df[(df['X-clipping percent'] > 0.0) | (df['Y-clipping percent'] > 0.0) | (df['Z-clipping percent'] > 0.0)]
+    df = df[(df['X-clipping percent'] > 0.0) | (df['Y-clipping percent'] > 0.0) | (df['Z-clipping percent'] > 0.0)]
 
-print(df.head())
+    print(df.head())
@@ -1,202 +1,277 @@
 # David Ding
+#
+# Creates a pdf summary (header page and one page of accelerometer and
+# temperature plots per window) of each GENEActiv .bin file in a study folder.
+#
+# usage: python SummaryPDF.py <working path> [--processes 4] [--window-hours 1]
+#
+# The working path is the study folder containing "Raw data/GENEActiv",
+# "Raw data/REDCap" and "Processed Data/GENEActiv/PDF Summary". Files can also
+# be summarized from other code with create_summary_pdf() or
+# summarize_folder().
+
+import os
+import logging
+import argparse
+import functools
+import datetime as dt
+import multiprocessing
+import numpy as np
+
+from owcurate.Python.GENEActiv.GENEActivReader import GENEActivFileName
+from owcurate.Python.file.GENEActivFile import (GENEActivFile, WindowFigure,
+                                                 decode_pages, parse_page_times)
+from owcurate.Python.file.PDFWriter import PDFWriter
+from owcurate.Python.file.Progress import ProgressReporter
+from owcurate.Python.file.REDCapIndex import load_folder
+
+# matplotlib and pandas are imported in the functions that use them so
+# that importing this module (e.g. in each worker process) is fast
+
+# ================================== CONSTANTS ==============================
+RAW_DATA = os.path.join("Raw data", "GENEActiv")
+REDCAP_PATH = os.path.join("Raw data", "REDCap")
+OUTPUT_PATH = os.path.join("Processed Data", "GENEActiv", "PDF Summary")
+
+SUMMARY_COLUMNS = ["Index",
+                   "Filename (str)",
+                   "Start Time (datetime)",
+                   "x-gain (int)", "x-offset (int)",
+                   "y-gain (int)", "y-offset (int)",
+                   "z-gain (int)", "z-offset (int)",
+                   "Volts (int)", "Lux (int)"]
+
+
+# ================================= DEFINITIONS =============================
+def list_bin_files(working_dir):
+    # .bin files in the raw data folder (SAMPLE files are skipped)
+    return sorted(f for f in os.listdir(working_dir)
+                  if os.path.isfile(os.path.join(working_dir, f))
+                  and f.endswith(".bin") and "SAMPLE" not in f)
+
+
+def read_redcap(redcap_dir):
+    # returns the baseline and discharge REDCap indexes (currently both are
+    # the first export in the REDCap folder, which is only loaded once)
+    redcap_indexes = load_folder(redcap_dir)
+    return redcap_indexes[0], redcap_indexes[0]
+
+
+def subject_id(bin_name):
+    # REDCap subject id (study_site_subject) from the .bin file name
+    file_name = GENEActivFileName(bin_name)
+    return file_name.study + "_" + file_name.site + "_%i" % file_name.subject_code
+
+
+def header_text(bin_name, ga_file, baseline=None, discharge=None):
+    # text for the header page of the summary
+    file_name = GENEActivFileName(bin_name)
+    curr_subj_code = subject_id(bin_name)
+    header = ga_file.header
+
+    baseline_ids = ([] if baseline is None else
+                    [row[baseline.id_field] for row in baseline.get(curr_subj_code, [])])
+    discharge_ids = ([] if discharge is None else
+                     [row[discharge.id_field] for row in discharge.get(curr_subj_code, [])])
+
+    return "FILENAME INFORMATION================================== \n" \
+           "Subject ID:%s\n" \
+           "Trial Code:%s\n" \
+           "Visit Number:%i\n" \
+           "Site ID:%s\n" \
+           "Location of device:%s\n\n" \
+           "BINARY FILE INFORMATION================================== \n" \
+           "Subject ID:%s\n" \
+           "Location of device:%s\n" \
+           "Measurement Frequency:%s\n" \
+           "Measurement Period:%s\n" \
+           "Start Time:%s\n" \
+           "Extract Time:%s\n" \
+           "Number of Pages:%s\n\n" \
+           "REDCAP BASELINE INFORMATION================================== \n" \
+           "Subject ID:%s\n\n" \
+           "REDCAP DISCHARGE INFORMATION================================== \n" \
+           "Subject ID:%s\n\n" % (file_name.subject_code,
+                                  file_name.study,
+                                  file_name.visitNum,
+                                  file_name.site,
+                                  file_name.location,
+                                  header.get("Subject Code", ""),
+                                  header.get("Location Code", ""),
+                                  header["Measurement Frequency"].split()[0],
+                                  header["Measurement Period"].split()[0],
+                                  header["Start Time"],
+                                  header["Extract Time"],
+                                  header["Number of Pages"],
+                                  baseline_ids,
+                                  discharge_ids)
+
+
+def iter_windows(ga_file, window_hours=1):
+    # yields (sample times, x, y, z, page times, temperatures) for each window
+    # of pages, streaming one window at a time from the file and decoding all
+    # pages in the window at once
+    sample_rate = ga_file.sample_rates["accel_x"]
+    window_pages = max(round(window_hours * 60 * 60 * sample_rate / 300), 1)
+    sample_offsets = (np.arange(300) * 1e6 / sample_rate).astype("timedelta64[us]")
+
+    for first_page, page_lines in ga_file.iter_page_chunks(chunk_pages=window_pages):
+        data = decode_pages(page_lines[9::10])
+        page_times = parse_page_times(page_lines[3::10])
+        temperatures = np.array([float(line[line.index(":") + 1:])
+                                 for line in page_lines[5::10]])
+
+        yield (first_page,
+               (page_times[:, None] + sample_offsets).ravel(),
+               [ga_file.calibrate(signal, data[signal])
+                for signal in ("accel_x", "accel_y", "accel_z")],
+               page_times,
+               temperatures)
+
+
+def window_figure(window_hours=1):
+    # builds the figure of x, y, z and temperature that every window is
+    # plotted on (see WindowFigure, only the data and title change between
+    # windows so the figure is not rebuilt for each page)
+    import matplotlib.pyplot as plt
+    plt.style.use("ggplot")
+    plt.rcParams["figure.figsize"] = (6, 8.5)
+
+    panels = [{"label": label, "ylim": [-9, 9], "yticks": [-8, 0, 8],
+               "hlines": [], "color": color}
+              for label, color in (("X component", "b"),
+                                   ("Y component", "r"),
+                                   ("Z component", "g"))]
+    panels.append({"label": "Temperature", "ylim": [10, 40],
+                   "yticks": [10, 20, 30, 40], "hlines": [], "color": "C0"})
+
+    return WindowFigure(panels, dt.timedelta(hours=window_hours),
+                        time_format="%H:%M:%S", max_ticks=6)
+
+
+def plot_window(figure, curr_subj_code, times, accel, page_times, temperatures):
+    # plots one window of x, y, z and temperature on the figure and returns
+    # the RGBA pixels of the figure (no .png file is written, the pixels are
+    # replaced when the next window is plotted)
+    return figure.render([times, times, times, page_times],
+                         accel + [temperatures], "%s" % curr_subj_code)
+
+
+def create_summary_pdf(bin_path, output_folder, baseline=None, discharge=None,
+                       window_hours=1, progress=None):
+    # creates the pdf summary of one .bin file and returns the pdf path and the
+    # file's row of the summary table (without the index)
+    if progress is None:
+        progress = ProgressReporter()
+
+    bin_name = os.path.basename(bin_path)
+    curr_subj_code = subject_id(bin_name)
+    pdf_path = os.path.join(output_folder, os.path.splitext(bin_name)[0] + ".pdf")
+
+    # only the header is read, pages are streamed one window at a time
+    ga_file = GENEActivFile(bin_path, progress=progress)
+    if not ga_file.read(header_only=True):
+        return None, None
+
+    # Setup PDF Instance for output and write header page (each window's page
+    # is written as it is plotted so memory use does not grow with the
+    # length of the recording)
+    with PDFWriter(pdf_path, page_size="a4") as pdf:
+        pdf.add_page()
+        pdf.text_block(header_text(bin_name, ga_file, baseline, discharge),
+                       x=11, y=10, size=12, line_height=5)
+
+        progress.start(bin_path, total=ga_file.record_count)
+
+        # one figure is reused for every window of the file
+        figure = window_figure(window_hours)
+
+        try:
+            for first_page, times, accel, page_times, temperatures in iter_windows(ga_file, window_hours):
+                pixels = plot_window(figure, curr_subj_code, times, accel, page_times, temperatures)
+
+                pdf.add_page()
+                pdf.image(pixels, x=1, y=1)
+
+                progress.update(first_page - 1 + len(page_times), "Analyzing...")
+        finally:
+            figure.close()
+
+    progress.finish(pdf_path=pdf_path)
+
+    header = ga_file.header
+    summary_row = [curr_subj_code, header["Start Time"],
+                   int(header["x gain"]), int(header["x offset"]),
+                   int(header["y gain"]), int(header["y offset"]),
+                   int(header["z gain"]), int(header["z offset"]),
+                   int(header["Volts"]), int(header["Lux"])]
+
+    return pdf_path, summary_row
+
+
+def summarize_folder(path, processes=1, window_hours=1, progress=None):
+    # creates pdf summaries of all .bin files in the study folder (processes
+    # files in parallel if processes > 1) and returns the summary table
+    if progress is None:
+        progress = ProgressReporter(min_interval=0)
+
+    working_dir = os.path.join(path, RAW_DATA)
+    output_folder = os.path.join(path, OUTPUT_PATH)
+    baseline, discharge = read_redcap(os.path.join(path, REDCAP_PATH))
+
+    bin_paths = [os.path.join(working_dir, f) for f in list_bin_files(working_dir)]
 
-from owcurate.Python.GENEActiv.GENEActivReader import *
-from fpdf import FPDF
-import matplotlib.pyplot as plt
-from matplotlib import style
-import matplotlib.dates as md
-from os import listdir, remove
-from os.path import isfile, join
-from pandas.plotting import register_matplotlib_converters
-register_matplotlib_converters()
-
-style.use("ggplot")
-
-# ================================= DEFINITIONS AND OBJECTS
-
-
-# ================================== CONSTANTS AND VARIABLE DECLARATION ==============================
-path = input("Please enter working path: ")
-RAW_DATA = "\\Raw data\\GENEActiv\\"
-REDCAP_PATH = "\\Raw data\\REDCap\\"
-OUTPUT_PATH = "\\Processed Data\\GENEActiv\\PDF Summary\\"
-working_dir = path + RAW_DATA
-files = [f for f in listdir(path+RAW_DATA) if (isfile(join(working_dir, f)) and (".bin" in f) and not ("SAMPLE" in f))]
-
-# pdf.cell(200, 10, txt="Welcome to Python!", ln=1, align="C")
-# pdf.output("simple_demo.pdf")
-
-# ============================= INITIALIZE FOLDER-ORIENTED DATABASES:
-redcap_dir = path+REDCAP_PATH
-REDCap_files = [f for f in listdir(redcap_dir) if isfile(join(redcap_dir, f))]
-df_baseline = pd.read_csv(redcap_dir+REDCap_files[0])
-df_discharge = pd.read_csv(redcap_dir+REDCap_files[0])
-df_summary = pd.DataFrame(columns=["Index",
-                                   "Filename (str)",
-                                   "Start Time (datetime)",
-                                   "x-gain (int)", "x-offset (int)",
-                                   "y-gain (int)", "y-offset (int)",
-                                   "z-gain (int)", "z-offset (int)",
-                                   "Volts (int)", "Lux (int)"])
-folder_indexer = 0
-
-
-# MAKE HEADER PAGE
-for f in files:
-    # Setup PDF Instance for output
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Courier", size=12)
-
-    # Read the input for the current file
-    curr_bin_file = ReadGENEActivBin(join(working_dir, f))
-    curr_filename = GENEActivFileName(f)
-    curr_subj_code = curr_filename.study+"_"+curr_filename.site+"_%i" % curr_filename.subject_code
-    curr_baseline = df_baseline[df_baseline["subject_id"] == curr_subj_code]
-    curr_discharge = df_discharge[df_discharge["subject_id"] == curr_subj_code]
-
-    # GETTING INPUT VALUES
-    df_summary.loc[len(df_summary) + 1] = [folder_indexer, curr_subj_code, curr_bin_file.fileInfo.start_time,
-                                           curr_bin_file.fileInfo.x_gain, curr_bin_file.fileInfo.x_offset,
-                                           curr_bin_file.fileInfo.y_gain, curr_bin_file.fileInfo.y_offset,
-                                           curr_bin_file.fileInfo.z_gain, curr_bin_file.fileInfo.z_offset,
-                                           curr_bin_file.fileInfo.volts, curr_bin_file.fileInfo.lux]
-
-    df_accelerometer = pd.DataFrame()
-
-    # OUTPUTTING HEADER
-    output_string = "FILENAME INFORMATION================================== \n" \
-                    "Subject ID:%s\n" \
-                    "Trial Code:%s\n" \
-                    "Visit Number:%i\n" \
-                    "Site ID:%s\n" \
-                    "Location of device:%s\n\n" \
-                    "BINARY FILE INFORMATION================================== \n" \
-                    "Subject ID:%i\n" \
-                    "Location of device:%s\n" \
-                    "Measurement Frequency:%i\n" \
-                    "Measurement Period:%i\n" \
-                    "Start Time:%s\n" \
-                    "Extract Time:%s\n" \
-                    "Number of Pages:%s\n\n" \
-                    "REDCAP BASELINE INFORMATION================================== \n" \
-                    "Subject ID:%s\n\n" \
-                    "REDCAP DISCHARGE INFORMATION================================== \n" \
-                    "Subject ID:%s\n\n" % (curr_filename.subject_code,
-                                           curr_filename.study,
-                                           curr_filename.visitNum,
-                                           curr_filename.site,
-                                           curr_filename.location,
-                                           curr_bin_file.fileInfo.subject_code,
-                                           curr_bin_file.fileInfo.location_code,
-                                           curr_bin_file.fileInfo.measurement_frequency,
-                                           curr_bin_file.fileInfo.measurement_period,
-                                           curr_bin_file.fileInfo.start_time,
-                                           curr_bin_file.fileInfo.extract_time,
-                                           curr_bin_file.fileInfo.number_of_pages,
-                                           curr_baseline["subject_id"].to_list(),
-                                           curr_discharge["subject_id"].to_list())
-
-    # WRITE HEADER PAGE
-    pdf.multi_cell(400, 5, output_string, align='L')
-
-    # PROCESS GRAPHICAL DATA
-    # First, we need to populate the hexadecimal valued database
-    ticker = 0
-    sequence = 0
-    #for i in range(len()):
-    x_vals = []
-    y_vals = []
-    z_vals = []
-    time_vals = []
-
-    temp_vals = []
-    temp_time_vals = []
-
-    for j, k in curr_bin_file.df.iterrows():
-        time = k["Page Time"]
-        # print(datetime.strftime(time, "%H:%M:%S"))
-        curr_chunk = process_curr(k["Hexadecimal Data"], "", k["Sequence Number"], time,
-                                  (curr_bin_file.fileInfo.x_offset, curr_bin_file.fileInfo.y_offset, curr_bin_file.fileInfo.z_offset),
-                                  (curr_bin_file.fileInfo.x_gain, curr_bin_file.fileInfo.y_gain, curr_bin_file.fileInfo.z_gain))
-
-        # print(k["Temperature"])
-        # Get Temperature information
-        temp_vals.append(k["Temperature"])
-        temp_time_vals.append(time)
-
-        # Extract x, y, z accelerometer data every chunk
-        for l in range(300):
-            time_vals.append(curr_chunk[l][1])
-            x_vals.append(curr_chunk[l][2])
-            y_vals.append(curr_chunk[l][3])
-            z_vals.append(curr_chunk[l][4])
-
-        if ticker == 3600 or sequence == curr_bin_file.actual_page_count:
-            # Make the graph first, then output the graph
-            sequence += 1
-            plt.rcParams["figure.figsize"] = (6, 8.5)
-            plt.suptitle("%s" % curr_subj_code)
-
-            # X-axis subplot
-            plt.subplot(411)
-            axes = plt.gca()
-            axes.set_ylim([-9, 9])
-            axes.xaxis.set_major_formatter(md.DateFormatter("%H:%M:%S"))
-            axes.xaxis.set_major_locator(plt.MaxNLocator(6))
-            plt.ylabel("X component")
-            plt.plot_date(time_vals, x_vals, "b-")
-
-            # Y-axis subplot
-            plt.subplot(412)
-            axes = plt.gca()
-            axes.set_ylim([-9, 9])
-            axes.xaxis.set_major_formatter(md.DateFormatter("%H:%M:%S"))
-            axes.xaxis.set_major_locator(plt.MaxNLocator(6))
-            plt.ylabel("Y component")
-            plt.plot_date(time_vals, y_vals, "r-")
-
-            # Z-axis subplot
-            plt.subplot(413)
-            axes = plt.gca()
-            axes.set_ylim([-9, 9])
-            axes.xaxis.set_major_formatter(md.DateFormatter("%H:%M:%S"))
-            axes.xaxis.set_major_locator(plt.MaxNLocator(6))
-            plt.ylabel("Z component")
-            plt.plot_date(time_vals, z_vals, "g-")
-
-            # Temperature subplot
-            plt.subplot(414)
-            axes = plt.gca()
-            axes.xaxis.set_major_formatter(md.DateFormatter("%H:%M:%S"))
-            axes.xaxis.set_major_locator(plt.MaxNLocator(6))
-            plt.ylabel("Temperature")
-            plt.plot(temp_time_vals, temp_vals)
-
-            temp_name = "%s_%i.png" % (curr_subj_code, sequence)
-            plt.savefig(temp_name)
-            # plt.show()
-            pdf.add_page()
-            pdf.image(temp_name, x=1, y=1, type='png')
-
-            plt.close()
-            # Clear the data since we do not want a running total
-            x_vals.clear()
-            y_vals.clear()
-            z_vals.clear()
-            time_vals.clear()
-            temp_vals.clear()
-            temp_time_vals.clear()
-            ticker = 0
-            remove(temp_name)
-
-        ticker += 1
-        percentage = (k["Sequence Number"] / curr_bin_file.actual_page_count * 100)
-        print("Analyzing... Current Progress: %.2f%%" % percentage)
-
-    pdf.output(path + OUTPUT_PATH + f[:-4] + ".pdf")
-    folder_indexer += 1
+    summarize = functools.partial(create_summary_pdf,
+                                  output_folder=output_folder,
+                                  baseline=baseline,
+                                  discharge=discharge,
+                                  window_hours=window_hours)
 
+    progress.start(path, total=len(bin_paths))
+    summary_rows = []
+
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    results = pool.imap(summarize, bin_paths) if pool else map(summarize, bin_paths)
 
+    try:
+        for bin_path, (pdf_path, summary_row) in zip(bin_paths, results):
+            summary_rows.append(summary_row)
+            progress.update(message="created %s" % pdf_path if pdf_path else
+                            "skipped %s" % bin_path, pdf_path=pdf_path)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
 
+    progress.finish()
 
+    import pandas as pd
+    df_summary = pd.DataFrame([[folder_indexer] + summary_row
+                               for folder_indexer, summary_row in enumerate(summary_rows)
+                               if summary_row is not None],
+                              columns=SUMMARY_COLUMNS)
+
+    return df_summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create pdf summaries of GENEActiv .bin files.")
+    parser.add_argument("path", help="working path (study folder)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of files to summarize at the same time")
+    parser.add_argument("--window-hours", type=float, default=1,
+                        help="hours of data plotted on each page")
+    parser.add_argument("--summary-csv", help="also write the summary table to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    df_summary = summarize_folder(args.path, processes=args.processes,
+                                  window_hours=args.window_hours)
+
+    if args.summary_csv:
+        df_summary.to_csv(args.summary_csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# Benchmarks the GENEActiv decode, view and pdf paths on synthetic .bin files
+#
+# usage: python benchmark_GENEActiv.py [--days 1 7 14] [--memory] ...
+#
+# Synthetic files are written to a scratch folder (reused if they already
+# exist) and each path is timed on each file size. Throughput is reported
+# as samples/s and MB/s of .bin file processed. Peak memory (tracemalloc)
+# is measured in a separate run of each path when --memory is used because
+# tracing slows everything down.
+#
+# The time to import the reader modules is also measured in a new
+# interpreter and checked against a budget (--import-budget): header-only
+# tools and worker processes should not load matplotlib, fpdf or pandas
+# (also checked by Python/file/tests/test_lazy_imports.py). The script exits
+# with status 1 if the budget is exceeded.
+
+import os
+import sys
+
+# folder holding the repository (cloned as a folder named owcurate)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             '..', '..', '..')))
+
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import datetime as dt
+import tracemalloc
+
+import owcurate.Python.file.GENEActivFile as ga
+import owcurate.Python.GENEActiv.GENEActivReader as gr
+from owcurate.Python.file.SyntheticFiles import write_ga_bin
+
+
+# modules timed on import
+IMPORT_MODULES = ['owcurate.Python.file.GENEActivFile',
+                  'owcurate.Python.GENEActiv.GENEActivReader']
+
+# modules that should only be imported when plotting or creating DataFrames
+LAZY_MODULES = ['matplotlib', 'fpdf', 'pandas']
+
+
+def import_time(module):
+
+    '''returns the time (s) to import a module in a new interpreter and
+    the lazy modules imported with it'''
+
+    code = ('import sys, time, json\n'
+            'start = time.perf_counter()\n'
+            f'import {module}\n'
+            'seconds = time.perf_counter() - start\n'
+            f'lazy = [name for name in {LAZY_MODULES!r} '
+            'if name in sys.modules]\n'
+            'print(json.dumps([seconds, lazy]))\n')
+
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output = True, text = True, check = True,
+                            env = dict(os.environ,
+                                       PYTHONPATH = os.pathsep.join(
+                                           sys.path)))
+
+    return json.loads(result.stdout)
+
+
+def run_paths(bin_path, pdf_folder, max_pages):
+
+    '''yields the name, samples processed and function of each path'''
+
+    ga_file = ga.GENEActivFile(bin_path)
+    ga_file.read()
+    samples = ga_file.record_count * 300
+
+    # process_curr is timed on at most max_pages pages
+    curr_pages = min(max_pages, ga_file.record_count)
+    offsets = tuple(int(ga_file.header[f'{axis} offset']) for axis in 'xyz')
+    gains = tuple(int(ga_file.header[f'{axis} gain']) for axis in 'xyz')
+    hex_lines = ga_file.data_packet[9 : curr_pages * 10 : 10]
+    page_time = dt.datetime(2019, 8, 12, 10)
+
+    def read():
+        ga.GENEActivFile(bin_path).read()
+
+    def view_data():
+        ga_file.view_data(end = ga_file.record_count, downsample = 5,
+                          update = False)
+
+    def create_pdf():
+        ga_file.create_pdf(pdf_folder)
+
+    def read_genactiv_bin():
+        gr.ReadGENEActivBin(bin_path)
+
+    def process_curr():
+        for sequence, hex_line in enumerate(hex_lines):
+            gr.process_curr(hex_line, '', sequence, page_time, offsets, gains)
+
+    yield 'GENEActivFile.read', samples, read
+    yield 'view_data', samples, view_data
+    yield 'create_pdf', samples, create_pdf
+    yield 'ReadGENEActivBin', samples, read_genactiv_bin
+    yield 'process_curr', curr_pages * 300, process_curr
+
+
+def measure(function, memory):
+
+    '''returns wall time (s) and peak traced memory (MB or None)'''
+
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+
+    peak = None
+
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return seconds, peak
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description = 'Benchmark GENEActiv '
+                                     'decode, view and pdf paths.')
+    parser.add_argument('--days', type = float, nargs = '+',
+                        default = [1, 7, 14],
+                        help = 'recording lengths to benchmark')
+    parser.add_argument('--frequency', type = int, default = 75,
+                        help = 'measurement frequency (Hz)')
+    parser.add_argument('--paths', nargs = '+',
+                        help = 'only benchmark these paths')
+    parser.add_argument('--max-pages', type = int, default = 2000,
+                        help = 'pages processed by process_curr')
+    parser.add_argument('--memory', action = 'store_true',
+                        help = 'also measure peak memory (slower)')
+    parser.add_argument('--folder', default = 'benchmark_data',
+                        help = 'folder for synthetic files')
+    parser.add_argument('--json', help = 'append results to this file')
+    parser.add_argument('--import-budget', type = float, default = 0.5,
+                        help = 'maximum seconds to import each reader '
+                        'module')
+    args = parser.parse_args()
+
+    over_budget = False
+
+    pdf_folder = os.path.join(args.folder, 'pdf')
+    os.makedirs(pdf_folder, exist_ok = True)
+
+    print(f"{'path':<20} {'days':>5} {'seconds':>9} {'samples/s':>12} "
+          f"{'MB/s':>8} {'peak MB':>8}")
+
+    # import time of reader modules (budget test)
+    for module in IMPORT_MODULES:
+
+        name = 'import ' + module.split('.')[-1]
+        if args.paths and name not in args.paths: continue
+
+        seconds, lazy = import_time(module)
+
+        lazy_text = f"  loaded {', '.join(lazy)}" if lazy else ''
+        print(f'{name:<20} {"":>5} {seconds:9.2f}{lazy_text}')
+
+        if seconds > args.import_budget or lazy:
+            over_budget = True
+            print(f'{name} exceeds import budget of {args.import_budget} s '
+                  f'or loads {", ".join(LAZY_MODULES)}')
+
+        if args.json:
+            with open(args.json, 'a') as json_file:
+                json_file.write(json.dumps({'path' : name,
+                                            'seconds' : seconds,
+                                            'lazy_modules' : lazy}) + '\n')
+
+    for days in args.days:
+
+        pages = int(days * 24 * 60 * 60 * args.frequency / 300)
+        bin_path = os.path.join(args.folder,
+                                f'synthetic_{args.frequency}Hz_{pages}.bin')
+
+        if not os.path.exists(bin_path):
+            write_ga_bin(bin_path, pages, frequency = args.frequency)
+
+        bin_bytes = os.path.getsize(bin_path)
+
+        for name, samples, function in run_paths(bin_path, pdf_folder,
+                                                 args.max_pages):
+
+            if args.paths and name not in args.paths: continue
+
+            seconds, peak = measure(function, args.memory)
+
+            # bytes processed in proportion to samples processed
+            megabytes = bin_bytes * samples / (pages * 300) / 1e6
+
+            result = {'path' : name,
+                      'days' : days,
+                      'pages' : pages,
+                      'seconds' : seconds,
+                      'samples_per_second' : samples / seconds,
+                      'mb_per_second' : megabytes / seconds,
+                      'peak_mb' : peak}
+
+            peak_text = '' if peak is None else f'{peak:8.1f}'
+            print(f'{name:<20} {days:5g} {seconds:9.2f} '
+                  f"{result['samples_per_second']:12.0f} "
+                  f"{result['mb_per_second']:8.2f} {peak_text}")
+
+            if args.json:
+                with open(args.json, 'a') as json_file:
+                    json_file.write(json.dumps(result) + '\n')
+
+    shutil.rmtree(pdf_folder)
+
+    if over_budget: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import numpy as np
+
+from owcurate.Python.file.GENEActivFile import GENEActivFile
+from owcurate.Python.file.EDFFile import EDFFile
+from owcurate.Python.file.SignalTools import (STEP_SIGNALS, time_grid,
+                                              interpolate)
+
+
+class DeviceSync:
+
+    '''Class for aligning signals from several devices worn at the same time
+    onto a shared time grid.
+
+    Each device file must already have been read (GENEActiv files can be
+    read with header_only = True). Signals are read from each file one
+    chunk of the grid at a time (only the records that cover the chunk) and
+    interpolated onto the grid, so recordings of any length can be aligned
+    without loading every full rate signal into memory.
+
+    Attributes
+    ----------
+    files : dict
+        RecordingFile object for each device keyed by device label
+    sample_rate : float
+        sample rate of the shared time grid (Hz)
+    correct_drift : bool
+        are device times adjusted for clock drift before aligning?
+    start_time : datetime64
+        time of the first sample of the grid
+    end_time : datetime64
+        time after the last sample of the grid
+    sample_count : int
+        number of samples in the grid
+
+    Methods
+    -------
+    from_paths(file_paths, **kwargs)
+        creates a DeviceSync object from a list of .bin and .edf files
+
+    iter_chunks(signals = None, chunk_seconds = 3600, max_gap = None)
+        yields the grid times and aligned signals of each chunk of the grid
+
+    '''
+
+
+    def __init__(self, files, sample_rate = 25, correct_drift = True,
+                 overlap_only = True):
+
+        '''
+        Parameters
+        ----------
+        files : dict
+            RecordingFile object (already read) for each device keyed by
+            device label
+        sample_rate : float
+            sample rate of the shared time grid (default = 25)
+        correct_drift : bool
+            should device times be adjusted for clock drift? (default = True)
+        overlap_only : bool
+            should the grid only cover the time when all devices were
+            recording? otherwise it covers the time when any device was
+            recording and signals are nan outside of each recording
+            (default = True)
+        '''
+
+        self.files = files
+        self.sample_rate = sample_rate
+        self.correct_drift = correct_drift
+
+        # start time of each record of each device
+        self.record_starts = {}
+
+        starts = []
+        ends = []
+
+        for label, file in files.items():
+
+            record_starts = file.record_times()
+            if correct_drift:
+                record_starts = file.correct_times(record_starts)
+            self.record_starts[label] = record_starts
+
+            # end of recording is the end of the last record
+            signal = file.signals[0]
+            record_duration = np.round(file.record_samples[signal] * 1e6 /
+                                       file.sample_rates[signal])
+
+            starts.append(record_starts[0])
+            ends.append(record_starts[-1] +
+                        np.timedelta64(int(record_duration), 'us'))
+
+        self.start_time = max(starts) if overlap_only else min(starts)
+        self.end_time = min(ends) if overlap_only else max(ends)
+
+        self.sample_count = max(0, int((self.end_time - self.start_time)
+                                       .astype(np.int64) / 1e6 * sample_rate))
+
+
+    @classmethod
+    def from_paths(cls, file_paths, **kwargs):
+
+        '''creates a DeviceSync object from a list of .bin and .edf files
+
+        The header of each file is read (pages are streamed as chunks of
+        the grid are aligned) and each file is labelled by its device
+        location, the last part of the file name (as in GENEActivFileName).
+        Files with the same device label cannot be told apart so a
+        ValueError is raised.
+
+        Parameters
+        ----------
+        file_paths : list
+            paths to GENEActiv .bin and EDF .edf files
+        **kwargs
+            passed to DeviceSync
+
+        Returns
+        -------
+        DeviceSync
+        '''
+
+        files = {}
+
+        for file_path in file_paths:
+
+            if file_path.lower().endswith('.bin'):
+                file = GENEActivFile(file_path)
+            else:
+                file = EDFFile(file_path)
+
+            if isinstance(file, GENEActivFile):
+                file.read(header_only = True)
+            else:
+                file.read()
+
+            base_file = os.path.splitext(os.path.basename(file_path))[0]
+            label = base_file.split('_')[-1]
+
+            if label in files:
+                raise ValueError(f'{file_path} has the same device label '
+                                 f'({label}) as {files[label].file_path}')
+
+            files[label] = file
+
+        return cls(files, **kwargs)
+
+
+    def iter_chunks(self, signals = None, chunk_seconds = 3600,
+                    max_gap = None):
+
+        '''yields the grid times and aligned signals of each chunk of the grid
+
+        Parameters
+        ----------
+        signals : dict
+            list of signal names to align for each device label
+            (default = None = all signals of all devices)
+        chunk_seconds : float
+            duration of each chunk (default = 3600)
+        max_gap : float
+            longest gap between samples (seconds) to interpolate across,
+            grid times in longer gaps are set to nan (default = None = 1.5
+            sample periods of each signal so only recording gaps are nan,
+            np.inf = interpolate across all gaps)
+
+        Yields
+        ------
+        tuple
+            grid times (ndarray (datetime64[us])) and aligned signals (dict
+            of ndarray keyed by (device label, signal name))
+        '''
+
+        if signals is None:
+            signals = {label : file.signals
+                       for label, file in self.files.items()}
+
+        chunk_samples = int(chunk_seconds * self.sample_rate)
+
+        for first in range(0, self.sample_count, chunk_samples):
+
+            grid_times = time_grid(self.start_time, self.sample_rate,
+                                   min(chunk_samples,
+                                       self.sample_count - first),
+                                   first = first)
+
+            aligned = {}
+
+            for label, file in self.files.items():
+
+                # records that cover the chunk (including the records
+                # before and after to interpolate at chunk edges)
+                record_starts = self.record_starts[label]
+                start = max(np.searchsorted(record_starts, grid_times[0],
+                                            side = 'right'), 1)
+                end = min(np.searchsorted(record_starts, grid_times[-1],
+                                          side = 'right') + 1,
+                          file.record_count)
+
+                data = file.read_signals(signals[label], start = start,
+                                         end = end)
+
+                for signal in signals[label]:
+
+                    times = file.sample_times(
+                        signal, start = start, end = end,
+                        correct_drift = self.correct_drift)
+
+                    method = ('previous' if signal in STEP_SIGNALS
+                              else 'linear')
+
+                    signal_gap = (1.5 / file.sample_rates[signal]
+                                  if max_gap is None else max_gap)
+
+                    aligned[(label, signal)] = interpolate(
+                        times, data[signal], grid_times, method = method,
+                        max_gap = signal_gap)
+
+            yield grid_times, aligned
@@ -14,23 +14,628 @@
 #       read either all of the data or a subset of the data, create a summary
 #       pdf of the data
 
+import os
+import datetime as dt
+import numpy as np
 
-class EDFFile:
+from owcurate.Python.file.RecordingFile import RecordingFile
 
-    '''Class for interacting with European Data Format Files (.edf) files.'''
-    
 
-    def __init__(self, file_path):
+# width (in characters) of each general header field
+HEADER_FIELDS = [('version', 8),
+                 ('patient_id', 80),
+                 ('recording_id', 80),
+                 ('start_date', 8),
+                 ('start_time', 8),
+                 ('num_bytes', 8),
+                 ('reserved', 44),
+                 ('num_records', 8),
+                 ('dur_record', 8),
+                 ('num_signals', 4)]
 
-  
+# width (in characters) of each signal header field
+SIGNAL_FIELDS = [('sig_labels', 16),
+                 ('sig_type', 80),
+                 ('sig_phys_dim', 8),
+                 ('sig_phys_min', 8),
+                 ('sig_phys_max', 8),
+                 ('sig_dig_min', 8),
+                 ('sig_dig_max', 8),
+                 ('sig_prefilt', 80),
+                 ('sig_record_samples', 8),
+                 ('sig_reserved', 32)]
 
-    def read_header(self, ...):
+# label of the EDF+ annotation signal (the first annotation of each data
+# record holds the onset of the record in seconds after the start time)
+ANNOTATION_LABEL = 'EDF Annotations'
 
-   
-    def read_data(self, ...):
 
- 
-        
-    def create_pdf(self, ...):
+def record_annotations(onsets, samples = 16):
 
- 
+    '''returns EDF+ annotation signal values holding the onset of each data
+    record
+
+    Parameters
+    ----------
+    onsets : ndarray
+        onset of each data record in seconds after the header start time
+    samples : int
+        number of 2 byte annotation samples in each data record
+        (default = 16)
+
+    Returns
+    -------
+    ndarray
+        int16 values (records, samples) of the time-keeping annotation of
+        each data record (e.g. '+4.25' followed by 20 20 0 bytes)
+    '''
+
+    tals = np.zeros((len(onsets), samples * 2), dtype = np.uint8)
+
+    for row, onset in enumerate(onsets):
+        tal = (f'{onset:+.6f}'.rstrip('0').rstrip('.').encode('ascii') +
+               b'\x14\x14\x00')
+        tals[row, :len(tal)] = np.frombuffer(tal, dtype = np.uint8)
+
+    return tals.view('<i2')
+
+
+def parse_onsets(annotation_values):
+
+    '''returns the onset of each data record from EDF+ annotation signal
+    values (see record_annotations)
+
+    Parameters
+    ----------
+    annotation_values : ndarray
+        int16 annotation values of each data record (records, samples)
+
+    Returns
+    -------
+    ndarray
+        onset of each data record in seconds after the header start time
+    '''
+
+    tals = np.ascontiguousarray(annotation_values, dtype = '<i2').view(
+        np.uint8)
+
+    return np.array([float(row.tobytes().split(b'\x14', 1)[0])
+                     for row in tals])
+
+
+class EDFFile(RecordingFile):
+
+    '''Class for interacting with European Data Format Files (.edf) files.
+
+    Only the header is read by read(), data records are read from the file
+    as windows are requested so that large files can be processed in
+    bounded memory.
+
+    Attributes
+    ----------
+    file_path : str
+        the path to the .edf file
+    header : dict
+        keys and values from the general header, signal header values are
+        stored as lists with one item per signal
+    start_datetime : datetime
+        start date and time of the recording (EDF+ files start at the onset
+        of the first data record, which can be a fraction of a second after
+        the header start time)
+    edf_plus : str
+        'EDF+C' (continuous) or 'EDF+D' (discontinuous) for EDF+ files,
+        otherwise None
+    record_duration : float
+        duration of each data record in seconds
+
+    See RecordingFile for the attributes describing signals and records.
+
+    Methods
+    -------
+    read()
+        reads and parses the header
+
+    read_window(signal, start = 1, end = -1, calibrate = True)
+        returns the values of one signal for a window of data records
+
+    record_times(start = 1, end = -1)
+        returns the start time of each data record in a window
+
+    record_onsets(start = 1, end = -1)
+        returns the onset of each data record in a window of an EDF+ file
+
+    '''
+
+
+    def __init__(self, file_path, progress = None, cache = None):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the .edf file
+        progress : ProgressReporter
+            reports warnings (default = None = warnings are passed to the
+            'owcurate' logger)
+        cache : ScratchCache
+            local scratch disk cache for copies of remote files
+            (default = None = read directly from file_path)
+        '''
+
+        # path to .edf file and header
+        super().__init__(file_path, progress, cache)
+
+        self.start_datetime = None       # start date and time of recording
+        self.header_datetime = None      # start time in header (seconds)
+        self.edf_plus = None             # EDF+C or EDF+D (None = EDF)
+        self.record_duration = None      # duration of data record (seconds)
+        self.header_bytes = None         # size of header in bytes
+        self.record_bytes = None         # size of one data record in bytes
+        self.sig_gains = None            # digital to physical gain
+        self.sig_offsets = None          # digital to physical offset
+        self.sig_record_index = None     # first sample of signal in record
+
+
+    def read(self):
+
+        '''reads and parses the header of the .edf file
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True if file exists and was read, False if file does not exist
+
+        '''
+
+        def read_header():
+
+            '''reads general and signal header text from the .edf file
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            str
+                general header followed by signal headers
+            '''
+
+            with open(self.read_path, 'rb') as edf_file:
+
+                # read general header and parse number of signals
+                header_packet = edf_file.read(256).decode('latin-1')
+                num_signals = int(header_packet[252:256])
+
+                # read signal headers
+                header_packet += edf_file.read(256 * num_signals).decode(
+                    'latin-1')
+
+            return header_packet
+
+
+        def parse_header(header_packet):
+
+            '''parses the header packet previously read from the file
+
+            Stores the header information in the header (dict) attribute.
+
+            Parameters
+            ----------
+            header_packet : str
+                general header followed by signal headers
+
+            Returns
+            -------
+            None
+
+            '''
+
+            self.header = {}
+
+            # parse general header fields
+            position = 0
+            for key, width in HEADER_FIELDS:
+                self.header[key] = header_packet[position:position + width]
+                position += width
+
+            num_signals = int(self.header['num_signals'])
+
+            # parse signal header fields (all values of a field are stored
+            # together)
+            for key, width in SIGNAL_FIELDS:
+                self.header[key] = [
+                    header_packet[position + i * width:
+                                  position + (i + 1) * width].strip()
+                    for i in range(num_signals)]
+                position += width * num_signals
+
+
+        def set_signal_info():
+
+            '''Sets signal, record and calibration information from header
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+
+            '''
+
+            # parse start date and time (two digit year: 85-99 = 19xx)
+            day, month, year = [int(value) for value in
+                                self.header['start_date'].split('.')]
+            year += 1900 if year >= 85 else 2000
+            hour, minute, second = [int(value) for value in
+                                    self.header['start_time'].split('.')]
+            self.header_datetime = dt.datetime(year, month, day,
+                                               hour, minute, second)
+            self.start_datetime = self.header_datetime
+
+            reserved = self.header['reserved'].strip()
+            self.edf_plus = (reserved[:5] if reserved.startswith('EDF+')
+                             else None)
+
+            self.record_duration = float(self.header['dur_record'])
+            self.header_bytes = int(self.header['num_bytes'])
+
+            record_samples = [int(value) for value in
+                              self.header['sig_record_samples']]
+            self.record_bytes = 2 * sum(record_samples)
+
+            # number of records may be -1 if recording was not closed
+            self.record_count = int(self.header['num_records'])
+            if self.record_count < 0:
+                self.record_count = ((os.path.getsize(self.read_path) -
+                                      self.header_bytes) // self.record_bytes)
+
+            # annotation signal is not a data signal
+            labels = self.header['sig_labels']
+            self.signals = [label for label in labels
+                            if label != ANNOTATION_LABEL]
+            self.record_samples = dict(zip(labels, record_samples))
+            self.sample_rates = {signal : samples / self.record_duration
+                                 for signal, samples
+                                 in self.record_samples.items()}
+
+            # calculate gains and offsets based on physical and digital
+            # mins and maxes
+            phys_min = np.array(self.header['sig_phys_min'], dtype = float)
+            phys_max = np.array(self.header['sig_phys_max'], dtype = float)
+            dig_min = np.array(self.header['sig_dig_min'], dtype = float)
+            dig_max = np.array(self.header['sig_dig_max'], dtype = float)
+
+            gains = (phys_max - phys_min) / (dig_max - dig_min)
+            offsets = phys_max - (gains * dig_max)
+
+            self.sig_gains = dict(zip(labels, gains))
+            self.sig_offsets = dict(zip(labels, offsets))
+
+            # position of first sample of each signal within a record
+            self.sig_record_index = dict(
+                zip(labels, np.cumsum([0] + record_samples[:-1]).tolist()))
+
+            # EDF+ recording starts at the onset of the first data record
+            if self.edf_plus and self.record_count:
+                self.start_datetime += dt.timedelta(
+                    seconds = self.record_onsets(1, 1)[0])
+
+
+        # if file exists then read it
+        if os.path.exists(self.file_path):
+
+            # use local copy if cache is used
+            self.read_path = self.local_path()
+
+            # read and parse header
+            parse_header(read_header())
+
+            # set signal and record information
+            set_signal_info()
+
+            return True # file exists and was read
+
+        else:
+
+            self.progress.warning(f'{self.file_path} does not exist.',
+                                  file_path = self.file_path)
+
+            return False # file did not exist
+
+
+    def read_window(self, signal, start = 1, end = -1, calibrate = True):
+
+        '''returns the values of one signal for a window of data records
+
+        Parameters
+        ----------
+        signal : str
+            name of the signal (one of the items in signals)
+        start : int
+            first record of window (coerced to be > 0, default = 1)
+        end : int
+            last record of window (coerced to be between start and last
+            record, default = -1 = read all records)
+        calibrate : bool
+            should digital values be converted to physical values?
+            (default = True)
+
+        Returns
+        -------
+        ndarray
+            one value for each sample of the signal in the window
+        '''
+
+        start, end = self.check_window(start, end)
+
+        # read records in window
+        with open(self.read_path, 'rb') as edf_file:
+            edf_file.seek(self.header_bytes +
+                          (start - 1) * self.record_bytes)
+            records = np.fromfile(edf_file, dtype = '<i2',
+                                  count = ((end - (start - 1)) *
+                                           self.record_bytes // 2))
+
+        # select signal samples from each record
+        records = records.reshape(-1, self.record_bytes // 2)
+        first = self.sig_record_index[signal]
+        values = records[:, first:first + self.record_samples[signal]].ravel()
+
+        if calibrate:
+            values = values * self.sig_gains[signal] + self.sig_offsets[signal]
+
+        return values
+
+
+    def record_times(self, start = 1, end = -1):
+
+        '''returns the start time of each data record in a window
+
+        Parameters
+        ----------
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            start time of each data record in the window
+        '''
+
+        start, end = self.check_window(start, end)
+
+        # records of discontinuous files start at their onsets
+        if self.edf_plus == 'EDF+D':
+            return (np.datetime64(self.header_datetime, 'us') +
+                    np.round(self.record_onsets(start, end) * 1e6).astype(
+                        'timedelta64[us]'))
+
+        offsets = np.round(np.arange(start - 1, end) * self.record_duration *
+                           1e6).astype('timedelta64[us]')
+
+        return np.datetime64(self.start_datetime, 'us') + offsets
+
+
+    def record_onsets(self, start = 1, end = -1):
+
+        '''returns the onset of each data record in a window of an EDF+ file
+
+        Only the annotation signal of each record is copied from the file
+        (the file is memory mapped).
+
+        Parameters
+        ----------
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+
+        Returns
+        -------
+        ndarray
+            onset of each data record in seconds after the header start time
+        '''
+
+        start, end = self.check_window(start, end)
+
+        records = np.memmap(self.read_path, dtype = '<i2', mode = 'r',
+                            offset = self.header_bytes,
+                            shape = (self.record_count,
+                                     self.record_bytes // 2))
+
+        first = self.sig_record_index[ANNOTATION_LABEL]
+        annotations = np.array(records[start - 1 : end, first : first +
+                                       self.record_samples[ANNOTATION_LABEL]])
+        del records
+
+        return parse_onsets(annotations)
+
+
+def format_field(value, width = 8):
+
+    '''formats a header value as text that fits in a fixed width field
+
+    Numbers are written with as many significant digits as will fit.
+
+    Parameters
+    ----------
+    value : str, int or float
+        header value
+    width : int
+        width of the header field in characters (default = 8)
+
+    Returns
+    -------
+    str
+        value padded with spaces to width characters
+    '''
+
+    if isinstance(value, float):
+        for precision in range(width, 0, -1):
+            text = f'{value:.{precision}g}'
+            if len(text) <= width: break
+    else:
+        text = str(value)
+
+    return text[:width].ljust(width)
+
+
+class EDFWriter:
+
+    '''Class for writing European Data Format (.edf) files one data record
+    at a time.
+
+    The header is written when the file is opened with the number of data
+    records set to -1 (unknown) and updated when the file is closed (with
+    the reserved field, which can be changed while writing), so
+    data can be written as it is produced without holding the whole
+    recording in memory. The file is written as file_path + '.part' and
+    renamed when closed, so a file that was not finished (e.g. an error in
+    a with block, which removes it) is never mistaken for a complete .edf.
+
+    Attributes
+    ----------
+    file_path : str
+        the path to the .edf file
+    header : dict
+        general header values (keys from HEADER_FIELDS) and signal header
+        values (keys from SIGNAL_FIELDS, one list item per signal) in the
+        same format as EDFFile.header; num_bytes, num_records and
+        num_signals are calculated
+    record_count : int
+        number of data records written
+
+    Methods
+    -------
+    write_records(data)
+        appends data records to the file
+
+    close()
+        updates the number of data records in the header and closes the file
+
+    abort()
+        closes and removes the incomplete file
+
+    '''
+
+
+    def __init__(self, file_path, header):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the .edf file to create
+        header : dict
+            general and signal header values
+        '''
+
+        self.file_path = file_path
+        self.header = dict(header)
+        self.record_count = 0
+
+        num_signals = len(self.header['sig_labels'])
+
+        self.header['num_bytes'] = 256 * (num_signals + 1)
+        self.header['num_records'] = -1
+        self.header['num_signals'] = num_signals
+
+        self.record_samples = [int(value) for value in
+                               self.header['sig_record_samples']]
+
+        # create header text from general and signal header fields
+        header_packet = ''.join(format_field(self.header.get(key, ''), width)
+                                for key, width in HEADER_FIELDS)
+        header_packet += ''.join(format_field(value, width)
+                                 for key, width in SIGNAL_FIELDS
+                                 for value in self.header.get(
+                                     key, [''] * num_signals))
+
+        # written to a temporary name and renamed when closed so an
+        # incomplete file is never left at file_path
+        self.part_path = self.file_path + '.part'
+        self.file = open(self.part_path, 'wb')
+        self.file.write(header_packet.encode('ascii'))
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        # a file left by an error is removed rather than left looking complete
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+    def write_records(self, data):
+
+        '''appends data records to the file
+
+        Parameters
+        ----------
+        data : dict
+            digital values of each signal keyed by signal label, each
+            containing a whole number of data records
+
+        Returns
+        -------
+        None
+        '''
+
+        # reshape each signal into one row per record and interleave
+        signals = [np.asarray(data[label]).reshape(-1, samples)
+                   for label, samples in zip(self.header['sig_labels'],
+                                             self.record_samples)]
+        records = np.concatenate(signals, axis = 1).astype('<i2')
+
+        records.tofile(self.file)
+        self.record_count += records.shape[0]
+
+
+    def close(self):
+
+        '''updates the number of data records in the header and closes the
+        file
+
+        Returns
+        -------
+        None
+        '''
+
+        if self.file.closed: return
+
+        # reserved field can be changed while writing (e.g. to EDF+D)
+        self.file.seek(192)
+        self.file.write(format_field(self.header.get('reserved', ''),
+                                     44).encode('ascii'))
+        self.file.write(format_field(self.record_count).encode('ascii'))
+        self.file.close()
+        os.replace(self.part_path, self.file_path)
+
+
+    def abort(self):
+
+        '''closes and removes the incomplete file
+
+        Returns
+        -------
+        None
+        '''
+
+        if not self.file.closed: self.file.close()
+
+        if os.path.exists(self.part_path): os.remove(self.part_path)
@@ -2,17 +2,625 @@
 # Date: September 2019
 
 import os
-import shutil
+import io
+import csv
+import itertools
+import functools
 import datetime as dt
-import fpdf
-import matplotlib.pyplot as plt
-import matplotlib.style as mstyle
-import matplotlib.dates as mdates
+import numpy as np
 
-mstyle.use('fast')
+from owcurate.Python.file.RecordingFile import RecordingFile
+from owcurate.Python.file.EDFFile import (EDFWriter, ANNOTATION_LABEL,
+                                          record_annotations)
+from owcurate.Python.file.SignalTools import (FIRDecimator, RepeatedValues,
+                                               TimeBins, sphere_calibration)
+from owcurate.Python.file.Instrumentation import StageTimer
+from owcurate.Python.file.PDFWriter import PDFWriter
+from owcurate.Python.file.Sidecar import Sidecar
+from owcurate.Python.file.PageScan import (PageScan, resync_pages,
+                                            find_discontinuities)
 
 
-class GENEActivFile:
+# names of signals stored in each measurement of a data page
+MEAS_SIGNALS = ['accel_x', 'accel_y', 'accel_z', 'light', 'button']
+
+
+# bit position and mask of each signal in a measurement
+MEAS_BITS = {'accel_x' : (36, 0xFFF),
+             'accel_y' : (24, 0xFFF),
+             'accel_z' : (12, 0xFFF),
+             'light'   : (2, 0x3FF),
+             'button'  : (1, 0x1)}
+
+
+# button state (bit 1 of the last hexadecimal character of a measurement)
+# for each ASCII code
+BUTTON_HEX = np.zeros(256, dtype = bool)
+for digit in '0123456789ABCDEFabcdef':
+    BUTTON_HEX[ord(digit)] = int(digit, 16) & 0x2 > 0
+
+
+# page, start time and duration (seconds) of each button press
+BUTTON_EVENT_DTYPE = [('page', np.int64),
+                      ('time', 'datetime64[us]'),
+                      ('duration', np.float64)]
+
+
+# columns of the hourly and daily summary tables (name, heading in pdf,
+# format in pdf and .csv)
+SUMMARY_COLUMNS = [('start', 'start', None),
+                   ('data_minutes', 'data(min)', '.1f'),
+                   ('wear_minutes', 'wear(min)', '.1f'),
+                   ('enmo_mg', 'ENMO(mg)', '.1f'),
+                   ('clipped_percent', 'clip(%)', '.2f'),
+                   ('light_mean_lux', 'light', '.0f'),
+                   ('light_max_lux', 'max light', '.0f'),
+                   ('temp_min', 'min temp', '.1f'),
+                   ('temp_max', 'max temp', '.1f'),
+                   ('button_presses', 'presses', 'd')]
+
+
+# format of the start time of each row of the summary tables
+SUMMARY_TIME_FORMATS = {'hour' : '%Y-%m-%d %H:%M',
+                        'day'  : '%Y-%m-%d (%a)'}
+
+
+@functools.lru_cache(maxsize = None)
+def plotting_modules():
+
+    '''returns the matplotlib.pyplot and matplotlib.dates modules
+
+    The plotting packages take seconds to import so they are only imported
+    (and the 'fast' plot style set) the first time a pdf is created rather
+    than whenever this module is imported.
+
+    Returns
+    -------
+    tuple
+        matplotlib.pyplot and matplotlib.dates modules
+    '''
+
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    plt.style.use('fast')
+
+    return plt, mdates
+
+
+def decode_pages(hex_lines, out = None):
+
+    '''decodes hexadecimal page data into digital signal values
+
+    Each page holds 300 measurements of 12 hexadecimal characters (48 bits)
+    packed as 12 bit x, y and z accelerometer values (two's complement),
+    a 10 bit light value, a 1 bit button value and 1 reserved bit. All
+    pages are decoded at once using numpy rather than one measurement at a
+    time.
+
+    Parameters
+    ----------
+    hex_lines : list
+        hexadecimal data line (str) from each page
+    out : dict
+        preallocated int16 ndarray (at least 300 values per page) to decode
+        each signal into so arrays can be reused between calls (default =
+        None = create new arrays; signals not in out are also created)
+
+    Returns
+    -------
+    dict
+        one ndarray of digital values for each signal in MEAS_SIGNALS
+        (views of the arrays in out if given)
+    '''
+
+    # convert hex to bytes and group into 6 byte measurements
+    meas_bytes = np.frombuffer(bytes.fromhex(''.join(hex_lines)),
+                               dtype = np.uint8).reshape(-1, 6)
+    count = meas_bytes.shape[0]
+
+    # pad each measurement to 8 bytes and read as big-endian integers
+    padded = np.zeros((count, 8), dtype = np.uint8)
+    padded[:, 2:] = meas_bytes
+    meas = padded.view('>u8').ravel()
+
+    # parse each signal from measurement (through one reused work array)
+    work = np.empty(count, dtype = np.uint64)
+    decoded = {}
+
+    for signal, (shift, mask) in MEAS_BITS.items():
+
+        if out is not None and signal in out:
+            values = out[signal][:count]
+        else:
+            values = np.empty(count, dtype = np.int16)
+
+        np.right_shift(meas, np.uint64(shift), out = work)
+        np.bitwise_and(work, np.uint64(mask), out = work)
+        np.copyto(values, work, casting = 'unsafe')
+
+        # convert accelerometer data to signed integer
+        if mask == 0xFFF:
+            values[values > 2047] -= 4096
+
+        decoded[signal] = values
+
+    return decoded
+
+
+def button_states(hex_lines):
+
+    '''returns the button state of each measurement without decoding pages
+
+    Only the last hexadecimal character of each measurement (which holds the
+    button bit) is looked at, as bytes in one numpy array.
+
+    Parameters
+    ----------
+    hex_lines : list
+        hexadecimal data line (str) from each page
+
+    Returns
+    -------
+    ndarray (bool)
+        button state of each measurement (pages, 300)
+    '''
+
+    hex_bytes = np.frombuffer(''.join(hex_lines).encode('latin-1'),
+                              dtype = np.uint8).reshape(len(hex_lines), -1)
+
+    return BUTTON_HEX[hex_bytes[:, 11::12]]
+
+
+def edf_subfield(text):
+
+    '''returns text as an EDF+ patient or recording identification
+    subfield (spaces replaced by underscores, X if empty)
+
+    Parameters
+    ----------
+    text : str
+        subfield text
+
+    Returns
+    -------
+    str
+        subfield text without spaces
+    '''
+
+    return '_'.join(text.split()) or 'X'
+
+
+def parse_page_times(time_lines):
+
+    '''parses page time lines into an array of datetimes
+
+    Parameters
+    ----------
+    time_lines : list
+        'Page Time:YYYY-MM-DD HH:MM:SS:fff' line (str) from each page
+
+    Returns
+    -------
+    ndarray (datetime64[us])
+        time of the first measurement in each page
+    '''
+
+    # convert to ISO format (milliseconds follow the last colon)
+    iso_times = []
+    for line in time_lines:
+        time_text = line[line.index(':') + 1:]
+        last_colon = time_text.rindex(':')
+        iso_times.append(time_text[:last_colon] + '.' +
+                         time_text[last_colon + 1:])
+
+    return np.array(iso_times, dtype = 'datetime64[us]')
+
+
+class WindowFigure:
+
+    '''Class for plotting windows of a recording on one reusable figure.
+
+    The figure (one panel per signal) is built once with its spines, y axis
+    ticks, labels, limits and horizontal lines, and each window only
+    replaces the data of the signal lines, the x axis limits and the title.
+    If blit is True the parts of the figure that do not change are rendered
+    once and saved, and each window restores them and draws only the x axis
+    (hour ticks and grid lines), the signal lines and the artists drawn over
+    them (horizontal lines, left spine and title) before the pixels are
+    returned.
+
+    Attributes
+    ----------
+    figure : Figure
+        matplotlib figure
+    axes : ndarray
+        matplotlib axes of each panel
+    window : timedelta
+        length of time shown by the x axis of each window
+    blit : bool
+        render only the parts of the figure that change for each window?
+
+    Methods
+    -------
+    render(times, values, title)
+        plots one window and returns the pixels of the figure
+
+    close()
+        closes the figure
+
+    '''
+
+
+    def __init__(self, panels, window, blit = True, time_format = '%H:%M',
+                 max_ticks = None):
+
+        '''
+        Parameters
+        ----------
+        panels : list
+            one dict per panel with the y axis 'label', limits ('ylim'),
+            ticks ('yticks'), values of horizontal lines ('hlines') and line
+            'color'
+        window : timedelta
+            length of time shown by the x axis of each window
+        blit : bool
+            render only the parts of the figure that change for each
+            window? (default = True)
+        time_format : str
+            format of x axis time labels (default = '%H:%M')
+        max_ticks : int
+            maximum number of x axis ticks (default = None = one tick per
+            hour)
+        '''
+
+        plt, mdates = plotting_modules()
+
+        self.window = window
+        self.blit = blit
+        self.background = None
+
+        # initialize figure with subplots and title
+        self.figure, self.axes = plt.subplots(len(panels), 1)
+        self.title = self.figure.suptitle('', fontsize = 8, y = 0.96)
+
+        self.lines = []
+        self.hlines = []
+
+        for index, (axis, panel) in enumerate(zip(self.axes, panels)):
+
+            # signal line (data is replaced for each window)
+            line, = axis.plot([], [], color = panel['color'])
+            self.lines.append(line)
+
+            # remove box around plot
+            axis.spines['top'].set_visible(False)
+            axis.spines['bottom'].set_visible(False)
+            axis.spines['right'].set_visible(False)
+
+            # set axis ticks and labels (times only on bottom plot)
+            axis.xaxis.set_major_locator(
+                mdates.HourLocator() if max_ticks is None else
+                plt.MaxNLocator(max_ticks))
+            axis.xaxis.set_major_formatter(mdates.DateFormatter(time_format))
+            if index != len(panels) - 1:
+                axis.tick_params(labelbottom = False)
+
+            axis.set_yticks(panel['yticks'])
+            axis.set_ylabel(panel['label'])
+
+            # set vertical lines on plot at hours
+            axis.grid(True, 'major', 'x', color = 'k', linestyle = '--')
+
+            # set horizontal lines on plot at zero and limits
+            self.hlines.append([axis.axhline(y = yline, color = 'grey',
+                                             linestyle = '-')
+                                for yline in panel['hlines']])
+
+            # set axis limits
+            axis.set_ylim(panel['ylim'])
+
+
+    def render(self, times, values, title):
+
+        '''plots one window and returns the pixels of the figure
+
+        Parameters
+        ----------
+        times : ndarray (datetime64) or list
+            time of each value (or a list of the times of each panel if
+            panels are sampled at different times)
+        values : list
+            values (ndarray) of each panel
+        title : str
+            title of the figure
+
+        Returns
+        -------
+        ndarray
+            RGBA pixels (rows, columns, 4) of the figure (the canvas buffer
+            which is replaced when the next window is rendered)
+        '''
+
+        plt, mdates = plotting_modules()
+
+        if not isinstance(times, list): times = [times] * len(self.lines)
+
+        # replace data, x axis limits and title (times shared by panels
+        # are converted once)
+        plot_times = {}
+        for line, panel_times, panel_values in zip(self.lines, times, values):
+            if id(panel_times) not in plot_times:
+                plot_times[id(panel_times)] = mdates.date2num(panel_times)
+            line.set_data(plot_times[id(panel_times)], panel_values)
+
+        window_start = times[0][0].astype('datetime64[us]').item()
+        for axis in self.axes:
+            axis.set_xlim(window_start, window_start + self.window)
+
+        self.title.set_text(title)
+
+        # render whole figure
+        canvas = self.figure.canvas
+
+        if not self.blit:
+            canvas.draw()
+            return np.asarray(canvas.buffer_rgba())
+
+        # artists of each panel drawn for each window (in the order the
+        # whole figure would be drawn)
+        changing = [[axis.xaxis, line] + hlines + [axis.spines['left']]
+                    for axis, line, hlines
+                    in zip(self.axes, self.lines, self.hlines)]
+
+        # render parts that do not change once (parts that change hidden)
+        if self.background is None:
+
+            artists = [self.title] + sum(changing, [])
+
+            for artist in artists: artist.set_visible(False)
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.figure.bbox)
+            for artist in artists: artist.set_visible(True)
+
+        # draw parts that change over parts that do not
+        canvas.restore_region(self.background)
+
+        for axis, artists in zip(self.axes, changing):
+            for artist in artists: axis.draw_artist(artist)
+
+        self.figure.draw_artist(self.title)
+
+        return np.asarray(canvas.buffer_rgba())
+
+
+    def close(self):
+
+        '''closes the figure'''
+
+        plt, mdates = plotting_modules()
+
+        plt.close(self.figure)
+
+
+def render_overview(bins, title, accel_lim, light_lim, temp_lim = (10, 40),
+                    days_per_page = 7):
+
+    '''plots a whole recording one day per row and yields the pixels of each
+    page
+
+    Each day is plotted from binned values (see TimeBins) as envelopes
+    (minimum to maximum of each bin) of the accelerometer axes above a strip
+    with the maximum light, mean temperature and bins with button presses,
+    (button presses are marked along the top of the strip) so the whole
+    recording fits on a few pages however it was sampled. Times with no
+    data are left blank.
+
+    Parameters
+    ----------
+    bins : TimeBins
+        bins of accel_x, accel_y, accel_z, light, temp and press (button
+        press starts) values, e.g. minute_bins from summarize (origin at
+        midnight)
+    title : str
+        title of each page
+    accel_lim : list
+        accelerometer axis limits
+    light_lim : list
+        light values shown as the bottom and top of the strip
+    temp_lim : list
+        temperatures shown as the bottom and top of the strip
+        (default = (10, 40))
+    days_per_page : int
+        number of days plotted on each page (default = 7)
+
+    Yields
+    ------
+    ndarray
+        RGBA pixels (rows, columns, 4) of each page (valid until the next
+        page is requested)
+    '''
+
+    plt, mdates = plotting_modules()
+
+    bins_per_day = int(round(24 * 60 * 60 / bins.bin_seconds))
+    day_count = -(-bins.size // bins_per_day)
+    hours = np.arange(bins_per_day) * bins.bin_seconds / 3600
+
+    def day_stat(signal, stat):
+
+        # value of stat in each bin as one row per day (NaN if no data)
+        if signal not in bins.stats:
+            return np.full((day_count, bins_per_day), np.nan)
+
+        values = bins.get(signal, stat)
+        values = np.append(values, np.full(day_count * bins_per_day -
+                                           len(values), np.nan))
+
+        return values.reshape(day_count, bins_per_day)
+
+    accel_min = {signal : day_stat(signal, 'min')
+                 for signal in ['accel_x', 'accel_y', 'accel_z']}
+    accel_max = {signal : day_stat(signal, 'max')
+                 for signal in ['accel_x', 'accel_y', 'accel_z']}
+
+    # light and temperature scaled to the strip (0 to 1)
+    light = ((day_stat('light', 'max') - light_lim[0]) /
+             (light_lim[1] - light_lim[0]))
+    temp = ((day_stat('temp', 'mean') - temp_lim[0]) /
+            (temp_lim[1] - temp_lim[0]))
+    button = day_stat('press', 'max') >= 1
+
+    for first_day in range(0, day_count, days_per_page):
+
+        figure = plt.figure()
+
+        try:
+
+            figure.suptitle(title, fontsize = 8, y = 0.96)
+            figure.text(0.5, 0.01, 'accel_x (b), accel_y (g), accel_z (r), '
+                        'max light (c), mean temp (y), button (m)',
+                        ha = 'center', fontsize = 6)
+
+            # rows have the same height on every page
+            grid = figure.add_gridspec(2 * days_per_page, 1,
+                                       height_ratios = [3, 1] * days_per_page,
+                                       hspace = 0.15)
+
+            days = range(first_day, min(first_day + days_per_page, day_count))
+
+            for row, day in enumerate(days):
+
+                accel_axis = figure.add_subplot(grid[2 * row])
+                strip_axis = figure.add_subplot(grid[2 * row + 1],
+                                                sharex = accel_axis)
+
+                # accelerometer envelopes
+                for signal, color in zip(['accel_x', 'accel_y', 'accel_z'],
+                                         ['b', 'g', 'r']):
+                    accel_axis.fill_between(hours, accel_min[signal][day],
+                                            accel_max[signal][day],
+                                            color = color, alpha = 0.4,
+                                            linewidth = 0)
+
+                # light, temperature and button presses
+                strip_axis.fill_between(hours, 0, light[day], color = 'c',
+                                        alpha = 0.6, linewidth = 0)
+                strip_axis.plot(hours, temp[day], color = 'y')
+                strip_axis.vlines(hours[button[day]], 0.8, 1, color = 'm',
+                                  linewidth = 0.5)
+
+                day_start = (bins.origin + np.timedelta64(day, 'D')).item()
+                accel_axis.set_ylabel(day_start.strftime('%a\n%b %-d'),
+                                      rotation = 0, ha = 'right',
+                                      va = 'center')
+
+                accel_axis.set_ylim(accel_lim)
+                strip_axis.set_ylim(0, 1)
+
+                for axis in [accel_axis, strip_axis]:
+
+                    axis.set_yticks([])
+                    axis.set_xlim(0, 24)
+                    axis.set_xticks(range(0, 25, 3))
+                    axis.grid(True, 'major', 'x', color = 'k',
+                              linestyle = '--')
+
+                    # remove box around plot
+                    axis.spines['top'].set_visible(False)
+                    axis.spines['right'].set_visible(False)
+
+                    # times only on bottom plot
+                    axis.tick_params(labelbottom = False)
+
+            strip_axis.tick_params(labelbottom = True)
+            strip_axis.set_xticklabels([f'{hour:02d}:00'
+                                        for hour in range(0, 25, 3)])
+
+            figure.canvas.draw()
+
+            yield np.asarray(figure.canvas.buffer_rgba())
+
+        finally:
+            plt.close(figure)
+
+
+def format_summary_value(value, value_format):
+
+    '''returns one value of a summary table as text ('' if missing)'''
+
+    if value_format is None: return str(value)
+    if value_format != 'd' and np.isnan(value): return ''
+
+    return format(value, value_format)
+
+
+def summary_text(table, period):
+
+    '''returns a summary table as fixed width lines of text
+
+    Parameters
+    ----------
+    table : dict
+        ndarray of each column in SUMMARY_COLUMNS (see
+        GENEActivFile.summary_table)
+    period : str
+        'hour' or 'day'
+
+    Returns
+    -------
+    str
+        heading and one line per row (missing values are shown as '-')
+    '''
+
+    time_format = SUMMARY_TIME_FORMATS[period]
+    time_width = len(dt.datetime(2000, 1, 1).strftime(time_format))
+
+    lines = [f"{'start':{time_width}}" +
+             ''.join(f'{heading:>10}'
+                     for name, heading, value_format in SUMMARY_COLUMNS[1:])]
+
+    for row, start in enumerate(table['start']):
+        values = [format_summary_value(table[name][row], value_format) or '-'
+                  for name, heading, value_format in SUMMARY_COLUMNS[1:]]
+        lines.append(start.item().strftime(time_format) +
+                     ''.join(f'{value:>10}' for value in values))
+
+    return '\n'.join(lines)
+
+
+def write_summary_csv(table, csv_path):
+
+    '''writes a summary table to a .csv file
+
+    Parameters
+    ----------
+    table : dict
+        ndarray of each column in SUMMARY_COLUMNS (see
+        GENEActivFile.summary_table)
+    csv_path : str
+        path to .csv file to create
+
+    Returns
+    -------
+    None
+    '''
+
+    with open(csv_path, 'w', newline = '') as csv_file:
+
+        writer = csv.writer(csv_file)
+        writer.writerow([name for name, heading, value_format
+                         in SUMMARY_COLUMNS])
+
+        for row, start in enumerate(table['start']):
+            writer.writerow([start.item().isoformat(sep = ' ')] +
+                            [format_summary_value(table[name][row],
+                                                  value_format)
+                             for name, heading, value_format
+                             in SUMMARY_COLUMNS[1:]])
+
+
+class GENEActivFile(RecordingFile):
 
     '''Class for interacting with GENEActiv .bin data files.
 
@@ -36,10 +644,15 @@ class GENEActivFile:
         somple rate of current dataview
     dataview = dict
         current dataview, one item for each signal
+    timer : StageTimer
+        records the cost of each processing stage (disabled by default)
+
+    See RecordingFile for the progress attribute and the attributes describing
+    signals and records (one record is one page).
 
     Methods
     -------
-    read()
+    read(header_only = False, contents = None)
         reads and parses header and reads hexidecimal string of data
         
     view_data(start = 1, end = 900, downsample = 1, temperature = True,
@@ -50,23 +663,97 @@ class GENEActivFile:
     create_pdf(pdf_folder, window_hours = 4, downsample = 5)
         creates a pdf summary of the file
 
+    summarize(epoch_minutes = 30, chunk_pages = 900)
+        bins the whole recording for the hourly and daily summary tables
+
+    summary_table(period = 'hour')
+        returns hourly or daily wear, ENMO, clipping, light, temperature
+        and button press summary
+
+    export_summary(csv_folder)
+        writes the hourly and daily summary tables to .csv files
+
+    button_events(use_sidecar = True, chunk_pages = 900)
+        returns the time and duration of each button press
+
+    autocalibrate(epoch_seconds = 10, still_sd = 0.013, window_epochs = 360,
+                  use_sidecar = True, chunk_pages = 900)
+        fits accelerometer calibration corrections to still periods
+
+    export_button_events(csv_folder)
+        writes the button presses to a .csv file
+
+    iter_page_chunks(start = 1, end = -1, chunk_pages = 900)
+        yields the lines of consecutive chunks of pages
+
+    iter_windows(window = 3600, step = None, overlap = 0, downsample = 1)
+        yields decoded windows of the recording in order
+
+    read_window(signal, start = 1, end = -1, calibrate = True)
+        returns the values of one signal for a window of pages
+
+    read_signals(signals = None, start = 1, end = -1, calibrate = True)
+        returns the values of several signals for a window of pages
+
+    record_times(start = 1, end = -1)
+        returns the time of the first measurement in each page of a window
+
+    window_lines(lines, start, end, chunk_pages = 900)
+        returns lines of each page of a window
+
+    correct_times(times)
+        adjusts device clock times for clock drift
+
 
     '''
     
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, timer = None, progress = None,
+                 cache = None, sidecar_folder = None):
 
         '''
         Parameters
         ----------
         file_path : str
             path to the GENEActiv .bin file
+        timer : StageTimer
+            records the cost of reading, header parsing, decoding,
+            timestamping, plotting and pdf writing (default = None = stages
+            are not recorded)
+        progress : ProgressReporter
+            reports progress of create_pdf and export_edf and warnings
+            (default = None = warnings and throttled progress are passed to
+            the 'owcurate' logger)
+        cache : ScratchCache
+            local scratch disk cache for copies of remote files
+            (default = None = read directly from file_path)
+        sidecar_folder : str
+            folder where values calculated from the whole file (e.g. button
+            events) are cached (see Sidecar, default = None = folder of the
+            .bin file)
         '''
 
-        self.file_path = file_path       # path to .bin file
-        self.header = {}                 # header dictionary
+        # path to .bin file and header
+        super().__init__(file_path, progress, cache)
+
+        # stage timing is opt-in
+        self.timer = timer if timer is not None else StageTimer(
+            enabled = False)
+
         self.pagecount = None            # actual pages read from file (float)
         self.pagecount_match = None      # does pagecount read match header
+        self.page_scan = None            # integrity scan of pages (PageScan)
+        self.skipped_lines = None        # lines not in a decodable page
+        self.page_lines = None           # line of each page after header
+                                         # (None = every 10 lines)
+        self.discontinuities = None      # pages not following previous page
+        self.summary_bins = None         # epochs of whole recording for
+                                         # summary tables (TimeBins)
+        self.minute_bins = None          # minutes of whole recording for
+                                         # overview pages (TimeBins)
+        self.sidecar = Sidecar(file_path, sidecar_folder)
+        self.autocalibration = None      # accelerometer corrections applied
+                                         # after factory calibration
         self.accel_x_min = None          # accelerometer x minimum value
         self.accel_x_max = None          # accelerometer x maximum value
         self.accel_y_min = None          # accelerometer y minimum value
@@ -77,19 +764,32 @@ class GENEActivFile:
         self.light_max = None            # light maximum value
         self.drift_rate = None           # rate of drift per unit of time
         self.data_packet = None          # hexadecimal data from entire file
+        self.stream = None               # page chunks streamed by
+                                         # window_lines (iter_page_chunks)
+        self.stream_chunk = None         # chunk read last from stream
         self.dataview_start = None       # start page of current dataview
         self.dataview_end = None         # end page of current dataview
         self.dataview_sample_rate = None # sample rate of current dataview
         self.dataview = None             # current dataview (subset of data)
         
 
-    def read(self):
+    def read(self, header_only = False, contents = None, scan = False):
 
         '''reads text header and hex data from GENEActiv .bin file
 
         Parameters
         ----------
-        None
+        header_only : bool
+            read only the header? pagecount is taken from the header (or the
+            scan) and pages can be streamed from the file with
+            iter_page_chunks (default = False)
+        contents : bytes
+            contents of the file already read into memory (e.g. by a
+            Prefetcher) (default = None = read from file_path)
+        scan : bool
+            check the integrity of every page with a PageScan? the scan is
+            stored in page_scan and its page count is used as pagecount
+            (default = False)
 
         Returns
         -------
@@ -111,18 +811,33 @@ class GENEActivFile:
             list
                 one string item per line in the header'''
 
-            # open file
-            bin_file = open(self.file_path, 'r', encoding = 'utf-8')
+            # open file (or contents already read)
+            if contents is None:
+                bin_file = open(self.read_path, 'r', encoding = 'utf-8')
+            else:
+                bin_file = io.TextIOWrapper(io.BytesIO(contents),
+                                            encoding = 'utf-8')
 
-            # read file
-            line_packet = [line[:-1] for line in bin_file.readlines()]
+            # read file (or only header lines)
+            if header_only:
+                line_packet = [bin_file.readline()[:-1] for i in range(59)]
+            else:
+                line_packet = [line[:-1] for line in bin_file.readlines()]
 
             # close file
             bin_file.close()
 
             # parse into header and data packets
             header_packet = line_packet[:59]
-            self.data_packet = line_packet[59:]
+            self.data_packet = None if header_only else line_packet[59:]
+
+            # keep only complete pages that can be decoded (pages are found
+            # from their markers so a bad page does not shift the pages
+            # after it)
+            if not header_only:
+                line_count = len(self.data_packet)
+                self.data_packet = resync_pages(self.data_packet)[0]
+                self.skipped_lines = line_count - len(self.data_packet)
 
             return header_packet
 
@@ -160,7 +875,8 @@ class GENEActivFile:
 
         def check_pagecount():
 
-            '''Checks to see if number of actual pages read matches header
+            '''Checks to see if number of actual pages read (or found by the
+            integrity scan) matches header
 
             Parameters
             ----------
@@ -175,29 +891,117 @@ class GENEActivFile:
             # set match to true
             self.pagecount_match = True
 
-            # get page counts
-            pagecount = len(self.data_packet) / 10
             header_pagecount = int(self.header['Number of Pages'])
 
-            # check if pages read is an integer (lines read is multiple of 10)
-            if not pagecount.is_integer():
+            # warn about pages that failed integrity checks
+            if self.page_scan is not None:
+
+                report = self.page_scan.report()
+
+                if report['bad_pages']:
+
+                    flags = ', '.join(f'{name} ({count})' for name, count
+                                      in report['flags'].items() if count)
+                    self.progress.warning(f"{report['bad_pages']} pages "
+                                          f'failed integrity checks: {flags}.',
+                                          bad_pages = report['bad_pages'],
+                                          flags = report['flags'],
+                                          gaps = report['gaps'])
+
+            # count decodable pages read (or found by the scan)
+            if self.data_packet is not None:
+                pagecount = len(self.data_packet) / 10
+            else:
+                pagecount = float(len(self.page_lines))
+
+            # check if any lines were skipped
+            if self.skipped_lines:
 
                 # set match to false and display warning
                 self.pagecount_match = False
-                print(f"****** WARNING: Pages read ({pagecount}) is not",
-                      f"an integer, data may be corrupt.\n")
+                self.progress.warning(f'{self.skipped_lines} lines are not '
+                                      'part of a complete page that can be '
+                                      'decoded and were skipped, data may '
+                                      'be corrupt.',
+                                      skipped_lines = self.skipped_lines)
 
             # check if pages read matches header count
             if pagecount != header_pagecount:
 
                 # set match to false and display warning
                 self.pagecount_match = False
-                print(f"****** WARNING: Pages read ({pagecount}) not equal to",
-                      f"'Number of Pages' in header ({header_pagecount}).\n")
+                self.progress.warning(f'Pages read ({pagecount}) not equal to '
+                                      "'Number of Pages' in header "
+                                      f'({header_pagecount}).',
+                                      pagecount = pagecount,
+                                      header_pagecount = header_pagecount)
 
             # store pagecount as attribute
             self.pagecount = pagecount
 
+        def set_signal_info():
+
+            '''Sets signal names, sample rates and samples per page
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+
+            '''
+
+            sample_rate = int(self.header['Measurement Frequency'][:-3])
+
+            self.signals = MEAS_SIGNALS + ['temp']
+            self.sample_rates = {signal : sample_rate
+                                 for signal in MEAS_SIGNALS}
+            self.sample_rates['temp'] = sample_rate / 300
+            self.record_samples = {signal : 300 for signal in MEAS_SIGNALS}
+            self.record_samples['temp'] = 1
+            self.record_count = int(self.pagecount)
+
+        def find_gaps():
+
+            '''Finds pages that do not start 300 samples after the page
+            before them (e.g. after pages that were skipped)
+
+            Stores the pages (and seconds of time added before them) in the
+            discontinuities attribute so timestamps can restart from the
+            page time of each page after a gap. Pages streamed after a
+            header only read without a scan are not checked (discontinuities
+            is None).
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+
+            '''
+
+            if self.data_packet is not None:
+                with self.timer.stage('timestamps'):
+                    self.discontinuities = find_discontinuities(
+                        parse_page_times(self.data_packet[3::10]),
+                        self.sample_rates['accel_x'])
+            elif self.page_scan is not None:
+                self.discontinuities = self.page_scan.discontinuities()
+            else:
+                self.discontinuities = None
+
+            if self.discontinuities is not None and len(self.discontinuities):
+                self.progress.warning(f'{len(self.discontinuities)} pages do '
+                                      'not follow the page before them, '
+                                      'timestamps restart from their page '
+                                      'times.',
+                                      discontinuities =
+                                      self.discontinuities['page'].tolist())
+
         def calc_ranges():
 
             '''Calculates actual accelerometer min and max values
@@ -288,16 +1092,41 @@ class GENEActivFile:
 
 
         # if file exists then read it
-        if os.path.exists(self.file_path):
+        if contents is not None or os.path.exists(self.file_path):
+
+            # use local copy if cache is used
+            if contents is None: self.read_path = self.local_path()
             
             # read header and page packet
-            header_packet = read_bin()
+            with self.timer.stage('read'):
+                header_packet = read_bin()
+
+            self.timer.add_bytes('read',
+                                 sum(len(line) + 1 for line in header_packet)
+                                 if header_only
+                                 else len(contents) if contents is not None
+                                 else os.path.getsize(self.read_path))
 
             # parse header
-            parse_header(header_packet)
+            with self.timer.stage('parse_header'):
+                parse_header(header_packet)
+
+            # check integrity of every page
+            self.page_scan = None
+            self.page_lines = None
+            if scan: self.scan_pages(contents)
 
             # confirm number of pages read matches header
-            check_pagecount()
+            if header_only and self.page_scan is None:
+                self.pagecount = float(self.header['Number of Pages'])
+            else:
+                check_pagecount()
+
+            # set signal and record information
+            set_signal_info()
+
+            # find gaps in page times
+            find_gaps()
 
             # calculate accelerometer ranges
             calc_ranges()
@@ -309,19 +1138,64 @@ class GENEActivFile:
 
         else:
 
-            print(f"****** WARNING: {self.file_path} does not exist.\n")
+            self.progress.warning(f'{self.file_path} does not exist.',
+                                  file_path = self.file_path)
 
             return False # file did not exist
 
 
-    def view_data(self, start = 1, end = -1, downsample = 1,
-                  temperature = True, calibrate = True, update = True,
-                  correct_drift = False):
+    def scan_pages(self, contents = None):
 
-        #TO DO:
-        # - test to ensure values are correct (compare to GENEAread R package)
-        # - confirm dictionary item lengths equal ?
-        # - option to adjust for clock drift (synchronize)
+        '''checks the integrity of every page and indexes the pages that
+        can be decoded (see PageScan)
+
+        The scan is stored in page_scan. When pages are streamed from the
+        file (after read(header_only = True)) the pagecount, the line of
+        each page (page_lines) and the discontinuities are taken from the
+        scan so streamed pages skip lines that are not part of a decodable
+        page.
+
+        Parameters
+        ----------
+        contents : bytes
+            contents of the file already read into memory (default = None
+            = read from file)
+
+        Returns
+        -------
+        PageScan
+            the scan of the file
+        '''
+
+        with self.timer.stage('scan'):
+            self.page_scan = PageScan(self.read_path).scan(contents = contents)
+
+        decodable = self.page_scan.decodable()
+        self.page_lines = self.page_scan.page_lines[decodable]
+
+        # pages streamed from file are indexed by the scan
+        if self.data_packet is None:
+
+            self.pagecount = float(len(self.page_lines))
+            self.record_count = len(self.page_lines)
+            self.discontinuities = self.page_scan.discontinuities()
+            self.skipped_lines = (
+                sum(count for line, count in self.page_scan.skipped_runs) +
+                self.page_scan.trailing_lines +
+                10 * (self.page_scan.pagecount - len(self.page_lines)))
+
+        return self.page_scan
+
+
+    def view_data(self, start = 1, end = -1, downsample = 1,
+                  temperature = True, calibrate = True, update = True,
+                  correct_drift = False, resample_rate = None,
+                  antialias = False, out = None):
+
+        #TO DO:
+        # - test to ensure values are correct (compare to GENEAread R package)
+        # - confirm dictionary item lengths equal ?
+        # - option to adjust for clock drift (synchronize)
         # - start and end by time (find last page w page time < start)
         # - add option to return battery voltage??
 
@@ -341,60 +1215,66 @@ class GENEActivFile:
             factor by which to downsample (coerced into range: 1-6, default = 5) 
         temperature : bool
             parse temperature data? (default = True)
-            NOTE: temperature is only sampled once per page but is currently
-            inserted at each measurement consistent with GENEARead R package 
+            NOTE: temperature is only sampled once per page so it is stored
+            once per page and repeated for each measurement when indexed or
+            converted to an array (see RepeatedValues) consistent with
+            GENEARead R package
         calibrate : bool
             should accelerometer and light values be calibrated? (default = True)
         update : bool
             should dataview attributes be updated? (default = True)
         correct_drift: bool
             should sample rate be adjusted for clock drift? (default = False)
+        resample_rate : float
+            resample to this exact sample rate instead of downsampling?
+            values are interpolated onto evenly spaced (drift corrected if
+            correct_drift is True) times and returned as ndarrays (see
+            RecordingFile.resample) (default = None = do not resample)
+        antialias : bool
+            should accelerometer and light values be low-pass filtered
+            before downsampling? otherwise every nth measurement is taken
+            (faster but high frequency movement is aliased) (default = False)
+        out : dict
+            preallocated ndarrays (e.g. the dataview returned by a previous
+            call) to write each signal into so arrays can be reused between
+            windows -- arrays that are too short or of the wrong type are
+            replaced (default = None = create new arrays)
 
         Returns
         -------
         dataview : dict
-            one item for each signal parsed
+            one ndarray for each signal parsed (views of the arrays in out
+            if given)
         '''
 
-        def uint2int(unsigned_value, sign_bit):
-
-            '''converts an unsigned integer (in two's complement
-            representation) to a signed integer
-
-            Parameters
-            ----------
-            unsigned_value : int
-                unsigned integer value
-            sign_bit : int
-                the bit of the integer that indicates the sign (analagous to
-                the intended size of the number in bits regardless of how it is
-                actually stored)
-
-            Returns
-            -------
-            signed_value : int
-                signed integer value
-            ''' 
+        def display_warnings():
 
-            # x + x_twos_comp = 2^N
-            # x = 2^N - x_twos_comp
-            # x_twos_comp = 2^N - x
+            '''displays messages if arguments were modified'''
 
-            # unsigned_value must be between 0 and 2^sign_bit - 1
-            # inclusive otherwise give error
+            # display message if start and end values were changed
+            if old_start != start or old_end != end:
+                self.progress.warning('Start or end values were modified to '
+                                      'fit acceptable range '
+                                      f'(old range: {old_start} to {old_end}, '
+                                      f'new range: {start} to {end}).',
+                                      old_range = (old_start, old_end),
+                                      new_range = (start, end))
 
-            signed_value = (unsigned_value - 2**sign_bit
-                            if unsigned_value > 2**(sign_bit - 1) - 1
-                            else  unsigned_value)
-
-            return signed_value
+            # display message downsample ratio was changed
+            if old_downsample != downsample:
+                self.progress.warning('Downsample value was modified to fit '
+                                      'acceptable range '
+                                      f'(old value: {old_downsample}, '
+                                      f'new value: {downsample}).',
+                                      old_downsample = old_downsample,
+                                      new_downsample = downsample)
 
         # check whether data has been read
         if (not self.header or self.data_packet is None
             or self.pagecount is None):
 
-            print('****** WARNING: Cannot view data because file has not',
-                  'been read.\n')
+            self.progress.warning('Cannot view data because file has not '
+                                  'been read.')
             return
 
         # store passed arguments before checking and modifying
@@ -413,36 +1293,51 @@ class GENEActivFile:
         if downsample < 1: downsample = 1
         elif downsample > 6: downsample = 6
 
-        # initialize dataview
-        dataview = {"time" : [],
-                    "accel_x" : [],
-                    "accel_y" : [],
-                    "accel_z" : [],
-                    "light"   : [],
-                    "button"  : []}
+        # resample to an exact rate instead of downsampling
+        if resample_rate is not None:
+
+            signals = MEAS_SIGNALS + (['temp'] if temperature else [])
+            dataview = self.resample(resample_rate, signals = signals,
+                                     start = start, end = end,
+                                     correct_drift = correct_drift,
+                                     calibrate = calibrate)
+
+            if update:
+                self.dataview_start = start
+                self.dataview_end = end
+                self.dataview_sample_rate = resample_rate
+                self.dataview = dataview
+
+            display_warnings()
+
+            return dataview
 
         total_pages = end - (start - 1)
         sample_rate = int(self.header['Measurement Frequency'][:-3])
         downsampled_rate = (sample_rate / downsample)
         meas_per_page = int(300 / downsample)
+        total_meas = total_pages * meas_per_page
 
-        # get calibration variables from header
-        if calibrate:
-            x_gain = int(self.header['x gain'])
-            y_gain = int(self.header['y gain'])
-            z_gain = int(self.header['z gain'])
-            x_offset = int(self.header['x offset'])
-            y_offset = int(self.header['y offset'])
-            z_offset = int(self.header['z offset'])
-            lux = int(self.header['Lux'])
-            volts = int(self.header['Volts'])
+        def output_array(key, dtype):
 
+            '''returns the array in out for key if it can be reused,
+            otherwise a new array'''
 
-        # get start_time (time of first data point in view)
-        start_time_line = self.data_packet[(start - 1) * 10 + 3]
-        colon = start_time_line.index(':')
-        start_time = start_time_line[colon + 1:]
-        start_time = dt.datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S:%f')
+            if (out is not None and isinstance(out.get(key), np.ndarray)
+                    and out[key].dtype == dtype
+                    and len(out[key]) >= total_meas):
+                return out[key][:total_meas]
+
+            return np.empty(total_meas, dtype = dtype)
+
+        # initialize dataview
+        dataview = {'time' : output_array('time', 'datetime64[us]')}
+
+        for signal in MEAS_SIGNALS:
+            dataview[signal] = output_array(
+                signal, float if calibrate and signal != 'button'
+                or antialias and downsample > 1 and signal != 'button'
+                else np.int16)
 
         config_time = dt.datetime.strptime(self.header["Config Time"],
                                            '%Y-%m-%d %H:%M:%S:%f')
@@ -450,74 +1345,118 @@ class GENEActivFile:
         # set time_adj based on correct_drift = True or False
         time_adj = (1-self.drift_rate) if correct_drift else 1
 
-        # adjust for drift
-        start_time = (config_time +
-                      ((start_time - config_time) * time_adj))  
+        def page_start_time(page):
 
-        # generate timestamps
-        dataview['time'] = [start_time +
-                            dt.timedelta(seconds = i / downsampled_rate *
-                                         time_adj)
-                            for i in range(total_pages * meas_per_page)]    
-            
-        # grab chunk of data from packet
-        data_chunk = [self.data_packet[i]
-                    for i in range((start - 1) * 10 + 9, end * 10, 10)]
-        
-        # loop through pages
-        for data_line in data_chunk:
-
-            # loop through 300 measurements in each page
-            for meas_index in range(0, 300, downsample):
-
-                # parse measurement from line and convert from hex to bin
-                meas = data_line[meas_index * 12 : (meas_index + 1) * 12]
-                meas = bin(int(meas, 16))[2:]
-                meas = meas.zfill(48)
-
-                # parse each signal from measurement and convert to int
-                accel_x = int(meas[0:12], 2)
-                accel_y = int(meas[12:24], 2)
-                accel_z =  int(meas[24:36], 2)
-                light = int(meas[36:46], 2)
-                button = int(meas[46], 2)
-                # res = int(meas[47], 2)   # NOT USED FOR NOW
-
-                # convert accelerometer data to signed integer
-                accel_x = uint2int(accel_x, 12)
-                accel_y = uint2int(accel_y, 12)
-                accel_z = uint2int(accel_z, 12)
-
-                # calibrate accelerometers
-                if calibrate:
-                    accel_x = (accel_x * 100 - x_offset) / x_gain
-                    accel_y = (accel_y * 100 - y_offset) / y_gain
-                    accel_z = (accel_z * 100 - z_offset) / z_gain
-                    light = light * lux / volts
-
-                # append values to dataview dict
-                dataview['accel_x'].append(accel_x)
-                dataview['accel_y'].append(accel_y)
-                dataview['accel_z'].append(accel_z)
-                dataview['light'].append(light)
-                dataview['button'].append(button)
-
-                            
-        # add tempreature if requested
-        if temperature:
-
-            # create temp key in dict
-            dataview['temp'] = []
-
-            # get all temp lines from data packet (1 per page)
-            temp_chunk = [self.data_packet[i]
-                          for i in range((start - 1) * 10 + 5, end * 10, 10)]
-
-            # parse temp from temp lines and insert into dict
-            for temp_line in temp_chunk:
-                colon = temp_line.index(':')
-                dataview['temp'].extend(
-                    [float(temp_line[colon + 1:])] * round(meas_per_page))
+            '''returns the time of the first data point in a page'''
+
+            start_time_line = self.data_packet[(page - 1) * 10 + 3]
+            colon = start_time_line.index(':')
+            start_time = dt.datetime.strptime(start_time_line[colon + 1:],
+                                              '%Y-%m-%d %H:%M:%S:%f')
+
+            # adjust for drift
+            return config_time + ((start_time - config_time) * time_adj)
+
+        # timestamps restart from the page time of each page that does not
+        # follow the page before it
+        segment_starts = [start]
+        if self.discontinuities is not None:
+            segment_starts += [int(page) for page
+                               in self.discontinuities['page']
+                               if start < page <= end]
+        segment_ends = segment_starts[1:] + [end + 1]
+
+        with self.timer.stage('timestamps'):
+
+            # generate timestamps (microseconds after the start time of each
+            # segment written into the time array)
+            time_values = dataview['time'].view(np.int64)
+
+            for segment_start, segment_end in zip(segment_starts,
+                                                  segment_ends):
+
+                first = (segment_start - start) * meas_per_page
+                last = (segment_end - start) * meas_per_page
+
+                time_values[first:last] = np.round(
+                    np.arange(last - first) / downsampled_rate * time_adj *
+                    1e6)
+                time_values[first:last] += np.datetime64(
+                    page_start_time(segment_start), 'us').astype(np.int64)
+
+        with self.timer.stage('decode'):
+
+            # filter and decimate if requested
+            if antialias and downsample > 1:
+
+                # decode window with one page on either side so that filtering
+                # is continuous across the window edges
+                context_start = max(start - 1, 1)
+                context_end = min(end + 1, round(self.pagecount))
+                context_data = self.read_signals(MEAS_SIGNALS,
+                                                 start = context_start,
+                                                 end = context_end,
+                                                 calibrate = calibrate)
+
+                # samples in window
+                first = (start - context_start) * 300
+                last = first + total_pages * 300
+
+                # low-pass filter before taking every nth sample
+                for signal in ['accel_x', 'accel_y', 'accel_z', 'light']:
+                    decimated = FIRDecimator(downsample).process(
+                        context_data[signal], final = True)
+                    dataview[signal][:] = decimated[first // downsample :
+                                                    last // downsample]
+
+                # button is pressed if pressed in any of the samples replaced
+                dataview['button'][:] = (context_data['button'][first:last]
+                                         .reshape(-1, downsample)
+                                         .max(axis = 1))
+
+            else:
+
+                # decode pages one chunk at a time into the same digital
+                # arrays and write every nth measurement into the dataview
+                chunk_pages = min(total_pages, 900)
+                digital = {signal : np.empty(chunk_pages * 300,
+                                             dtype = np.int16)
+                           for signal in MEAS_SIGNALS}
+
+                for chunk_start in range(start, end + 1, chunk_pages):
+
+                    chunk_end = min(chunk_start + chunk_pages - 1, end)
+                    first = (chunk_start - start) * meas_per_page
+                    last = (chunk_end - start + 1) * meas_per_page
+
+                    decoded = decode_pages(
+                        self.data_packet[(chunk_start - 1) * 10 + 9 :
+                                         chunk_end * 10 : 10],
+                        out = digital)
+
+                    for signal in MEAS_SIGNALS:
+
+                        values = decoded[signal][::downsample]
+
+                        # calibrate accelerometers and light
+                        if calibrate and signal != 'button':
+                            self.calibrate(signal, values,
+                                           out = dataview[signal][first:last])
+                        else:
+                            dataview[signal][first:last] = values
+
+            # add tempreature if requested
+            if temperature:
+
+                # get all temp lines from data packet (1 per page)
+                temp_chunk = self.data_packet[(start - 1) * 10 + 5 :
+                                              end * 10 : 10]
+
+                # parse temp from temp lines (repeated for each measurement
+                # only when needed)
+                dataview['temp'] = RepeatedValues(
+                    [float(temp_line[temp_line.index(':') + 1:])
+                     for temp_line in temp_chunk], meas_per_page)
 
         # update object attributes
         if update:
@@ -526,25 +1465,1007 @@ class GENEActivFile:
             self.dataview_sample_rate = downsampled_rate / time_adj
             self.dataview = dataview
 
-        # display message if start and end values were changed
-        if old_start != start or old_end != end:
-            print('****** WARNING: Start or end values were modified to fit',
-                  'acceptable range.\n',
-                  f'       Old range: {old_start} to {old_end}\n',
-                  f'       New range: {start} to {end}\n')
-
-        # display message downsample ratio was changed
-        if old_downsample != downsample:
-            print('****** WARNING: Downsample value was modified to fit',
-                  'acceptable range.\n',
-                  f'       Old value: {old_downsample}\n',
-                  f'       New value: {downsample}\n')
+        display_warnings()
 
         return dataview
 
-        
+
+    def read_window(self, signal, start = 1, end = -1, calibrate = True):
+
+        '''returns the values of one signal for a window of pages
+
+        Parameters
+        ----------
+        signal : str
+            name of the signal (one of the items in signals)
+        start : int
+            start page of window (coerced to be > 0, default = 1)
+        end : int
+            end page of window (coerced to be between start and last page,
+            default = -1 = read all pages)
+        calibrate : bool
+            should accelerometer and light values be calibrated?
+            (default = True)
+
+        Returns
+        -------
+        ndarray
+            one value per measurement (one value per page for temp)
+        '''
+
+        start, end = self.check_window(start, end)
+
+        # temperature is stored once per page
+        line = 5 if signal == 'temp' else 9
+        lines = self.window_lines([line], start, end)[0]
+
+        with self.timer.stage('decode'):
+
+            if signal == 'temp':
+                return np.array([float(line[line.index(':') + 1:])
+                                 for line in lines])
+
+            values = decode_pages(lines)[signal]
+
+            if calibrate:
+                values = self.calibrate(signal, values)
+
+        return values
+
+
+    def read_signals(self, signals = None, start = 1, end = -1,
+                     calibrate = True):
+
+        '''returns the values of several signals for a window of pages
+
+        Pages are decoded once for all signals.
+
+        Parameters
+        ----------
+        signals : list
+            names of signals to read (default = None = all signals)
+        start : int
+            start page of window (default = 1)
+        end : int
+            end page of window (default = -1 = last page)
+        calibrate : bool
+            should accelerometer and light values be calibrated?
+            (default = True)
+
+        Returns
+        -------
+        dict
+            one ndarray for each signal read
+        '''
+
+        if signals is None: signals = self.signals
+
+        start, end = self.check_window(start, end)
+
+        data = {}
+
+        # temperature and hexadecimal data lines read together
+        temp_lines, hex_lines = self.window_lines([5, 9], start, end)
+
+        with self.timer.stage('decode'):
+
+            # decode pages if any measurement signals requested
+            if set(signals) & set(MEAS_SIGNALS):
+                decoded = decode_pages(hex_lines)
+
+            for signal in signals:
+                if signal == 'temp':
+                    data[signal] = np.array([float(line[line.index(':') + 1:])
+                                             for line in temp_lines])
+                elif calibrate:
+                    data[signal] = self.calibrate(signal, decoded[signal])
+                else:
+                    data[signal] = decoded[signal]
+
+        return data
+
+
+    def calibrate(self, signal, values, out = None):
+
+        '''converts digital values of a signal to physical units
+
+        Parameters
+        ----------
+        signal : str
+            name of the signal
+        values : ndarray
+            digital values of the signal
+        out : ndarray
+            preallocated float ndarray (same length as values) to write
+            calibrated values into (default = None = create new array)
+
+        Returns
+        -------
+        ndarray
+            calibrated values (values are returned unchanged for signals
+            that are not calibrated unless out is given)
+        '''
+
+        if signal in ('accel_x', 'accel_y', 'accel_z'):
+            axis = signal[-1]
+            offset = int(self.header[f'{axis} offset'])
+            gain = int(self.header[f'{axis} gain'])
+            out = np.multiply(values, 100, out = out, dtype = float)
+            out -= offset
+            out /= gain
+
+            # corrections fitted to still periods (see autocalibrate)
+            if self.autocalibration is not None:
+                index = 'xyz'.index(axis)
+                out += self.autocalibration['offset'][index]
+                out *= self.autocalibration['scale'][index]
+
+            return out
+
+        if signal == 'light':
+            out = np.multiply(values, int(self.header['Lux']), out = out,
+                              dtype = float)
+            out /= int(self.header['Volts'])
+            return out
+
+        if out is not None:
+            out[:] = values
+            return out
+
+        return values
+
+
+    def record_times(self, start = 1, end = -1):
+
+        '''returns the time of the first measurement in each page of a window
+
+        Parameters
+        ----------
+        start : int
+            start page of window (default = 1)
+        end : int
+            end page of window (default = -1 = last page)
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            page time of each page in the window
+        '''
+
+        start, end = self.check_window(start, end)
+
+        time_lines = self.window_lines([3], start, end)[0]
+
+        with self.timer.stage('timestamps'):
+            return parse_page_times(time_lines)
+
+
+    def window_lines(self, lines, start, end, chunk_pages = 900):
+
+        '''returns lines of each page of a window
+
+        Lines are taken from data_packet if the data has been read,
+        otherwise pages are streamed from the file (see iter_page_chunks).
+        The stream and the chunk read last are kept so windows requested in
+        order (e.g. by DeviceSync) are read in one pass of the file and only
+        one chunk and the lines requested are held in memory. The stream is
+        restarted if a window starts before the chunk read last.
+
+        Parameters
+        ----------
+        lines : list
+            line of each page to return (0-9, e.g. 3 for page time and 9
+            for hexadecimal data)
+        start : int
+            start page of window (checked with check_window)
+        end : int
+            end page of window (checked with check_window)
+        chunk_pages : int
+            number of pages streamed at a time (default = 900)
+
+        Returns
+        -------
+        list
+            list of the lines of each page of the window for each line
+            requested
+        '''
+
+        if self.data_packet is not None:
+            return [self.data_packet[(start - 1) * 10 + line : end * 10 : 10]
+                    for line in lines]
+
+        window = [[] for line in lines]
+        page = start
+
+        while page <= end:
+
+            chunk = self.stream_chunk
+
+            # restart stream at page if it is before the chunk read last
+            if chunk is None or page < chunk[0]:
+                if self.stream is not None: self.stream.close()
+                self.stream = self.iter_page_chunks(start = page,
+                                                    chunk_pages = chunk_pages)
+                chunk = next(self.stream, None)
+
+            # read forward to the chunk with page
+            while chunk is not None and page >= chunk[0] + len(chunk[1]) // 10:
+                chunk = next(self.stream, None)
+
+            self.stream_chunk = chunk
+
+            # file ended early
+            if chunk is None: break
+
+            first_page, page_lines = chunk
+            chunk_end = min(first_page + len(page_lines) // 10 - 1, end)
+
+            for line_list, line in zip(window, lines):
+                line_list += page_lines[(page - first_page) * 10 + line :
+                                           (chunk_end - first_page + 1) * 10 :
+                                           10]
+
+            page = chunk_end + 1
+
+        return window
+
+
+    def correct_times(self, times):
+
+        '''adjusts device clock times for clock drift
+
+        The device clock is assumed to be synchronized at Config Time so the
+        time elapsed since Config Time is scaled by (1 - drift_rate) as in
+        view_data.
+
+        Parameters
+        ----------
+        times : ndarray (datetime64[us])
+            times from the device clock
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            drift corrected times
+        '''
+
+        config_time = np.datetime64(
+            dt.datetime.strptime(self.header["Config Time"],
+                                 '%Y-%m-%d %H:%M:%S:%f'), 'us')
+
+        elapsed = (times - config_time).astype(np.int64)
+
+        return config_time + np.round(elapsed * (1 - self.drift_rate)).astype(
+            'timedelta64[us]')
+
+
+    def iter_page_chunks(self, start = 1, end = -1, chunk_pages = 900):
+
+        '''yields the lines of consecutive chunks of pages
+
+        Pages are taken from data_packet if the data has been read,
+        otherwise they are read from the file one chunk at a time (after
+        read(header_only = True)) so that only one chunk is held in memory.
+
+        Streamed pages are assumed to be every 10 lines unless the file has
+        been scanned (see scan_pages). If a chunk has lines that are not
+        part of a decodable page the file is scanned then and the chunk is
+        read again using the scan so bad pages are skipped.
+
+        Parameters
+        ----------
+        start : int
+            start page (default = 1)
+        end : int
+            end page (default = -1 = last page)
+        chunk_pages : int
+            number of pages in each chunk (default = 900)
+
+        Yields
+        ------
+        tuple
+            first page number of chunk (int) and the 10 lines of each page
+            in the chunk (list)
+        '''
+
+        # file has no pages to yield
+        if not self.record_count: return
+
+        requested_end = end
+        start, end = self.check_window(start, end)
+
+        # pages already read
+        if self.data_packet is not None:
+
+            for chunk_start in range(start, end + 1, chunk_pages):
+                chunk_end = min(chunk_start + chunk_pages - 1, end)
+                yield (chunk_start,
+                       self.data_packet[(chunk_start - 1) * 10 :
+                                        chunk_end * 10])
+
+            return
+
+        # stream pages from file
+        with open(self.read_path, 'r', encoding = 'utf-8') as bin_file:
+
+            # skip header
+            lines = itertools.islice(bin_file, 59, None)
+            line_number = 0   # line after header read next
+
+            chunk_start = start
+
+            while chunk_start <= end:
+
+                chunk_end = min(chunk_start + chunk_pages - 1, end)
+                page_count = chunk_end - (chunk_start - 1)
+
+                # lines of chunk
+                if self.page_lines is None:
+                    first_line = (chunk_start - 1) * 10
+                    line_count = page_count * 10
+                else:
+                    first_line = int(self.page_lines[chunk_start - 1])
+                    line_count = (int(self.page_lines[chunk_end - 1]) + 10 -
+                                  first_line)
+
+                with self.timer.stage('read'):
+
+                    # skip lines before chunk
+                    skip = first_line - line_number
+                    next(itertools.islice(lines, skip, skip), None)
+
+                    page_lines = [line.rstrip('\n') for line in
+                                  itertools.islice(lines, line_count)]
+                    line_number = first_line + len(page_lines)
+
+                self.timer.add_bytes('read', sum(len(line) + 1
+                                                 for line in page_lines))
+
+                # take pages from lines using scan
+                if self.page_lines is not None:
+                    if line_count != page_count * 10:
+                        page_lines = list(itertools.chain.from_iterable(
+                            page_lines[line - first_line :
+                                       line - first_line + 10]
+                            for line in self.page_lines[chunk_start - 1 :
+                                                        chunk_end]))
+
+                # scan file if lines are not all decodable pages and read
+                # chunk again using the scan
+                elif (len(page_lines) % 10 or
+                      len(resync_pages(page_lines)[0]) != len(page_lines)):
+
+                    self.progress.warning('Lines in file are not all '
+                                          'decodable pages, scanning file '
+                                          'to skip bad pages.',
+                                          page = chunk_start)
+                    self.scan_pages()
+
+                    if chunk_start > self.record_count: return
+                    end = self.check_window(chunk_start, requested_end)[1]
+
+                    bin_file.seek(0)
+                    lines = itertools.islice(bin_file, 59, None)
+                    line_number = 0
+
+                    continue
+
+                # stop if file ended early
+                if len(page_lines) < 10: return
+
+                yield chunk_start, page_lines[:len(page_lines) // 10 * 10]
+
+                chunk_start = chunk_end + 1
+
+
+    def iter_windows(self, window = 3600, step = None, overlap = 0,
+                     downsample = 1, signals = None, start = 1, end = -1,
+                     calibrate = True, correct_drift = False,
+                     antialias = False, chunk_pages = 900):
+
+        '''yields decoded windows of the recording in order
+
+        Pages are streamed with iter_page_chunks and each page is decoded
+        once. Decoded samples are copied into buffers that are allocated
+        once and reused for every window so memory use depends on the window
+        and chunk size, not the length of the recording. The last window
+        holds the remaining samples and may be shorter.
+
+        NOTE: the arrays yielded are views of the buffers and are
+        overwritten when the next window is requested (copy them to keep
+        them).
+
+        Parameters
+        ----------
+        window : float
+            length of each window in seconds (default = 3600)
+        step : float
+            seconds from the start of one window to the start of the next
+            (default = None = window - overlap)
+        overlap : float
+            seconds of overlap between windows if step is not given
+            (default = 0)
+        downsample : int
+            factor by which to downsample (coerced into range: 1-6,
+            default = 1)
+        signals : list
+            names of signals in each window (default = None = all signals)
+        start : int
+            first page (default = 1)
+        end : int
+            last page (default = -1 = last page)
+        calibrate : bool
+            should accelerometer and light values be calibrated?
+            (default = True)
+        correct_drift : bool
+            should times be adjusted for clock drift? (default = False)
+        antialias : bool
+            should accelerometer and light values be low-pass filtered
+            before downsampling? (default = False)
+        chunk_pages : int
+            number of pages decoded at a time (default = 900)
+
+        Yields
+        ------
+        dict
+            sample times ('time', ndarray (datetime64[us])) and one ndarray
+            for each signal (temperature is repeated for each sample of its
+            page)
+        '''
+
+        if signals is None: signals = self.signals
+
+        downsample = min(max(int(downsample), 1), 6)
+        start, end = self.check_window(start, end)
+
+        # window and step in (downsampled) samples
+        sample_rate = self.sample_rates['accel_x'] / downsample
+        if step is None: step = window - overlap
+        window_samples = max(int(round(window * sample_rate)), 1)
+        step_samples = max(int(round(step * sample_rate)), 1)
+
+        page_samples = 300 // downsample
+        sample_offsets = (np.arange(0, 300, downsample) * 1e6 /
+                          self.sample_rates['accel_x']).astype(
+                              'timedelta64[us]')
+
+        decimators = ({signal : FIRDecimator(downsample)
+                       for signal in ['accel_x', 'accel_y', 'accel_z',
+                                      'light'] if signal in signals}
+                      if antialias and downsample > 1 else {})
+
+        # buffers hold one window plus one chunk (filtered signals lag the
+        # others by up to one page until the final chunk)
+        capacity = window_samples + (chunk_pages + 1) * page_samples
+        buffers = {'time' : np.empty(capacity, dtype = 'datetime64[us]')}
+        for signal in signals:
+            buffers[signal] = np.empty(
+                capacity,
+                dtype = float if (calibrate and signal != 'button') or
+                signal == 'temp' or signal in decimators else np.int16)
+
+        buffer_first = 0             # sample number of first buffer sample
+        filled = dict.fromkeys(buffers, 0)  # samples in each buffer
+        window_first = 0             # sample number of first window sample
+        yielded_last = 0             # sample number after last window
+        ready = 0                    # sample number after data in all buffers
+
+        def window_view(last):
+            first = window_first - buffer_first
+            return {key : values[first : last - buffer_first]
+                    for key, values in buffers.items()}
+
+        # look ahead one chunk to know when the final chunk is reached
+        chunks = self.iter_page_chunks(start, end, chunk_pages)
+        next_chunk = next(chunks, None)
+
+        while next_chunk is not None:
+
+            chunk_start, page_lines = next_chunk
+            next_chunk = next(chunks, None)
+            final = next_chunk is None
+
+            with self.timer.stage('decode'):
+
+                data = {}
+
+                if set(signals) & set(MEAS_SIGNALS):
+                    decoded = decode_pages(page_lines[9::10])
+
+                for signal in signals:
+
+                    if signal == 'temp':
+                        data[signal] = np.repeat(
+                            [float(line[line.index(':') + 1:])
+                             for line in page_lines[5::10]], page_samples)
+                        continue
+
+                    values = decoded[signal]
+                    if calibrate: values = self.calibrate(signal, values)
+
+                    # filter and decimate (button is pressed if pressed in
+                    # any of the samples replaced)
+                    if signal in decimators:
+                        data[signal] = decimators[signal].process(
+                            values, final = final)
+                    elif signal == 'button' and decimators:
+                        data[signal] = values.reshape(
+                            -1, downsample).max(axis = 1)
+                    else:
+                        data[signal] = values[::downsample]
+
+            with self.timer.stage('timestamps'):
+
+                times = (parse_page_times(page_lines[3::10])[:, None] +
+                         sample_offsets).ravel()
+                if correct_drift: times = self.correct_times(times)
+                data['time'] = times
+
+            # drop samples before current window if chunk does not fit
+            if max(filled[key] + len(data[key]) for key in buffers) > capacity:
+                drop = min(window_first - buffer_first, min(filled.values()))
+                for key, values in buffers.items():
+                    values[:filled[key] - drop] = values[drop:filled[key]]
+                    filled[key] -= drop
+                buffer_first += drop
+
+            # copy chunk into buffers
+            for key, values in data.items():
+                buffers[key][filled[key] : filled[key] + len(values)] = values
+                filled[key] += len(values)
+
+            ready = buffer_first + min(filled.values())
+
+            # yield each complete window
+            while window_first + window_samples <= ready:
+                yield window_view(window_first + window_samples)
+                yielded_last = window_first + window_samples
+                window_first += step_samples
+
+        # yield remaining samples
+        if yielded_last < ready and window_first < ready:
+            yield window_view(ready)
+
+
+    def summarize(self, epoch_minutes = 30, chunk_pages = 900):
+
+        '''bins the whole recording for the hourly and daily summary tables
+
+        The recording is streamed once (see iter_windows) and the minimum,
+        maximum and sum of each signal and of the values the tables are
+        calculated from (squared accelerations, ENMO, clipped samples and
+        button presses) are binned by minute from midnight before the first
+        sample (see TimeBins). The full rate minutes are stored in
+        minute_bins (plotted on the create_pdf overview pages) and combined
+        into epochs stored in summary_bins, which summary_table combines
+        into hours and days.
+
+        Parameters
+        ----------
+        epoch_minutes : int
+            length of the epochs wear is classified in (a factor of 60,
+            default = 30)
+        chunk_pages : int
+            number of pages decoded at a time (default = 900)
+
+        Returns
+        -------
+        TimeBins
+            epochs of the recording
+        '''
+
+        # check whether header has been read
+        if not self.header or self.pagecount is None:
+            self.progress.warning('Cannot summarize data because file has '
+                                  'not been read.')
+            return
+
+        bins = TimeBins(60)
+        accel_signals = ['accel_x', 'accel_y', 'accel_z']
+
+        # calibrated values of digital limits (values are clipped)
+        limits = [tuple(self.calibrate(signal, np.array([-2048, 2047])))
+                  for signal in accel_signals]
+
+        # button value at end of previous window (to find presses)
+        previous_button = 0
+        done = 0
+
+        self.progress.start(self.file_path, total = round(self.pagecount))
+
+        for window in self.iter_windows(window = epoch_minutes * 60,
+                                        chunk_pages = chunk_pages):
+
+            with self.timer.stage('summary'):
+
+                accel = [window[signal] for signal in accel_signals]
+                values = dict(zip(accel_signals, accel))
+
+                # squares for standard deviation of each axis
+                for signal, axis_values in zip(accel_signals, accel):
+                    values[f'{signal}_sq'] = axis_values * axis_values
+
+                # euclidean norm minus one (negative values set to zero)
+                magnitude = np.sqrt(sum(values[f'{signal}_sq']
+                                        for signal in accel_signals))
+                values['enmo'] = np.maximum(magnitude - 1, 0)
+
+                # samples with any axis at the limit of its range
+                clipped = np.zeros(len(magnitude), dtype = bool)
+                for axis_values, (low, high) in zip(accel, limits):
+                    clipped |= (axis_values <= low) | (axis_values >= high)
+                values['clipped'] = clipped
+
+                # button presses start when button changes from 0 to 1
+                button = window['button'] > 0
+                values['press'] = button & ~np.concatenate(
+                    ([previous_button], button[:-1]))
+                previous_button = button[-1]
+
+                values['light'] = window['light']
+                values['temp'] = window['temp']
+
+                bins.add(window['time'], values)
+
+            done += len(window['time']) / 300
+            self.progress.update(round(done), 'summarizing')
+
+        self.progress.finish()
+
+        self.minute_bins = bins
+        self.summary_bins = bins.combine(epoch_minutes)
+
+        return self.summary_bins
+
+
+    def summary_table(self, period = 'hour'):
+
+        '''returns hourly or daily wear, ENMO, clipping, light, temperature
+        and button press summary
+
+        Epochs binned by summarize (which is called if the recording has not
+        been summarized) are combined into hours or days. An epoch is not
+        worn if at least two accelerometer axes are still (standard
+        deviation below 13 mg or range below 50 mg, as in van Hees et al.
+        2013). Rows start at the first hour or day with data and hours or
+        days without data are included with no values.
+
+        Parameters
+        ----------
+        period : str
+            'hour' or 'day' (default = 'hour')
+
+        Returns
+        -------
+        dict
+            ndarray of each column in SUMMARY_COLUMNS: start time, minutes
+            of data, minutes worn, mean ENMO (mg), percent of samples
+            clipped, mean and maximum light (lux), minimum and maximum
+            temperature and number of button presses
+        '''
+
+        bins = (self.summary_bins if self.summary_bins is not None else
+                self.summarize())
+        if bins is None: return
+
+        factor = int(round({'hour' : 3600, 'day' : 86400}[period] /
+                           bins.bin_seconds))
+
+        # count still axes in each epoch
+        still_axes = np.zeros(bins.size, dtype = int)
+
+        with np.errstate(invalid = 'ignore'):
+            for signal in ['accel_x', 'accel_y', 'accel_z']:
+                mean = bins.get(signal, 'mean')
+                std = np.sqrt(np.maximum(bins.get(f'{signal}_sq', 'mean') -
+                                         mean * mean, 0))
+                value_range = bins.get(signal, 'max') - bins.get(signal, 'min')
+                still_axes += (std < 0.013) | (value_range < 0.05)
+
+        worn_samples = np.where(still_axes >= 2, 0, bins.counts[:bins.size])
+
+        # combine epochs into hours or days
+        periods = bins.combine(factor)
+        worn_samples = np.append(worn_samples, np.zeros(
+            periods.size * factor - bins.size, dtype = int))
+        worn_samples = worn_samples.reshape(-1, factor).sum(1)
+
+        counts = periods.counts[:periods.size]
+        first = np.flatnonzero(counts)[0] if counts.any() else periods.size
+        samples_per_minute = self.sample_rates['accel_x'] * 60
+
+        table = {'start' : periods.bin_times(),
+                 'data_minutes' : counts / samples_per_minute,
+                 'wear_minutes' : worn_samples / samples_per_minute,
+                 'enmo_mg' : periods.get('enmo', 'mean') * 1000,
+                 'clipped_percent' : periods.get('clipped', 'mean') * 100,
+                 'light_mean_lux' : periods.get('light', 'mean'),
+                 'light_max_lux' : periods.get('light', 'max'),
+                 'temp_min' : periods.get('temp', 'min'),
+                 'temp_max' : periods.get('temp', 'max'),
+                 'button_presses' : periods.get('press', 'sum').astype(int)}
+
+        return {name : values[first:] for name, values in table.items()}
+
+
+    def export_summary(self, csv_folder):
+
+        '''writes the hourly and daily summary tables to .csv files
+
+        Parameters
+        ----------
+        csv_folder : str
+            path to folder where .csv files will be stored
+
+        Returns
+        -------
+        list
+            paths to hourly and daily .csv files created
+        '''
+
+        base_file = os.path.splitext(os.path.basename(self.file_path))[0]
+        csv_paths = []
+
+        for period, suffix in [('hour', 'hourly'), ('day', 'daily')]:
+
+            table = self.summary_table(period)
+            if table is None: return
+
+            csv_path = os.path.join(csv_folder, f'{base_file}_{suffix}.csv')
+            write_summary_csv(table, csv_path)
+            csv_paths.append(csv_path)
+
+        return csv_paths
+
+
+    def button_events(self, use_sidecar = True, chunk_pages = 900):
+
+        '''returns the time and duration of each button press
+
+        Pages are streamed (see iter_page_chunks) and only the button bit
+        of each measurement is read from the hexadecimal data (see
+        button_states) and only the times of pages where the button changes
+        are parsed, so no page is fully decoded. Events are stored in the
+        file's sidecar and later calls return them without reading the
+        file.
+
+        Parameters
+        ----------
+        use_sidecar : bool
+            return events stored in the sidecar if the file has not changed
+            and store events found? (default = True)
+        chunk_pages : int
+            number of pages read at a time (default = 900)
+
+        Returns
+        -------
+        ndarray (BUTTON_EVENT_DTYPE)
+            page, time (datetime64[us], device clock) of the first sample
+            pressed and duration (seconds) of each press
+        '''
+
+        # check whether header has been read
+        if not self.header or self.pagecount is None:
+            self.progress.warning('Cannot find button events because file '
+                                  'has not been read.')
+            return
+
+        if use_sidecar:
+            events = self.sidecar.get('button_events')
+            if events is not None: return events
+
+        # time of each sample (and the sample after the last) from page time
+        sample_offsets = np.round(np.arange(301) * 1e6 /
+                                  self.sample_rates['accel_x']).astype(
+                                      'timedelta64[us]')
+
+        change_pages = []
+        change_times = []
+        previous = False          # button state of previous sample
+        last_time_line = None     # time line of last page read
+
+        for first_page, page_lines in self.iter_page_chunks(
+                chunk_pages = chunk_pages):
+
+            with self.timer.stage('button'):
+
+                # samples where button is pressed or released
+                states = button_states(page_lines[9::10]).ravel()
+                changes = np.flatnonzero(
+                    states != np.concatenate(([previous], states[:-1])))
+
+                previous = states[-1]
+                last_time_line = page_lines[-7]
+
+                if not len(changes): continue
+
+                # parse times of pages with changes only
+                pages, page_index = np.unique(changes // 300,
+                                              return_inverse = True)
+                page_times = parse_page_times([page_lines[page * 10 + 3]
+                                               for page in pages])
+
+                change_pages.append(first_page + changes // 300)
+                change_times.append(page_times[page_index] +
+                                    sample_offsets[changes % 300])
+
+        # press still held at end of file is released after last sample
+        if previous:
+            change_pages.append(np.array([-1]))
+            change_times.append(parse_page_times([last_time_line]) +
+                                sample_offsets[300])
+
+        change_pages = np.concatenate(change_pages or [np.empty(0, int)])
+        change_times = np.concatenate(
+            change_times or [np.empty(0, 'datetime64[us]')])
+
+        # changes alternate between press and release
+        events = np.zeros(len(change_pages) // 2, dtype = BUTTON_EVENT_DTYPE)
+        events['page'] = change_pages[0::2]
+        events['time'] = change_times[0::2]
+        events['duration'] = ((change_times[1::2] - change_times[0::2]) /
+                              np.timedelta64(1, 's'))
+
+        if use_sidecar: self.sidecar.set('button_events', events)
+
+        return events
+
+
+    def export_button_events(self, csv_folder):
+
+        '''writes the button presses to a .csv file
+
+        Parameters
+        ----------
+        csv_folder : str
+            path to folder where .csv file will be stored
+
+        Returns
+        -------
+        str
+            path to .csv file created
+        '''
+
+        events = self.button_events()
+        if events is None: return
+
+        base_file = os.path.splitext(os.path.basename(self.file_path))[0]
+        csv_path = os.path.join(csv_folder, f'{base_file}_button.csv')
+
+        with open(csv_path, 'w', newline = '') as csv_file:
+
+            writer = csv.writer(csv_file)
+            writer.writerow(['page', 'time', 'duration'])
+
+            for page, time, duration in events.tolist():
+                writer.writerow([page, time.isoformat(sep = ' '),
+                                 f'{duration:.3f}'])
+
+        return csv_path
+
+
+    def autocalibrate(self, epoch_seconds = 10, still_sd = 0.013,
+                      window_epochs = 360, use_sidecar = True,
+                      chunk_pages = 900):
+
+        '''fits accelerometer calibration corrections to still periods
+
+        The recording is streamed once (see iter_windows) with factory
+        calibration and the mean and standard deviation of each axis are
+        calculated in epochs. While the device is still (standard deviation
+        of every axis below still_sd) it only measures gravity, so the mean
+        of each still epoch should lie on the unit sphere. An offset and
+        scale of each axis are fitted to the still epochs (see
+        sphere_calibration) and applied by calibrate after the factory
+        calibration if the still epochs cover the sphere (each axis has
+        epochs above 0.3 g and below -0.3 g) and the fit brings them within
+        0.01 g of it. The result is stored in the file's sidecar and later
+        calls apply it without reading the file.
+
+        Parameters
+        ----------
+        epoch_seconds : float
+            length of the epochs tested for movement (default = 10)
+        still_sd : float
+            standard deviation (g) of all axes below which an epoch is
+            still (default = 0.013)
+        window_epochs : int
+            number of epochs decoded and tested at a time (default = 360 =
+            one hour of 10 second epochs)
+        use_sidecar : bool
+            use the result stored in the sidecar if the file has not changed
+            and store the result? (default = True)
+        chunk_pages : int
+            number of pages decoded at a time (default = 900)
+
+        Returns
+        -------
+        dict
+            offset and scale of each axis (x, y, z), mean distance (g) of
+            still epochs from the sphere before and after ('error_before',
+            'error_after'), number of still epochs ('epochs') and whether
+            the corrections are applied ('applied')
+        '''
+
+        # check whether header has been read
+        if not self.header or self.pagecount is None:
+            self.progress.warning('Cannot autocalibrate because file has not '
+                                  'been read.')
+            return
+
+        result = self.sidecar.get('autocalibration') if use_sidecar else None
+
+        if result is None:
+
+            # fit to factory calibrated values
+            self.autocalibration = None
+
+            accel_signals = ['accel_x', 'accel_y', 'accel_z']
+            epoch_samples = max(round(epoch_seconds *
+                                      self.sample_rates['accel_x']), 2)
+
+            still_means = []
+            done = 0
+
+            self.progress.start(self.file_path, total = round(self.pagecount))
+
+            for window in self.iter_windows(window = (epoch_seconds *
+                                                      window_epochs),
+                                            signals = accel_signals,
+                                            chunk_pages = chunk_pages):
+
+                with self.timer.stage('autocalibrate'):
+
+                    # whole epochs of window (axes, epochs, samples)
+                    epochs = len(window['accel_x']) // epoch_samples
+                    accel = np.stack([
+                        window[signal][:epochs * epoch_samples]
+                        for signal in accel_signals]).reshape(
+                            3, epochs, epoch_samples)
+
+                    still = (accel.std(axis = 2) < still_sd).all(axis = 0)
+                    still_means.append(accel[:, still].mean(axis = 2).T)
+
+                done += len(window['accel_x']) / 300
+                self.progress.update(round(done), 'autocalibrating')
+
+            self.progress.finish()
+
+            points = np.concatenate(still_means or [np.empty((0, 3))])
+
+            result = {'offset' : np.zeros(3), 'scale' : np.ones(3),
+                      'error_before' : np.nan, 'error_after' : np.nan,
+                      'epochs' : len(points), 'applied' : False}
+
+            # still epochs must cover the sphere for a reliable fit
+            if ((points > 0.3).any(axis = 0).all() and
+                    (points < -0.3).any(axis = 0).all()):
+
+                offset, scale, error_before, error_after = \
+                    sphere_calibration(points)
+
+                result.update(offset = offset, scale = scale,
+                              error_before = error_before,
+                              error_after = error_after,
+                              applied = bool(error_after < 0.01 and
+                                              error_after < error_before))
+
+            if not result['applied']:
+                self.progress.warning('Autocalibration not applied because '
+                                      'still periods do not cover all '
+                                      'orientations or do not fit the unit '
+                                      'sphere.')
+
+            if use_sidecar: self.sidecar.set('autocalibration', result)
+
+        self.autocalibration = result if result['applied'] else None
+
+        return result
+
+
     def create_pdf(self, pdf_folder, window_hours = 4, downsample = 5,
-                   correct_drift = False):
+                   correct_drift = False, antialias = False, blit = True,
+                   overview = True, summary = True):
 
         # TODO:
         # - DOUBLES PLOT TIME TO ADD DATES AS DATETIME TYPE
@@ -564,7 +2485,22 @@ class GENEActivFile:
             factor by which to downsample (range: 1-6, default = 5)
         correct_drift: bool
             should sample rate be adjusted for clock drift? (default = False)
-        
+        antialias : bool
+            should data be low-pass filtered before downsampling?
+            (default = False)
+        blit : bool
+            render only the parts of the plots that change for each window
+            (see WindowFigure)? otherwise the whole figure is rendered for
+            each window (default = True)
+        overview : bool
+            add overview pages after the header page that plot the whole
+            recording one day per row (see render_overview)? full rate
+            values are binned by minute by summarize, which is called if
+            the recording has not been summarized (default = True)
+        summary : bool
+            add daily and hourly summary table pages after the overview
+            pages (see summary_table)? the recording is summarized first if
+            it has not been (default = True)
 
         Returns
         -------
@@ -573,10 +2509,11 @@ class GENEActivFile:
 
         '''
 
-        # check whether data has been read
-        if not self.header or self.data_packet is None or self.pagecount is None:
-            print('****** WARNING: Cannot view data because file has not',
-                  'been read.')
+        # check whether header has been read (pages are streamed from the
+        # file if only the header was read)
+        if not self.header or self.pagecount is None:
+            self.progress.warning('Cannot view data because file has not '
+                                  'been read.')
             return
 
         # get filenames and paths     
@@ -587,21 +2524,15 @@ class GENEActivFile:
         pdf_file = base_file + '.pdf'
         pdf_path = os.path.join(pdf_folder, pdf_file)
 
-        png_folder = os.path.join(pdf_folder, 'temp','')
-
         # adjust sample rate for clock drift?
         sample_rate = int(self.header['Measurement Frequency'][:-3])
 
         # calculate pages per plot
         window_pages = round((window_hours * 60 * 60 * sample_rate) / 300)
-        window_sequence = range(1, round(self.pagecount), window_pages)
-        #window_sequence = range(1, window_pages*6, window_pages)
 
         # CREATE PLOTS ------
 
-        # define date locators and formatters
-        hours = mdates.HourLocator()
-        hours_fmt = mdates.DateFormatter('%H:%M')
+        plt, mdates = plotting_modules()
 
         # set plot parameters
         
@@ -655,142 +2586,288 @@ class GENEActivFile:
         plt.rcParams['figure.subplot.bottom'] = 0.06
         plt.rcParams['font.size'] = 8
 
-        # create temp folder to store .png files
-        if not os.path.exists(png_folder): os.mkdir(png_folder)
+        # summary tables and overview need one extra full rate pass over
+        # the recording
+        if (summary or overview) and self.minute_bins is None:
+            self.summarize()
 
-        # loop through time windows to create separate plot for each
-        for start_index in window_sequence:
+        # report progress in pages plotted
+        self.progress.start(pdf_path, total = round(self.pagecount))
 
-            # get data for current window
-            end_index = start_index + window_pages - 1
-            plot_data = self.view_data(start = start_index,
-                                       end = end_index,
-                                       downsample = downsample,
-                                       update = False,
-                                       correct_drift = correct_drift)
+        # loop through time windows to create separate plot for each (each
+        # page is decoded once as windows are streamed)
+        windows = self.iter_windows(window = window_pages * 300 / sample_rate,
+                                    downsample = downsample,
+                                    correct_drift = correct_drift,
+                                    antialias = antialias)
 
-            # format start and end date for current window
-            time_format = '%b %-d, %Y (%A) @ %H:%M:%S.%f'
-            window_start = plot_data['time'][0]
-            window_start_txt = window_start.strftime(time_format)[:-3]
+        figure = None
 
-            window_end = plot_data['time'][-1]
-            window_end_txt = window_end.strftime(time_format)[:-3]
+        # pages are written to the pdf as each window is plotted so memory
+        # use does not grow with the length of the recording
+        with PDFWriter(pdf_path, page_size = 'letter') as pdf:
 
-            # initialize figure with subplots
-            fig, ax = plt.subplots(6, 1)
+            # HEADER PAGE ----------------
 
-            # insert date range as plot title
-            fig.suptitle(f'{window_start_txt} to {window_end_txt}',
-                         fontsize = 8, y = 0.96)
+            with self.timer.stage('pdf'):
 
-            # initialize subplot index
-            subplot_index = 0
+                # add first page and print file name at top
+                pdf.add_page()
+                pdf.text(bin_file, 10, 16.7, size = 16, width = 200,
+                         align = 'center')
 
-            # loop through subplots and generate plot
-            for key in list(plot_data.keys())[1:]:
+                # find length of longest key in header
+                key_length = max(len(key) for key in self.header.keys()) + 1
 
-                # plot signal
-                ax[subplot_index].plot(plot_data['time'],
-                                       plot_data[key],
-                                       color = line_color[subplot_index])
-                
-                # remove box around plot
-                ax[subplot_index].spines['top'].set_visible(False)
-                ax[subplot_index].spines['bottom'].set_visible(False)
-                ax[subplot_index].spines['right'].set_visible(False)
+                # create text string for header information
+                header_text = '\n'
+                for key, value in self.header.items():
+                    header_text = header_text + f"{key:{key_length}}:  {value}\n"
 
-                # set axis ticks and labels
-                ax[subplot_index].xaxis.set_major_locator(hours)
-                ax[subplot_index].xaxis.set_major_formatter(hours_fmt)
-                if subplot_index != 5:
-                    ax[subplot_index].set_xticklabels([])
+                # print header to pdf
+                pdf.text_block(header_text, 11, 20, size = 12,
+                               line_height = 5, width = 198)
 
-                ax[subplot_index].set_yticks(yaxis_ticks[subplot_index])
-                units = yaxis_units[subplot_index]
-                ax[subplot_index].set_ylabel(f'{key} ({units})')
+            # overview pages follow header pages
+            overview_index = pdf.page_count
 
+            # SUMMARY TABLE PAGES ---------
 
-                # set vertical lines on plot at hours
-                ax[subplot_index].grid(True, 'major', 'x',
-                                       color = 'k', linestyle = '--')
+            if summary:
 
-                # set horizontal lines on plot at zero and limits
-                if subplot_index < 4:
-                    for yline in yaxis_lines[subplot_index]:
-                        ax[subplot_index].axhline(y = yline, color = 'grey',
-                                                  linestyle = '-')
+                with self.timer.stage('pdf'):
 
-                # set axis limits
-                ax[subplot_index].set_ylim(yaxis_lim[subplot_index])
-                ax[subplot_index].set_xlim(window_start,
-                                           window_start +
-                                           dt.timedelta(hours = 4))
+                    for period, title in [('day', 'DAILY SUMMARY'),
+                                          ('hour', 'HOURLY SUMMARY')]:
 
-                # increment to next subplot
-                subplot_index += 1
+                        pdf.add_page()
+                        pdf.text(bin_file, 10, 11.7, size = 16,
+                                 align = 'center')
+                        pdf.text_block(f'{title}\n\n' +
+                                       summary_text(self.summary_table(period),
+                                                    period),
+                                       11, 20, size = 8, line_height = 3.5,
+                                       width = 198)
 
-            # save figure as .png and close
-            png_file = 'plot_' + f'{start_index:09d}' + '.png'
-            fig.savefig(os.path.join(png_folder, png_file))
-            plt.close(fig)
+            # PLOT DATA PAGES -------------
 
+            for window_index, plot_data in enumerate(windows):
 
-        # CREATE PDF ------
+                # last page of current window
+                end_index = min((window_index + 1) * window_pages,
+                                round(self.pagecount))
 
-        # HEADER PAGE ----------------
+                # format start and end date for current window
+                time_format = '%b %-d, %Y (%A) @ %H:%M:%S.%f'
+                window_start = plot_data['time'][0].item()
+                window_start_txt = window_start.strftime(time_format)[:-3]
 
-        # initialize pdf
-        pdf = fpdf.FPDF(format = 'letter')
+                window_end = plot_data['time'][-1].item()
+                window_end_txt = window_end.strftime(time_format)[:-3]
 
-        # add first page and print file name at top
-        pdf.add_page()
-        pdf.set_font("Courier", size = 16)
-        pdf.cell(200, 10, txt = bin_file, ln = 1, align = 'C', border = 0)
+                with self.timer.stage('plot'):
 
-        # set font for header info
-        pdf.set_font("Courier", size = 12)
-        header_text = '\n'
+                    # build figure once and reuse it for each window
+                    if figure is None:
+                        keys = list(plot_data.keys())[1:]
+                        figure = WindowFigure(
+                            [{'label' : f'{key} ({yaxis_units[index]})',
+                              'ylim' : yaxis_lim[index],
+                              'yticks' : yaxis_ticks[index],
+                              'hlines' : (yaxis_lines[index]
+                                          if index < 4 else []),
+                              'color' : line_color[index]}
+                             for index, key in enumerate(keys)],
+                            dt.timedelta(hours = window_hours), blit = blit)
 
-        # find length of longest key in header
-        key_length = max(len(key) for key in self.header.keys()) + 1
+                    # plot window
+                    pixels = figure.render(plot_data['time'],
+                                           [plot_data[key] for key in keys],
+                                           f'{window_start_txt} to '
+                                           f'{window_end_txt}')
 
-        # create text string for header information
-        for key, value in self.header.items():
-            header_text = header_text + f"{key:{key_length}}:  {value}\n"
+                with self.timer.stage('pdf'):
 
-        # print header to pdf
-        pdf.multi_cell(200, 5, txt = header_text, align = 'L')
+                    # add page and print file name as header
+                    pdf.add_page()
+                    pdf.text(bin_file, 10, 11.7, size = 16, align = 'center')
 
-        # PLOT DATA PAGES -------------
+                    # insert plot into pdf (one point per pixel)
+                    pdf.image(pixels, 1, 13)
 
-        # list all .png files in temp folder
-        png_files = os.listdir(png_folder)
-        png_files.sort()
+                self.progress.update(end_index, 'plotting')
 
-        # loop through .png files to add to pdf
-        for png_file in png_files:
+            # OVERVIEW PAGES -------------
 
-            # create full .png file path
-            png_path = os.path.join(png_folder, png_file)
+            if overview and self.minute_bins.size:
 
-            # add page and set font
-            pdf.add_page()
-            pdf.set_font("Courier", size = 16)
+                with self.timer.stage('overview'):
 
-            # print file_name as header
-            pdf.cell(0, txt = bin_file, align = 'C')
-            pdf.ln()
+                    pages = render_overview(
+                        self.minute_bins, f'{bin_file} overview', yaxis_lim[0],
+                        [light_min, light_max])
 
-            # insert .png plot into pdf
-            pdf.image(png_path, x = 1, y = 13, type = 'png')
+                    for page_index, pixels in enumerate(pages):
 
-        # SAVE PDF AND DELETE PNGS --------------
+                        # place before the plot data pages
+                        pdf.add_page(index = overview_index + page_index)
+                        pdf.text(bin_file, 10, 11.7, size = 16,
+                                 align = 'center')
+                        pdf.image(pixels, 1, 13)
 
-        # save pdf file
-        pdf.output(pdf_path)
+        if figure is not None: figure.close()
 
-        # delete temp .png files
-        shutil.rmtree(png_folder)
+        self.progress.finish(pdf_path = pdf_path)
                                      
         return pdf_path
+
+
+    def export_edf(self, edf_folder, chunk_pages = 900):
+
+        '''exports the file to a European Data Format (.edf) file
+
+        Pages are decoded and written to the .edf file one chunk at a time
+        (one EDF data record per page) so files of any length can be
+        converted in bounded memory. Accelerometer, light and button values
+        are stored as the digital values from the .bin file with physical
+        ranges set from the header calibration values (and the
+        accelerometer corrections if autocalibrate was applied). Temperature
+        is stored once per data record in tenths of a degree. The file is
+        written as EDF+ with the time of each page as the onset of its data
+        record in the annotation signal, so the fraction of a second the
+        first page starts after the header start time (which has a
+        resolution of one second) is kept without shifting the data. If any
+        page does not follow the page before it the file is written as
+        EDF+D (discontinuous) rather than EDF+C and a warning is given.
+
+        Parameters
+        ----------
+        edf_folder : str
+            path to folder where .edf file will be stored
+        chunk_pages : int
+            number of pages decoded at a time (default = 900)
+
+        Returns
+        -------
+        edf_path : str
+            path to .edf file created (None if the file has no data pages)
+
+        '''
+
+        # check whether header has been read
+        if not self.header or self.pagecount is None:
+            self.progress.warning('Cannot export data because file has not '
+                                  'been read.')
+            return
+
+        # get filenames and paths
+        bin_file = os.path.basename(self.file_path)
+        base_file = os.path.splitext(bin_file)[0]
+        edf_path = os.path.join(edf_folder, base_file + '.edf')
+
+        chunks = self.iter_page_chunks(chunk_pages = chunk_pages)
+        first_chunk = next(chunks, None)
+
+        if first_chunk is None:
+            self.progress.warning('Cannot export data because file has no '
+                                  'data pages.')
+            return
+
+        first_page, page_lines = first_chunk
+
+        # header start time is the time of the first page truncated to the
+        # second (record onsets are written relative to it)
+        start_time = parse_page_times(page_lines[3:4])[0].item().replace(
+            microsecond = 0)
+        header_time = np.datetime64(start_time, 'us')
+
+        accel_units = self.header['Accelerometer Units']
+
+        # physical values of digital limits (calibration is linear so
+        # autocalibration corrections are applied through the ranges)
+        accel_x_lim, accel_y_lim, accel_z_lim = [
+            self.calibrate(signal, np.array([-2048, 2047]))
+            for signal in ['accel_x', 'accel_y', 'accel_z']]
+
+        edf_header = {
+            'version' : 0,
+            # EDF+ subfields are separated by spaces (X = unknown)
+            'patient_id' : ' '.join([edf_subfield(
+                self.header.get('Subject Code', '')), 'X', 'X', 'X']),
+            'recording_id' : ' '.join([
+                'Startdate', start_time.strftime('%d-%b-%Y').upper(), 'X',
+                'X', edf_subfield('GENEActiv ' +
+                                  self.header['Device Unique Serial Code'] +
+                                  ' ' + self.header.get('Location Code', ''))]),
+            'start_date' : start_time.strftime('%d.%m.%y'),
+            'start_time' : start_time.strftime('%H.%M.%S'),
+            'reserved' : 'EDF+C',
+            'dur_record' : 300 / self.sample_rates['accel_x'],
+            'sig_labels' : self.signals + [ANNOTATION_LABEL],
+            'sig_phys_dim' : [accel_units, accel_units, accel_units,
+                              self.header['Light Meter Units'], '',
+                              self.header['Temperature Sensor Units'], ''],
+            'sig_phys_min' : [accel_x_lim[0], accel_y_lim[0],
+                              accel_z_lim[0], self.light_min, 0.0,
+                              -3276.8, -1],
+            'sig_phys_max' : [accel_x_lim[1], accel_y_lim[1],
+                              accel_z_lim[1], self.light_max, 1.0,
+                              3276.7, 1],
+            'sig_dig_min' : [-2048, -2048, -2048, 0, 0, -32768, -32768],
+            'sig_dig_max' : [2047, 2047, 2047, 1023, 1, 32767, 32767],
+            'sig_record_samples' : [self.record_samples[signal]
+                                    for signal in self.signals] + [16]}
+
+        # time of last page written (to find gaps between chunks)
+        previous_time = None
+        gaps = []
+
+        # report progress in pages written
+        self.progress.start(edf_path, total = round(self.pagecount))
+
+        with EDFWriter(edf_path, edf_header) as edf:
+
+            for first_page, page_lines in itertools.chain(
+                    [(first_page, page_lines)], chunks):
+
+                # decode chunk of pages
+                data = decode_pages(page_lines[9::10])
+                data['temp'] = np.round(
+                    [float(line[line.index(':') + 1:]) * 10
+                     for line in page_lines[5::10]])
+
+                # onset of each record is the time of its page
+                page_times = parse_page_times(page_lines[3::10])
+                data[ANNOTATION_LABEL] = record_annotations(
+                    (page_times - header_time) / np.timedelta64(1, 's'))
+
+                # pages that do not follow the page before them (page
+                # numbers are counted from the first page in page_times)
+                page_offset = first_page - 1
+                if previous_time is not None:
+                    page_times = np.append(previous_time, page_times)
+                    page_offset -= 1
+                chunk_gaps = find_discontinuities(
+                    page_times, self.sample_rates['accel_x'])
+                chunk_gaps['page'] += page_offset
+                gaps.extend(chunk_gaps.tolist())
+                previous_time = page_times[-1]
+
+                edf.write_records(data)
+
+                self.progress.update(first_page - 1 + len(page_lines) // 10,
+                                     'writing')
+
+            # records are not contiguous so readers must use their onsets
+            if gaps:
+                edf.header['reserved'] = 'EDF+D'
+                self.progress.warning(f'{len(gaps)} pages do not follow the '
+                                      'page before them, file written as '
+                                      'EDF+D with the onset of each data '
+                                      'record.',
+                                      discontinuities = [page for page, gap
+                                                         in gaps])
+
+        self.progress.finish(edf_path = edf_path)
+
+        return edf_path
@@ -0,0 +1,193 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import json
+import time
+import contextlib
+import tracemalloc
+
+# peak memory is only available where the resource module exists (not Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+
+    '''returns the peak resident set size of the process in MB (or None)
+
+    This is the peak since the process started, not since a file or stage
+    started, so in a batch every file after the largest reports the same
+    value (see StageTimer trace_memory for the peak of each file).
+    '''
+
+    if resource is None: return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1e6 if os.uname().sysname == 'Darwin' else peak / 1e3
+
+
+class StageTimer:
+
+    '''Class for recording the cost of each stage of processing a file.
+
+    Stages are timed with the stage() context manager. Repeated stages (for
+    example plotting each window) are accumulated. Timing is opt-in: when
+    enabled is False stage() does nothing so it can be left in place in
+    code that is not being measured. A stage nested in a stage with the same
+    name is not counted twice.
+
+    The peak resident set size recorded is the peak of the whole process so
+    far. The peak of each file can be measured with trace_memory, which
+    traces Python memory allocations (as the benchmarks do) from when the
+    timer is created or the last record was emitted (tracing slows
+    processing down).
+
+    Attributes
+    ----------
+    enabled : bool
+        are stages being recorded?
+    log_path : str
+        path to file where records are appended as JSON lines (or None)
+    trace_memory : bool
+        is the peak traced memory of each file recorded?
+    stages : dict
+        wall time (s), cpu time (s), bytes read, calls and peak resident set
+        size of the process (MB) at the end of the stage for each stage name
+
+    Methods
+    -------
+    stage(name, bytes_read = 0)
+        context manager that records the cost of a stage
+
+    add_bytes(name, bytes_read)
+        adds bytes read to a stage
+
+    emit(**fields)
+        appends the stages of the current file to the log as one JSON line
+        and resets the stages
+
+    '''
+
+
+    def __init__(self, log_path = None, enabled = True, trace_memory = False):
+
+        '''
+        Parameters
+        ----------
+        log_path : str
+            path to file where records are appended as JSON lines
+            (default = None = records are only returned by emit)
+        enabled : bool
+            should stages be recorded? (default = True)
+        trace_memory : bool
+            should the peak traced memory of each file be recorded?
+            (default = False)
+        '''
+
+        self.enabled = enabled
+        self.log_path = log_path
+        self.trace_memory = enabled and trace_memory
+        self.stages = {}
+        self.active = set()
+
+        # peak is measured from here until the record is emitted
+        if self.trace_memory:
+            if not tracemalloc.is_tracing(): tracemalloc.start()
+            tracemalloc.reset_peak()
+
+
+    @contextlib.contextmanager
+    def stage(self, name, bytes_read = 0):
+
+        '''context manager that records the cost of a stage
+
+        Parameters
+        ----------
+        name : str
+            name of the stage
+        bytes_read : int
+            bytes read from disk during the stage (default = 0)
+        '''
+
+        # nested stages with the same name are counted once
+        if not self.enabled or name in self.active:
+            yield
+            return
+
+        self.active.add(name)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+        finally:
+            self.active.discard(name)
+            stage = self.stages.setdefault(name, {'wall' : 0.0,
+                                                  'cpu' : 0.0,
+                                                  'bytes' : 0,
+                                                  'calls' : 0,
+                                                  'process_peak_rss_mb' :
+                                                      None})
+            stage['wall'] += time.perf_counter() - wall_start
+            stage['cpu'] += time.process_time() - cpu_start
+            stage['bytes'] += bytes_read
+            stage['calls'] += 1
+            stage['process_peak_rss_mb'] = peak_rss_mb()
+
+
+    def add_bytes(self, name, bytes_read):
+
+        '''adds bytes read to a stage
+
+        Parameters
+        ----------
+        name : str
+            name of the stage
+        bytes_read : int
+            bytes read from disk
+        '''
+
+        if self.enabled and name in self.stages:
+            self.stages[name]['bytes'] += bytes_read
+
+
+    def emit(self, **fields):
+
+        '''appends the stages of the current file to the log as one JSON
+        line and resets the stages
+
+        Parameters
+        ----------
+        **fields
+            other values to include in the record (e.g. file path)
+
+        Returns
+        -------
+        dict
+            the record emitted (stages, peak resident set size of the
+            process and, if trace_memory, peak traced memory of the file)
+        '''
+
+        record = dict(fields)
+        record['stages'] = self.stages
+        record['process_peak_rss_mb'] = peak_rss_mb()
+
+        # peak since timer was created or last record was emitted
+        if self.trace_memory:
+            record['file_peak_traced_mb'] = (tracemalloc.get_traced_memory()[1]
+                                             / 1e6)
+            tracemalloc.reset_peak()
+
+        if self.enabled and self.log_path is not None:
+            with open(self.log_path, 'a') as log_file:
+                log_file.write(json.dumps(record) + '\n')
+
+        self.stages = {}
+
+        return record
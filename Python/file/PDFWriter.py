@@ -0,0 +1,465 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import zlib
+import textwrap
+import numpy as np
+
+
+# points per millimetre (pdf positions and sizes are in points)
+POINTS_PER_MM = 72 / 25.4
+
+
+# (width, height) of each page size in millimetres
+PAGE_SIZES = {'letter' : (215.9, 279.4),
+              'a4'     : (210, 297)}
+
+
+# width of each Courier character relative to the font size
+COURIER_WIDTH = 0.6
+
+
+def pdf_string(text):
+
+    '''returns text as a pdf literal string (bytes)
+
+    Parameters
+    ----------
+    text : str
+        text to convert (characters that are not in the font encoding are
+        replaced with '?')
+
+    Returns
+    -------
+    bytes
+        text in parentheses with backslashes and parentheses escaped
+    '''
+
+    text_bytes = text.encode('cp1252', errors = 'replace')
+    text_bytes = (text_bytes.replace(b'\\', b'\\\\')
+                            .replace(b'(', b'\\(')
+                            .replace(b')', b'\\)')
+                            .replace(b'\r', b''))
+
+    return b'(' + text_bytes + b')'
+
+
+class PDFWriter:
+
+    '''Class for writing pdf files one page at a time.
+
+    Each image is compressed and written to the file as soon as it is added
+    and each page is written when the next page is started, so only the
+    page being written and the position of each object are held in memory.
+    The page tree and cross-reference table are written when the file is
+    closed. Memory use therefore does not grow with the number of pages
+    (e.g. one page per hour of a 30 day recording).
+
+    The file is written as file_path + '.part' and renamed when closed, so
+    a file that was not finished (e.g. an error in a with block, which
+    removes it) is never mistaken for a complete pdf.
+
+    Text is written in the standard Courier font (not embedded) and images
+    are written from pixel arrays (e.g. a rendered matplotlib canvas) so no
+    temporary image files are needed. Positions and sizes are in
+    millimetres from the top left corner of the page.
+
+    Attributes
+    ----------
+    file_path : str
+        the path to the .pdf file
+    page_width : float
+        width of each page in millimetres
+    page_height : float
+        height of each page in millimetres
+    margin : float
+        left, top, right and bottom margin in millimetres
+    page_count : int
+        number of pages started
+
+    Methods
+    -------
+    add_page(index = None)
+        starts a new page
+
+    text(text, x, y, size = 12, width = None, align = 'left')
+        writes one line of text on the current page
+
+    text_block(text, x, y, size = 12, line_height = 5, width = None)
+        writes lines of text, starting new pages as needed
+
+    image(pixels, x, y, width = None, height = None)
+        writes an image on the current page
+
+    close()
+        writes the page tree and cross-reference table and closes the file
+
+    abort()
+        closes and removes the incomplete file
+
+    '''
+
+
+    def __init__(self, file_path, page_size = 'letter', margin = 10,
+                 compress_level = 6):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the .pdf file to create
+        page_size : str
+            size of each page ('letter' or 'a4', default = 'letter')
+        margin : float
+            left, top, right and bottom margin in millimetres (default = 10)
+        compress_level : int
+            zlib compression level of images and page contents (1-9,
+            default = 6)
+        '''
+
+        self.file_path = file_path
+        self.page_width, self.page_height = PAGE_SIZES[page_size.lower()]
+        self.margin = margin
+        self.compress_level = compress_level
+
+        self.offsets = {}          # file position of each object
+        self.page_ids = []         # object id of each page
+        self.contents = None       # drawing operations of current page
+        self.images = None         # image names and ids on current page
+        self.page_index = None     # position of current page in document
+
+        # object 1 is the page tree (written on close) and object 2 the font
+        self.next_id = 3
+
+        # written to a temporary name and renamed when closed so an
+        # incomplete file is never left at file_path
+        self.part_path = self.file_path + '.part'
+        self.file = open(self.part_path, 'wb')
+        self.file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+        self.write_object(2, b'<< /Type /Font /Subtype /Type1 '
+                             b'/BaseFont /Courier /Encoding /WinAnsiEncoding >>')
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        # a file left by an error is removed rather than left looking complete
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+    @property
+    def page_count(self):
+
+        return len(self.page_ids) + (self.contents is not None)
+
+
+    def new_id(self):
+
+        '''returns the next unused object id'''
+
+        self.next_id += 1
+
+        return self.next_id - 1
+
+
+    def write_object(self, obj_id, body, stream = None):
+
+        '''writes one object (and its stream) to the file
+
+        Parameters
+        ----------
+        obj_id : int
+            object id
+        body : bytes
+            object dictionary (/Length is added if stream is given)
+        stream : bytes
+            compressed stream data (default = None = no stream)
+        '''
+
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(b'%d 0 obj\n' % obj_id)
+
+        if stream is None:
+            self.file.write(body)
+        else:
+            self.file.write(body[:-2] + b'/Length %d >>\nstream\n'
+                            % len(stream))
+            self.file.write(stream)
+            self.file.write(b'\nendstream')
+
+        self.file.write(b'\nendobj\n')
+
+
+    def finish_page(self):
+
+        '''writes the contents and page object of the current page'''
+
+        if self.contents is None: return
+
+        content_id = self.new_id()
+        self.write_object(content_id, b'<< /Filter /FlateDecode >>',
+                          zlib.compress(b'\n'.join(self.contents),
+                                        self.compress_level))
+
+        xobjects = b''.join(b'/%s %d 0 R ' % (name, image_id)
+                            for name, image_id in self.images.items())
+
+        page_id = self.new_id()
+        self.write_object(page_id,
+                          b'<< /Type /Page /Parent 1 0 R '
+                          b'/MediaBox [0 0 %.2f %.2f] '
+                          b'/Resources << /Font << /F1 2 0 R >> '
+                          b'/XObject << %s>> >> /Contents %d 0 R >>'
+                          % (self.page_width * POINTS_PER_MM,
+                             self.page_height * POINTS_PER_MM,
+                             xobjects, content_id))
+
+        # pages can be placed before pages already written (e.g. a summary
+        # page calculated from the pages that follow it)
+        if self.page_index is None:
+            self.page_ids.append(page_id)
+        else:
+            self.page_ids.insert(self.page_index, page_id)
+
+        self.contents = None
+        self.images = None
+
+
+    def add_page(self, index = None):
+
+        '''starts a new page (the previous page is written to the file)
+
+        Parameters
+        ----------
+        index : int
+            position of the page in the document (0 = first page) if it
+            should be placed before pages already added (default = None =
+            after the last page)
+
+        Returns
+        -------
+        None
+        '''
+
+        self.finish_page()
+
+        self.contents = []
+        self.images = {}
+        self.page_index = index
+
+
+    def text(self, text, x, y, size = 12, width = None, align = 'left'):
+
+        '''writes one line of text on the current page
+
+        Parameters
+        ----------
+        text : str
+            text to write
+        x : float
+            left edge of text (or of the width it is aligned in) in mm
+        y : float
+            baseline of text in mm from the top of the page
+        size : float
+            font size in points (default = 12)
+        width : float
+            width in mm to align text in (default = None = to right margin)
+        align : str
+            'left', 'center' or 'right' (default = 'left')
+
+        Returns
+        -------
+        None
+        '''
+
+        if self.contents is None: self.add_page()
+
+        if width is None: width = self.page_width - self.margin - x
+
+        # Courier characters all have the same width
+        text_width = len(text) * COURIER_WIDTH * size / POINTS_PER_MM
+
+        if align == 'center':
+            x += (width - text_width) / 2
+        elif align == 'right':
+            x += width - text_width
+
+        self.contents.append(b'BT /F1 %.2f Tf %.2f %.2f Td %s Tj ET'
+                             % (size, x * POINTS_PER_MM,
+                                (self.page_height - y) * POINTS_PER_MM,
+                                pdf_string(text)))
+
+
+    def text_block(self, text, x, y, size = 12, line_height = 5,
+                   width = None):
+
+        '''writes lines of text, starting new pages as needed
+
+        Lines longer than width are wrapped and a new page is started (at
+        the top margin) when the next line would be below the bottom margin.
+
+        Parameters
+        ----------
+        text : str
+            text to write (lines separated by '\\n')
+        x : float
+            left edge of text in mm
+        y : float
+            top of first line in mm from the top of the page
+        size : float
+            font size in points (default = 12)
+        line_height : float
+            height of each line in mm (default = 5)
+        width : float
+            width in mm to wrap lines in (default = None = to right margin)
+
+        Returns
+        -------
+        float
+            top of the line after the text in mm from the top of the page
+        '''
+
+        if width is None: width = self.page_width - self.margin - x
+
+        line_chars = max(int(width * POINTS_PER_MM / (COURIER_WIDTH * size)), 1)
+
+        for line in text.split('\n'):
+
+            for wrapped in textwrap.wrap(line, line_chars) or ['']:
+
+                # continue on the following page (after the current page
+                # if it was placed before pages already added)
+                if y + line_height > self.page_height - self.margin:
+                    self.add_page(None if self.page_index is None else
+                                  self.page_index + 1)
+                    y = self.margin
+
+                # baseline placed in line as fpdf places it in a cell
+                self.text(wrapped, x,
+                          y + line_height / 2 + 0.3 * size / POINTS_PER_MM,
+                          size)
+                y += line_height
+
+        return y
+
+
+    def image(self, pixels, x, y, width = None, height = None):
+
+        '''writes an image on the current page
+
+        The image is compressed and written to the file immediately.
+
+        Parameters
+        ----------
+        pixels : ndarray
+            uint8 RGB or RGBA pixels (rows, columns, channels); alpha is
+            ignored
+        x : float
+            left edge of image in mm
+        y : float
+            top edge of image in mm from the top of the page
+        width : float
+            width of image in mm (default = None = one point per pixel, or
+            in proportion to height)
+        height : float
+            height of image in mm (default = None = one point per pixel, or
+            in proportion to width)
+
+        Returns
+        -------
+        None
+        '''
+
+        if self.contents is None: self.add_page()
+
+        rows, columns = pixels.shape[:2]
+
+        # size in proportion to pixels if not given
+        if width is None and height is None:
+            width = columns / POINTS_PER_MM
+            height = rows / POINTS_PER_MM
+        elif width is None:
+            width = height * columns / rows
+        elif height is None:
+            height = width * rows / columns
+
+        # write image as compressed RGB samples
+        rgb = np.ascontiguousarray(pixels[:, :, :3], dtype = np.uint8)
+
+        image_id = self.new_id()
+        self.write_object(image_id,
+                          b'<< /Type /XObject /Subtype /Image '
+                          b'/Width %d /Height %d /ColorSpace /DeviceRGB '
+                          b'/BitsPerComponent 8 /Filter /FlateDecode >>'
+                          % (columns, rows),
+                          zlib.compress(rgb.tobytes(), self.compress_level))
+
+        name = b'Im%d' % image_id
+        self.images[name] = image_id
+
+        # scale image to size and place at position
+        self.contents.append(b'q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q'
+                             % (width * POINTS_PER_MM,
+                                height * POINTS_PER_MM,
+                                x * POINTS_PER_MM,
+                                (self.page_height - y - height)
+                                * POINTS_PER_MM,
+                                name))
+
+
+    def close(self):
+
+        '''writes the page tree and cross-reference table and closes the file
+
+        Returns
+        -------
+        None
+        '''
+
+        if self.file.closed: return
+
+        self.finish_page()
+
+        # page tree and catalog
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        self.write_object(1, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                          % (kids, len(self.page_ids)))
+
+        catalog_id = self.new_id()
+        self.write_object(catalog_id, b'<< /Type /Catalog /Pages 1 0 R >>')
+
+        # cross-reference table (each entry is 20 bytes)
+        xref_offset = self.file.tell()
+        self.file.write(b'xref\n0 %d\n0000000000 65535 f \n' % self.next_id)
+        self.file.write(b''.join(b'%010d 00000 n \n' % self.offsets[obj_id]
+                                 for obj_id in range(1, self.next_id)))
+
+        self.file.write(b'trailer\n<< /Size %d /Root %d 0 R >>\n'
+                        b'startxref\n%d\n%%%%EOF\n'
+                        % (self.next_id, catalog_id, xref_offset))
+
+        self.file.close()
+        os.replace(self.part_path, self.file_path)
+
+
+    def abort(self):
+
+        '''closes and removes the incomplete file
+
+        Returns
+        -------
+        None
+        '''
+
+        if not self.file.closed: self.file.close()
+
+        if os.path.exists(self.part_path): os.remove(self.part_path)
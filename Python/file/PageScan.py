@@ -0,0 +1,907 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import io
+import re
+import itertools
+import numpy as np
+
+
+# status flags of a page (combined with bitwise or)
+PAGE_OK = 0
+BAD_SEQUENCE = 1    # sequence number missing or does not follow previous page
+BAD_LENGTH = 2      # data line is not 3600 hexadecimal characters
+BAD_HEX = 4         # data line contains characters that are not hexadecimal
+BAD_TIME = 8        # page time missing or not after previous page
+BAD_INTERVAL = 16   # time since previous page is not 300 sample periods
+
+STATUS_NAMES = {BAD_SEQUENCE : 'sequence',
+                BAD_LENGTH : 'length',
+                BAD_HEX : 'hex',
+                BAD_TIME : 'time',
+                BAD_INTERVAL : 'interval'}
+
+HEADER_LINES = 59
+PAGE_LINES = 10
+PAGE_HEX = 3600
+PAGE_MARKER = 'Recorded Data'
+HEX_DIGITS = b'0123456789ABCDEFabcdef'
+TIME_LINE_LENGTH = len('Page Time:YYYY-MM-DD HH:MM:SS:fff')
+
+# page time, temperature and battery voltage lines of a page (the lines
+# between them are skipped)
+HEALTH_LINES = re.compile(rb'\n(Page Time:[^\n]*)\n[^\n]*\n'
+                          rb'Temperature:([^\n]*)\n'
+                          rb'Battery voltage:([^\n]*)\n')
+
+# page number and seconds of time added (or removed) before each page that
+# does not follow the page before it
+DISCONTINUITY_DTYPE = [('page', np.int64), ('gap', np.float64)]
+
+
+def status_names(status):
+
+    '''returns the names of the flags set in a page status
+
+    Parameters
+    ----------
+    status : int
+        status of a page (flags combined with bitwise or)
+
+    Returns
+    -------
+    list
+        name of each flag set (empty if page is ok)
+    '''
+
+    return [name for flag, name in STATUS_NAMES.items() if status & flag]
+
+
+def last_valid(valid):
+
+    '''returns the index of the last valid item before each item
+
+    Parameters
+    ----------
+    valid : ndarray (bool)
+        is each item valid
+
+    Returns
+    -------
+    ndarray (int)
+        index of the last valid item before each item (-1 if none)
+    '''
+
+    index = np.where(valid, np.arange(len(valid)), -1)
+    index = np.maximum.accumulate(index) if len(index) else index
+
+    return np.concatenate(([-1], index[:-1]))[:len(valid)]
+
+
+def find_pages(lines, marker = PAGE_MARKER):
+
+    '''returns the index of the first line of each complete page
+
+    Pages are found from their marker lines rather than assumed to be every
+    10 lines so a page with missing or extra lines does not shift every page
+    after it. A page is complete if there are at least 10 lines before the
+    next marker (extra lines are not part of the page).
+
+    Parameters
+    ----------
+    lines : list
+        lines (str or bytes without line endings) following the header
+    marker : str or bytes
+        first line of each page (default = PAGE_MARKER, must be bytes if
+        lines are bytes)
+
+    Returns
+    -------
+    ndarray (int64)
+        index in lines of the marker of each complete page
+    '''
+
+    line_count = len(lines)
+
+    # pages follow each other (usual case)
+    if (line_count % PAGE_LINES == 0 and
+            all(line == marker for line in lines[0::PAGE_LINES])):
+        return np.arange(0, line_count, PAGE_LINES)
+
+    markers = np.flatnonzero(np.fromiter((line == marker for line in lines),
+                                         dtype = bool, count = line_count))
+    following = np.append(markers[1:], line_count)
+
+    return markers[following - markers >= PAGE_LINES]
+
+
+def check_data_lines(hex_lines):
+
+    '''returns the status of the data line of each page
+
+    Parameters
+    ----------
+    hex_lines : list
+        data line (str or bytes) of each page
+
+    Returns
+    -------
+    ndarray (uint8)
+        BAD_LENGTH and BAD_HEX flags of each data line
+    '''
+
+    line_count = len(hex_lines)
+    status = np.zeros(line_count, dtype = np.uint8)
+
+    if not line_count: return status
+
+    if isinstance(hex_lines[0], str):
+        hex_lines = [line.encode('utf-8', 'replace') for line in hex_lines]
+
+    # data line length
+    lengths = np.fromiter(map(len, hex_lines), dtype = np.int64,
+                          count = line_count)
+    status[lengths != PAGE_HEX] |= BAD_LENGTH
+
+    # hex validity (check each line only if the lines are not all hex)
+    if b''.join(hex_lines).translate(None, HEX_DIGITS):
+        status[np.fromiter((bool(line.translate(None, HEX_DIGITS))
+                            for line in hex_lines),
+                           dtype = bool, count = line_count)] |= BAD_HEX
+
+    return status
+
+
+def parse_times(time_lines):
+
+    '''parses page time lines (NaT for lines that are not valid times)
+
+    Lines in the usual format are parsed all at once by reading the digits
+    of each field from one array of bytes (casting strings to datetime64 is
+    avoided as numpy can crash when a large array has an invalid string).
+    Other lines with the page time label are parsed one at a time.
+
+    Parameters
+    ----------
+    time_lines : list
+        'Page Time:YYYY-MM-DD HH:MM:SS:fff' line (str or bytes) of each page
+
+    Returns
+    -------
+    ndarray (datetime64[ms])
+        time of each page
+    '''
+
+    times = np.full(len(time_lines), np.datetime64('NaT', 'ms'))
+    if not len(time_lines): return times
+
+    is_str = isinstance(time_lines[0], str)
+    prefix = 'Page Time:' if is_str else b'Page Time:'
+
+    # lines with the usual length are parsed together
+    usual = np.fromiter((len(line) == TIME_LINE_LENGTH and
+                         line.startswith(prefix) for line in time_lines),
+                        dtype = bool, count = len(time_lines))
+
+    if usual.any():
+
+        text = prefix[:0].join(itertools.compress(time_lines, usual))
+        if is_str: text = text.encode('latin-1', errors = 'replace')
+
+        # characters after label as digit values (separators are checked)
+        chars = (np.frombuffer(text, dtype = np.uint8)
+                 .reshape(-1, TIME_LINE_LENGTH)[:, 10:].astype(np.int64) -
+                 ord('0'))
+
+        separators = {4 : '-', 7 : '-', 10 : ' ', 13 : ':', 16 : ':',
+                      19 : ':'}
+        digits = [index for index in range(chars.shape[1])
+                  if index not in separators]
+
+        valid = ((chars[:, digits] >= 0) & (chars[:, digits] <= 9)).all(1)
+        for index, separator in separators.items():
+            valid &= chars[:, index] == ord(separator) - ord('0')
+
+        def field(start, stop):
+            return chars[:, start:stop] @ 10 ** np.arange(stop - start - 1,
+                                                          -1, -1)
+
+        year, month, day = field(0, 4), field(5, 7), field(8, 10)
+        hour, minute, second = field(11, 13), field(14, 16), field(17, 19)
+        millisecond = field(20, 23)
+
+        # months since 1970 (invalid months are masked below)
+        months = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype(
+            'datetime64[M]')
+        month_days = ((months + 1).astype('datetime64[D]') -
+                      months.astype('datetime64[D]')).astype(np.int64)
+
+        valid &= ((month >= 1) & (month <= 12) & (day >= 1) &
+                  (day <= month_days) & (hour < 24) & (minute < 60) &
+                  (second < 60))
+
+        usual_times = (months.astype('datetime64[ms]') +
+                       ((day - 1) * 86400000 + hour * 3600000 +
+                        minute * 60000 + second * 1000 +
+                        millisecond).astype('timedelta64[ms]'))
+        usual_times[~valid] = np.datetime64('NaT')
+
+        times[usual] = usual_times
+
+    # parse other lines on their own
+    for index in np.flatnonzero(~usual):
+
+        line = time_lines[index]
+        if not line.startswith(prefix): continue
+
+        # convert to ISO format (milliseconds follow the last colon)
+        if not is_str: line = line.decode('latin-1')
+        last_colon = line.rindex(':')
+        try:
+            times[index] = np.datetime64(line[10:last_colon] + '.' +
+                                         line[last_colon + 1:], 'ms')
+        except ValueError:
+            pass
+
+    return times
+
+
+def parse_values(values):
+
+    '''parses numbers (NaN for values that are not valid numbers)
+
+    Parameters
+    ----------
+    values : list
+        text (str or bytes) of each number
+
+    Returns
+    -------
+    ndarray (float)
+        value of each number
+    '''
+
+    try:
+        return np.array(values).astype(float)
+
+    # parse each value on its own if any are not valid
+    except ValueError:
+
+        parsed = np.full(len(values), np.nan)
+
+        for index, value in enumerate(values):
+            try:
+                parsed[index] = float(value)
+            except ValueError:
+                pass
+
+        return parsed
+
+
+def read_page_health(file_path, contents = None,
+                     chunk_bytes = 4 * 1024 * 1024):
+
+    '''returns the time, temperature and battery voltage of each page
+
+    Only the page time, temperature and battery voltage lines are parsed.
+    They are found by searching each chunk of the file for the page time
+    label (see HEALTH_LINES) so the 3600 character data lines are skipped
+    over rather than split into lines and checked, and values are
+    converted to arrays all at once. Pages without these lines in the usual
+    order are left out.
+
+    Parameters
+    ----------
+    file_path : str
+        path to the GENEActiv .bin file
+    contents : bytes
+        contents of the file already read into memory (default = None =
+        read from file_path)
+    chunk_bytes : int
+        number of bytes read at a time (default = 4 MB)
+
+    Returns
+    -------
+    dict
+        'time' (ndarray (datetime64[ms]), NaT if not valid), 'temperature'
+        and 'battery' (ndarray (float), NaN if not valid) of each page
+    '''
+
+    time_lines = []
+    temperatures = []
+    batteries = []
+    tail = b''
+
+    if contents is None:
+        bin_file = open(file_path, 'rb')
+    else:
+        bin_file = io.BytesIO(contents)
+
+    with bin_file:
+
+        while True:
+
+            chunk = bin_file.read(chunk_bytes)
+            if b'\r' in chunk: chunk = chunk.replace(b'\r', b'')
+
+            data = tail + chunk
+            end = 0
+
+            for match in HEALTH_LINES.finditer(data):
+                time_line, temperature, battery = match.groups()
+                time_lines.append(time_line)
+                temperatures.append(temperature)
+                batteries.append(battery)
+                end = match.end()
+
+            if not chunk: break
+
+            # lines of a page may continue in the next chunk
+            tail = data[max(end, len(data) - 1024):]
+
+    return {'time' : parse_times(time_lines),
+            'temperature' : parse_values(temperatures),
+            'battery' : parse_values(batteries)}
+
+
+def resync_pages(lines, marker = PAGE_MARKER):
+
+    '''returns the lines of the complete pages that can be decoded
+
+    Pages are found with find_pages and pages whose data line is not 3600
+    hexadecimal characters or whose page time is not valid are skipped, so
+    the lines returned are 10 lines per page and can be indexed by page.
+
+    Parameters
+    ----------
+    lines : list
+        lines (str or bytes without line endings) following the header
+    marker : str or bytes
+        first line of each page (default = PAGE_MARKER)
+
+    Returns
+    -------
+    tuple
+        lines of the pages kept (list, lines itself if none were skipped)
+        and index in lines of the marker of each page kept (ndarray)
+    '''
+
+    starts = find_pages(lines, marker)
+
+    keep = ((check_data_lines([lines[start + 9] for start in starts]) ==
+             PAGE_OK) &
+            ~np.isnat(parse_times([lines[start + 3] for start in starts])))
+    starts = starts[keep]
+
+    # nothing skipped
+    if len(starts) * PAGE_LINES == len(lines): return lines, starts
+
+    return (list(itertools.chain.from_iterable(
+        lines[start : start + PAGE_LINES] for start in starts)), starts)
+
+
+def find_discontinuities(page_times, sample_rate, tolerance = 0.05):
+
+    '''returns the pages that do not start 300 samples after the page
+    before them
+
+    Parameters
+    ----------
+    page_times : ndarray (datetime64)
+        time of each page
+    sample_rate : float
+        measurement frequency (Hz)
+    tolerance : float
+        difference (seconds) from the expected time between pages allowed
+        (default = 0.05)
+
+    Returns
+    -------
+    ndarray (DISCONTINUITY_DTYPE)
+        page number (starting at 1) and seconds of time added (negative if
+        removed) before each page that does not follow the page before it
+    '''
+
+    gaps = (np.diff(page_times) / np.timedelta64(1, 's') -
+            300 / sample_rate)
+    pages = np.flatnonzero(np.abs(gaps) > tolerance)
+
+    discontinuities = np.zeros(len(pages), dtype = DISCONTINUITY_DTYPE)
+    discontinuities['page'] = pages + 2
+    discontinuities['gap'] = gaps[pages]
+
+    return discontinuities
+
+
+class PageScan:
+
+    '''Class for checking the integrity of every page of a GENEActiv .bin
+    file in one streaming pass.
+
+    The file is read in large binary chunks and each chunk is split into
+    lines at once so that only a few operations per page are done in python
+    and the checks themselves are done on whole arrays. Pages are found from
+    their 'Recorded Data' markers (see find_pages) and lines that are not
+    part of a complete page are skipped. Each page is checked for sequence
+    number continuity, data line length (3600 hexadecimal characters),
+    hexadecimal validity, page time order and the expected time between
+    pages (300 sample periods).
+
+    A page that only fails because the page before it is corrupt is not
+    flagged: sequence numbers and page times are compared with the last
+    page that had a valid value.
+
+    Attributes
+    ----------
+    file_path : str
+        path to the GENEActiv .bin file
+    interval_tolerance : float
+        difference (seconds) from the expected time between pages allowed
+    header : dict
+        keys and values from the file header
+    sample_rate : float
+        measurement frequency from the header (Hz)
+    status : ndarray (uint8)
+        status flags of each complete page (PAGE_OK if page is ok)
+    sequence : ndarray (int64)
+        sequence number of each page (-1 if missing)
+    page_times : ndarray (datetime64[ms])
+        time of each page (NaT if missing)
+    page_lines : ndarray (int64)
+        line of each page counted from the first line after the header
+    skipped_runs : list
+        (line, count) of each run of lines skipped because they are not
+        part of a complete page (lines counted as in page_lines)
+    trailing_lines : int
+        number of lines after the last complete page (partial page)
+    time_previous : ndarray (int64)
+        index of the page each page time was compared with (-1 if none)
+
+    Methods
+    -------
+    scan(contents = None, chunk_bytes = 4 * 1024 * 1024)
+        reads the file and checks every page
+
+    decodable()
+        returns which pages can be decoded
+
+    discontinuities()
+        returns the decodable pages that do not follow the page before them
+
+    report()
+        returns a summary of the problems found
+
+    last_sequence_num()
+        returns the last valid sequence number in the file
+
+    '''
+
+
+    def __init__(self, file_path, interval_tolerance = 0.05):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the GENEActiv .bin file
+        interval_tolerance : float
+            difference (seconds) from the expected time between pages
+            allowed (default = 0.05)
+        '''
+
+        self.file_path = file_path
+        self.interval_tolerance = interval_tolerance
+        self.header = {}
+        self.sample_rate = None
+        self.status = np.zeros(0, dtype = np.uint8)
+        self.sequence = np.zeros(0, dtype = np.int64)
+        self.page_times = np.zeros(0, dtype = 'datetime64[ms]')
+        self.page_lines = np.zeros(0, dtype = np.int64)
+        self.skipped_runs = []
+        self.trailing_lines = 0
+        self.time_previous = np.zeros(0, dtype = np.int64)
+
+
+    @property
+    def pagecount(self):
+
+        '''number of complete pages in the file'''
+
+        return len(self.status)
+
+
+    def scan(self, contents = None, chunk_bytes = 4 * 1024 * 1024):
+
+        '''reads the file and checks every page
+
+        Parameters
+        ----------
+        contents : bytes
+            contents of the file already read into memory (e.g. by a
+            Prefetcher) (default = None = read from file_path)
+        chunk_bytes : int
+            number of bytes read at a time (default = 4 MB)
+
+        Returns
+        -------
+        PageScan
+            self (so scan can be created and run in one line)
+        '''
+
+        marker = PAGE_MARKER.encode()
+
+        status_chunks = []
+        sequence_chunks = []
+        time_chunks = []
+        line_chunks = []
+        self.skipped_runs = []
+
+        header_lines = []
+        lines = []
+        partial = b''
+        line_base = 0   # line number of lines[0]
+
+        if contents is None:
+            bin_file = open(self.file_path, 'rb')
+        else:
+            bin_file = io.BytesIO(contents)
+
+        with bin_file:
+
+            while True:
+
+                chunk = bin_file.read(chunk_bytes)
+
+                # split into lines (last line may continue in next chunk)
+                if chunk:
+                    if b'\r' in chunk: chunk = chunk.replace(b'\r', b'')
+                    chunk_lines = (partial + chunk).split(b'\n')
+                    partial = chunk_lines.pop()
+                    lines.extend(chunk_lines)
+                elif partial:
+                    lines.append(partial)
+                    partial = b''
+
+                # header lines
+                if len(header_lines) < HEADER_LINES:
+                    header_count = HEADER_LINES - len(header_lines)
+                    header_lines.extend(lines[:header_count])
+                    del lines[:header_count]
+
+                # lines from the last marker may be a page that continues in
+                # the next chunk
+                ready = len(lines)
+                if chunk:
+                    for index in range(len(lines) - 1, -1, -1):
+                        if lines[index] == marker:
+                            ready = index
+                            break
+
+                if ready:
+
+                    ready_lines = lines[:ready]
+                    starts = find_pages(ready_lines, marker)
+
+                    # check complete pages
+                    if len(starts):
+                        if len(starts) * PAGE_LINES != ready:
+                            ready_lines = list(itertools.chain.from_iterable(
+                                ready_lines[start : start + PAGE_LINES]
+                                for start in starts))
+                        status, sequence, times = self.check_pages(
+                            ready_lines)
+                        status_chunks.append(status)
+                        sequence_chunks.append(sequence)
+                        time_chunks.append(times)
+                        line_chunks.append(starts + line_base)
+
+                    # lines that are not part of a page
+                    self.add_skipped(starts, ready, line_base,
+                                     final = not chunk)
+
+                    del lines[:ready]
+                    line_base += ready
+
+                if not chunk: break
+
+        self.parse_header(header_lines)
+
+        if status_chunks:
+            self.status = np.concatenate(status_chunks)
+            self.sequence = np.concatenate(sequence_chunks)
+            self.page_times = np.concatenate(time_chunks)
+            self.page_lines = np.concatenate(line_chunks)
+
+        self.check_continuity()
+
+        return self
+
+
+    def add_skipped(self, starts, line_count, line_base, final = False):
+
+        '''records the runs of lines between pages
+
+        Parameters
+        ----------
+        starts : ndarray
+            index of the first line of each page in the lines checked
+        line_count : int
+            number of lines checked
+        line_base : int
+            line number of the first line checked
+        final : bool
+            are these the last lines of the file? lines after the last page
+            are then counted as trailing_lines (default = False)
+        '''
+
+        firsts = np.concatenate(([0], starts + PAGE_LINES))
+        lasts = np.append(starts, line_count)
+
+        if final:
+            self.trailing_lines = int(lasts[-1] - firsts[-1])
+            firsts = firsts[:-1]
+            lasts = lasts[:-1]
+
+        for first, last in zip(firsts, lasts):
+
+            if last <= first: continue
+
+            # join runs split between chunks
+            if (self.skipped_runs and
+                    sum(self.skipped_runs[-1]) == line_base + first):
+                line, count = self.skipped_runs.pop()
+                self.skipped_runs.append((line, count + last - first))
+            else:
+                self.skipped_runs.append((int(line_base + first),
+                                          int(last - first)))
+
+
+    def parse_header(self, header_lines):
+
+        '''parses the header lines into the header (dict) attribute'''
+
+        self.header = {}
+
+        for line in header_lines:
+            key, colon, value = line.decode('utf-8', 'replace').partition(':')
+            if colon:
+                self.header[key] = value.rstrip('\x00').rstrip()
+
+        try:
+            self.sample_rate = float(
+                self.header['Measurement Frequency'].split()[0])
+        except (KeyError, ValueError, IndexError):
+            self.sample_rate = None
+
+
+    def check_pages(self, page_lines):
+
+        '''checks the contents of each page (on its own)
+
+        Parameters
+        ----------
+        page_lines : list
+            10 lines (bytes) of each page
+
+        Returns
+        -------
+        tuple
+            status (ndarray uint8), sequence number (ndarray int64, -1 if
+            missing) and page time (ndarray datetime64[ms], NaT if missing)
+            of each page
+        '''
+
+        page_count = len(page_lines) // PAGE_LINES
+
+        # data line length and hex validity
+        status = check_data_lines(page_lines[9::PAGE_LINES])
+
+        # sequence numbers
+        sequence = np.fromiter(
+            (int(line[16:]) if line.startswith(b'Sequence Number:') and
+             line[16:].isdigit() else -1
+             for line in page_lines[2::PAGE_LINES]),
+            dtype = np.int64, count = page_count)
+
+        # page times
+        times = parse_times(page_lines[3::PAGE_LINES])
+
+        return status, sequence, times
+
+
+    def decodable(self):
+
+        '''returns which pages can be decoded
+
+        Pages with a valid data line and page time are decodable (the pages
+        kept by resync_pages).
+
+        Returns
+        -------
+        ndarray (bool)
+            True for each page that can be decoded
+        '''
+
+        return (((self.status & (BAD_LENGTH | BAD_HEX)) == 0) &
+                ~np.isnat(self.page_times))
+
+
+    def discontinuities(self):
+
+        '''returns the decodable pages that do not follow the page before
+        them (see find_discontinuities)
+
+        Returns
+        -------
+        ndarray (DISCONTINUITY_DTYPE)
+            page number (counting decodable pages only, starting at 1) and
+            seconds of time added before each page that does not follow the
+            page before it
+        '''
+
+        return find_discontinuities(self.page_times[self.decodable()],
+                                    self.sample_rate or 75,
+                                    self.interval_tolerance)
+
+
+    def check_continuity(self):
+
+        '''checks sequence numbers and page times against previous pages
+
+        Each page is compared with the last page before it that had a valid
+        sequence number (or page time) so the difference expected is the
+        number of pages between them.
+        '''
+
+        page_index = np.arange(self.pagecount)
+
+        # sequence numbers
+        valid = self.sequence >= 0
+        previous = last_valid(valid)
+        expected = np.where(previous >= 0,
+                            self.sequence[previous] + page_index - previous,
+                            0)
+        self.status[~valid | (self.sequence != expected)] |= BAD_SEQUENCE
+
+        # page times (a page whose time goes backwards is not used as the
+        # previous page of the next page so a single bad time is one problem)
+        valid = ~np.isnat(self.page_times)
+        self.status[~valid] |= BAD_TIME
+        backwards = np.zeros(self.pagecount, dtype = bool)
+
+        for check in range(2):
+
+            previous = last_valid(valid)
+            has_previous = valid & (previous >= 0)
+
+            elapsed = np.zeros(self.pagecount)
+            elapsed[has_previous] = (
+                (self.page_times[has_previous] -
+                 self.page_times[previous[has_previous]]) /
+                np.timedelta64(1, 's'))
+
+            backwards |= has_previous & (elapsed <= 0)
+            valid = valid & ~backwards
+
+        self.status[backwards] |= BAD_TIME
+        self.time_previous = previous
+
+        if self.sample_rate:
+            expected = (page_index - previous) * 300 / self.sample_rate
+            self.status[has_previous & ~backwards &
+                        (np.abs(elapsed - expected) >
+                         self.interval_tolerance)] |= BAD_INTERVAL
+
+
+    def runs(self, pages):
+
+        '''groups page indexes into runs of consecutive pages
+
+        Returns
+        -------
+        list
+            (first page, last page) of each run (page numbers start at 1)
+        '''
+
+        if not len(pages): return []
+
+        breaks = np.flatnonzero(np.diff(pages) != 1)
+        firsts = np.concatenate(([pages[0]], pages[breaks + 1]))
+        lasts = np.concatenate((pages[breaks], [pages[-1]]))
+
+        return [(int(first) + 1, int(last) + 1)
+                for first, last in zip(firsts, lasts)]
+
+
+    def report(self):
+
+        '''returns a summary of the problems found
+
+        Returns
+        -------
+        dict
+            pages : number of complete pages
+            header_pages : 'Number of Pages' in header (None if missing)
+            pagecount_match : does number of pages match header
+            trailing_lines : lines after the last complete page
+            skipped_lines : (line in file, count) of each run of lines
+                            between pages (line numbers start at 1)
+            bad_pages : number of pages with any problem
+            flags : number of pages with each problem (by name)
+            gaps : (page, seconds) for each page that starts more than
+                   interval_tolerance later than expected
+            sequence_breaks : (page, expected, found) for each page whose
+                              sequence number does not follow the last
+                              valid one
+            bad_runs : (first page, last page, problem names) for each run
+                       of consecutive pages with the same problems
+        '''
+
+        try:
+            header_pages = int(self.header['Number of Pages'])
+        except (KeyError, ValueError):
+            header_pages = None
+
+        page_index = np.arange(self.pagecount)
+
+        # gaps in page times
+        gaps = []
+        if self.sample_rate:
+            previous = self.time_previous
+            for page in np.flatnonzero(
+                    (self.status & BAD_INTERVAL).astype(bool)):
+                elapsed = ((self.page_times[page] -
+                            self.page_times[previous[page]]) /
+                           np.timedelta64(1, 's'))
+                extra = elapsed - ((page - previous[page]) * 300 /
+                                   self.sample_rate)
+                if extra > 0: gaps.append((int(page) + 1, float(extra)))
+
+        # breaks in sequence numbers
+        sequence_breaks = []
+        valid = self.sequence >= 0
+        previous = last_valid(valid)
+        for page in np.flatnonzero((self.status & BAD_SEQUENCE).astype(bool)):
+            expected = (self.sequence[previous[page]] + page - previous[page]
+                        if previous[page] >= 0 else 0)
+            sequence_breaks.append((int(page) + 1, int(expected),
+                                    int(self.sequence[page])))
+
+        # runs of pages with the same problems
+        bad_runs = []
+        for status in np.unique(self.status[self.status != PAGE_OK]):
+            for first, last in self.runs(
+                    page_index[self.status == status]):
+                bad_runs.append((first, last, status_names(status)))
+        bad_runs.sort()
+
+        return {'pages' : self.pagecount,
+                'header_pages' : header_pages,
+                'pagecount_match' : (header_pages == self.pagecount and
+                                     self.trailing_lines == 0 and
+                                     not self.skipped_runs),
+                'trailing_lines' : self.trailing_lines,
+                'skipped_lines' : [(HEADER_LINES + line + 1, count)
+                                   for line, count in self.skipped_runs],
+                'bad_pages' : int(np.count_nonzero(self.status)),
+                'flags' : {name : int(np.count_nonzero(self.status & flag))
+                           for flag, name in STATUS_NAMES.items()},
+                'gaps' : gaps,
+                'sequence_breaks' : sequence_breaks,
+                'bad_runs' : bad_runs}
+
+
+    def last_sequence_num(self):
+
+        '''returns the last valid sequence number in the file
+
+        Returns
+        -------
+        int
+            sequence number of the last complete page with a valid sequence
+            number (-1 if there is none)
+        '''
+
+        valid = np.flatnonzero(self.sequence >= 0)
+
+        return int(self.sequence[valid[-1]]) if len(valid) else -1
@@ -0,0 +1,156 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import queue
+import threading
+
+
+# marks the end of the files in the queue
+END = object()
+
+
+def read_file(file_path):
+
+    '''returns the contents of a file as bytes (or None if it can't be read)'''
+
+    try:
+        with open(file_path, 'rb') as in_file:
+            return in_file.read()
+    except OSError:
+        return None
+
+
+class Prefetcher:
+
+    '''Class for reading the next files of a batch in the background.
+
+    Files are read by a background thread while the current file is being
+    processed so that reading from a slow network share overlaps with
+    decoding and plotting. At most max_files files are held in the queue
+    waiting to be processed (plus the one being read) so memory use is
+    bounded.
+
+    Iterating yields (file_path, contents) for each file in order. contents
+    is the bytes of the file, or None if the file could not be read (the
+    file can then be read as usual so the reader reports the problem). If
+    read_func raises an exception, the exception is yielded as contents so
+    the caller can report it and continue with the next file.
+
+    Attributes
+    ----------
+    file_paths : list
+        paths of the files to read in order
+    max_files : int
+        maximum number of files read ahead of the file being processed
+    read_func : function
+        function that returns the contents of a file given its path
+
+    Methods
+    -------
+    close()
+        stops reading files
+
+    '''
+
+
+    def __init__(self, file_paths, max_files = 1, read_func = read_file):
+
+        '''
+        Parameters
+        ----------
+        file_paths : list
+            paths of the files to read in order
+        max_files : int
+            maximum number of files read ahead of the file being processed
+            (default = 1)
+        read_func : function
+            function that returns the contents of a file given its path
+            (default = read_file)
+        '''
+
+        self.file_paths = list(file_paths)
+        self.max_files = max(max_files, 1)
+        self.read_func = read_func
+
+        self.queue = None
+        self.thread = None
+        self.stop = threading.Event()
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+    def __iter__(self):
+
+        self.stop.clear()
+        self.queue = queue.Queue(maxsize = self.max_files)
+        self.thread = threading.Thread(target = self.read_files,
+                                       daemon = True)
+        self.thread.start()
+
+        try:
+            while True:
+                item = self.queue.get()
+                if item is END: break
+                yield item
+        finally:
+            self.close()
+
+
+    def read_files(self):
+
+        '''reads each file and puts it in the queue (background thread)'''
+
+        def put(item):
+
+            # wait for space in the queue (checking whether to stop)
+            while not self.stop.is_set():
+                try:
+                    self.queue.put(item, timeout = 0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        try:
+            for file_path in self.file_paths:
+
+                if self.stop.is_set(): return
+
+                # pass errors to the caller rather than ending the batch
+                try:
+                    contents = self.read_func(file_path)
+                except Exception as error:
+                    contents = error
+
+                put((file_path, contents))
+
+        finally:
+            put(END)
+
+
+    def close(self):
+
+        '''stops reading files
+
+        Files already read are discarded.
+        '''
+
+        self.stop.set()
+
+        if self.thread is not None:
+
+            # empty queue so the thread is not blocked
+            while self.thread.is_alive():
+                try:
+                    self.queue.get(timeout = 0.1)
+                except queue.Empty:
+                    pass
+
+            self.thread = None
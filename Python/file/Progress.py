@@ -0,0 +1,273 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import time
+import logging
+
+
+# logger used when a ProgressReporter is not given one
+logger = logging.getLogger('owcurate')
+
+
+class ProgressReporter:
+
+    '''Class for reporting progress and warnings from long running tasks.
+
+    Progress updates are throttled so that a task can call update() once per
+    page without writing to the console once per page. Each progress update
+    or warning that is reported is passed to the logger (progress at INFO
+    level, warnings at WARNING level) and to any callbacks as a dict so that
+    batch runners can consume progress programmatically.
+
+    Event dicts contain the keys 'kind' ('progress', 'warning' or 'info'),
+    'task', 'message', 'done', 'total', 'percent' and 'elapsed' (seconds
+    since start() was called) plus any other fields passed with the event.
+
+    Attributes
+    ----------
+    task : str
+        name of the current task
+    done : int
+        units of work completed in the current task
+    total : int
+        units of work in the current task (or None if unknown)
+    callbacks : list
+        functions called with each event dict reported
+    logger : logging.Logger
+        logger that events are passed to (or None to not log)
+    min_interval : float
+        minimum seconds between progress updates
+    min_percent : float
+        minimum change in percent complete between progress updates
+
+    Methods
+    -------
+    start(task, total = None)
+        starts a new task and reports it
+
+    update(done = None, message = 'in progress', **fields)
+        sets (or increments) the work completed and reports progress if
+        enough time and work has passed since the last update
+
+    finish(message = 'completed', **fields)
+        reports the current task as complete
+
+    warning(message, **fields)
+        reports a warning (never throttled)
+
+    info(message, **fields)
+        reports an informational message (never throttled)
+
+    add_callback(callback)
+        adds a function to be called with each event reported
+
+    '''
+
+
+    def __init__(self, callbacks = None, logger = logger, min_interval = 1.0,
+                 min_percent = 1.0):
+
+        '''
+        Parameters
+        ----------
+        callbacks : list
+            functions called with each event dict reported (default = None)
+        logger : logging.Logger
+            logger that events are passed to (default = 'owcurate' logger,
+            None = do not log)
+        min_interval : float
+            minimum seconds between progress updates (default = 1.0)
+        min_percent : float
+            minimum change in percent complete between progress updates
+            (default = 1.0)
+        '''
+
+        self.callbacks = list(callbacks) if callbacks else []
+        self.logger = logger
+        self.min_interval = min_interval
+        self.min_percent = min_percent
+
+        self.task = ''
+        self.done = 0
+        self.total = None
+        self.start_time = time.perf_counter()
+        self.last_time = None            # time of last progress update
+        self.last_percent = None         # percent at last progress update
+
+
+    def add_callback(self, callback):
+
+        '''adds a function to be called with each event reported
+
+        Parameters
+        ----------
+        callback : function
+            called with one argument (event dict)
+        '''
+
+        self.callbacks.append(callback)
+
+
+    def start(self, task, total = None):
+
+        '''starts a new task and reports it
+
+        Parameters
+        ----------
+        task : str
+            name of the task (e.g. file path)
+        total : int
+            units of work in the task (default = None = unknown)
+        '''
+
+        self.task = task
+        self.done = 0
+        self.total = total
+        self.start_time = time.perf_counter()
+        self.last_time = None
+        self.last_percent = None
+
+        self.report('info', 'started')
+
+
+    def update(self, done = None, message = 'in progress', **fields):
+
+        '''sets (or increments) the work completed and reports progress if
+        enough time and work has passed since the last update
+
+        Parameters
+        ----------
+        done : int
+            units of work completed so far (default = None = increment by 1)
+        message : str
+            description of the current step (default = 'in progress')
+        **fields
+            other values to include in the event
+
+        Returns
+        -------
+        bool
+            True if progress was reported
+        '''
+
+        self.done = self.done + 1 if done is None else done
+
+        now = time.perf_counter()
+        percent = self.percent()
+
+        # throttle on time and (if total is known) on work completed
+        if self.last_time is not None:
+
+            if now - self.last_time < self.min_interval:
+                return False
+
+            if (percent is not None and self.last_percent is not None and
+                    percent - self.last_percent < self.min_percent):
+                return False
+
+        self.last_time = now
+        self.last_percent = percent
+
+        self.report('progress', message, **fields)
+
+        return True
+
+
+    def finish(self, message = 'completed', **fields):
+
+        '''reports the current task as complete
+
+        Parameters
+        ----------
+        message : str
+            description of the result (default = 'completed')
+        **fields
+            other values to include in the event
+        '''
+
+        if self.total is not None: self.done = self.total
+
+        self.report('progress', message, **fields)
+
+
+    def warning(self, message, **fields):
+
+        '''reports a warning (never throttled)
+
+        Parameters
+        ----------
+        message : str
+            description of the problem
+        **fields
+            other values to include in the event
+        '''
+
+        self.report('warning', message, **fields)
+
+
+    def info(self, message, **fields):
+
+        '''reports an informational message (never throttled)
+
+        Parameters
+        ----------
+        message : str
+            the message
+        **fields
+            other values to include in the event
+        '''
+
+        self.report('info', message, **fields)
+
+
+    def percent(self):
+
+        '''returns the percent of the current task completed (or None)'''
+
+        if not self.total: return None
+
+        return 100 * self.done / self.total
+
+
+    def report(self, kind, message, **fields):
+
+        '''passes an event to the logger and callbacks
+
+        Parameters
+        ----------
+        kind : str
+            'progress', 'warning' or 'info'
+        message : str
+            description of the event
+        **fields
+            other values to include in the event
+
+        Returns
+        -------
+        dict
+            the event reported
+        '''
+
+        event = {'kind' : kind,
+                 'task' : self.task,
+                 'message' : message,
+                 'done' : self.done,
+                 'total' : self.total,
+                 'percent' : self.percent(),
+                 'elapsed' : time.perf_counter() - self.start_time}
+        event.update(fields)
+
+        if self.logger is not None:
+
+            text = f'{self.task}: {message}' if self.task else message
+
+            if kind == 'progress' and event['percent'] is not None:
+                text += f" ({event['percent']:.1f}%)"
+
+            self.logger.log(logging.WARNING if kind == 'warning'
+                            else logging.INFO, text)
+
+        for callback in self.callbacks:
+            callback(event)
+
+        return event
@@ -0,0 +1,249 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import csv
+import pickle
+import hashlib
+import tempfile
+
+
+# default folder for parsed REDCap indexes
+CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.owcurate', 'redcap')
+
+# indexes already loaded by this process (keyed by absolute csv path)
+loaded_indexes = {}
+
+
+class REDCapIndex:
+
+    '''Class for looking up rows of a REDCap export by subject id.
+
+    The export is parsed once into a dict of rows keyed by subject id and
+    the parsed index is cached on disk so later runs (and other scripts) can
+    load it without parsing the csv again. The cache is rebuilt whenever the
+    size or modification time of the csv changes.
+
+    Attributes
+    ----------
+    csv_path : str
+        path to the REDCap export (.csv)
+    id_field : str
+        name of the subject id column
+    cache_path : str
+        path to the cached index (or None if not cached)
+    fields : list
+        column names of the export
+    rows : dict
+        list of rows (dict of column name and value) for each subject id
+        (REDCap exports have one row per subject per event)
+
+    Methods
+    -------
+    load()
+        loads the index from the cache or parses the csv
+
+    get(subject_id, default = None)
+        returns the rows for a subject id
+
+    subject_ids()
+        returns all subject ids in the export
+
+    '''
+
+
+    def __init__(self, csv_path, id_field = 'subject_id',
+                 cache_folder = CACHE_FOLDER):
+
+        '''
+        Parameters
+        ----------
+        csv_path : str
+            path to the REDCap export (.csv)
+        id_field : str
+            name of the subject id column (default = 'subject_id')
+        cache_folder : str
+            folder where parsed indexes are cached (default = CACHE_FOLDER,
+            None = do not cache)
+        '''
+
+        self.csv_path = os.path.abspath(csv_path)
+        self.id_field = id_field
+        self.fields = []
+        self.rows = {}
+
+        # cache file name is unique to the csv path and id field
+        if cache_folder is None:
+            self.cache_path = None
+        else:
+            key = hashlib.sha1(f'{self.csv_path}|{id_field}'.encode())
+            self.cache_path = os.path.join(
+                cache_folder,
+                os.path.splitext(os.path.basename(csv_path))[0] + '_' +
+                key.hexdigest()[:16] + '.pkl')
+
+
+    def __contains__(self, subject_id):
+
+        return subject_id in self.rows
+
+
+    def __len__(self):
+
+        return len(self.rows)
+
+
+    def load(self):
+
+        '''loads the index from the cache or parses the csv
+
+        The cache is used only if it was built from a csv with the same size
+        and modification time. Otherwise the csv is parsed and the cache is
+        replaced (written to a temporary file and renamed so other processes
+        never read a partial cache).
+
+        Returns
+        -------
+        REDCapIndex
+            self (so index can be created and loaded in one line)
+        '''
+
+        csv_stat = os.stat(self.csv_path)
+        stamp = (csv_stat.st_size, csv_stat.st_mtime_ns)
+
+        # try cached index
+        if self.cache_path is not None and os.path.exists(self.cache_path):
+
+            try:
+                with open(self.cache_path, 'rb') as cache_file:
+                    cached = pickle.load(cache_file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                cached = None
+
+            if cached is not None and cached['stamp'] == stamp:
+                self.fields = cached['fields']
+                self.rows = cached['rows']
+                return self
+
+        # parse csv (utf-8-sig removes the byte order mark REDCap may add)
+        with open(self.csv_path, 'r', newline = '',
+                  encoding = 'utf-8-sig') as csv_file:
+
+            reader = csv.DictReader(csv_file)
+            self.fields = list(reader.fieldnames or [])
+            self.rows = {}
+
+            for row in reader:
+                self.rows.setdefault(row[self.id_field], []).append(row)
+
+        # replace cached index
+        if self.cache_path is not None:
+
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok = True)
+
+            temp_fd, temp_path = tempfile.mkstemp(
+                dir = os.path.dirname(self.cache_path), suffix = '.tmp')
+
+            with os.fdopen(temp_fd, 'wb') as temp_file:
+                pickle.dump({'stamp' : stamp,
+                             'fields' : self.fields,
+                             'rows' : self.rows}, temp_file,
+                            protocol = pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temp_path, self.cache_path)
+
+        return self
+
+
+    def get(self, subject_id, default = None):
+
+        '''returns the rows for a subject id
+
+        Parameters
+        ----------
+        subject_id : str
+            subject id (e.g. 'OND06_SBH_1039')
+        default
+            returned if subject id is not in the export (default = None)
+
+        Returns
+        -------
+        list
+            rows (dict of column name and value) for the subject id
+        '''
+
+        return self.rows.get(subject_id, default)
+
+
+    def subject_ids(self):
+
+        '''returns all subject ids in the export
+
+        Returns
+        -------
+        list
+            subject ids in the order they first appear
+        '''
+
+        return list(self.rows)
+
+
+def load_index(csv_path, id_field = 'subject_id', cache_folder = CACHE_FOLDER):
+
+    '''returns the index of a REDCap export, loading it only once per process
+
+    Parameters
+    ----------
+    csv_path : str
+        path to the REDCap export (.csv)
+    id_field : str
+        name of the subject id column (default = 'subject_id')
+    cache_folder : str
+        folder where parsed indexes are cached (default = CACHE_FOLDER,
+        None = do not cache)
+
+    Returns
+    -------
+    REDCapIndex
+        loaded index
+    '''
+
+    key = (os.path.abspath(csv_path), id_field)
+    csv_stat = os.stat(csv_path)
+    stamp = (csv_stat.st_size, csv_stat.st_mtime_ns)
+
+    # reload if the csv changed since it was loaded
+    if key not in loaded_indexes or loaded_indexes[key][0] != stamp:
+        loaded_indexes[key] = (stamp, REDCapIndex(csv_path, id_field,
+                                                  cache_folder).load())
+
+    return loaded_indexes[key][1]
+
+
+def load_folder(redcap_folder, id_field = 'subject_id',
+                cache_folder = CACHE_FOLDER):
+
+    '''returns the index of each REDCap export (.csv) in a folder
+
+    Parameters
+    ----------
+    redcap_folder : str
+        path to folder of REDCap exports
+    id_field : str
+        name of the subject id column (default = 'subject_id')
+    cache_folder : str
+        folder where parsed indexes are cached (default = CACHE_FOLDER,
+        None = do not cache)
+
+    Returns
+    -------
+    list
+        REDCapIndex of each export sorted by file name
+    '''
+
+    csv_files = sorted(file for file in os.listdir(redcap_folder)
+                       if file.lower().endswith('.csv'))
+
+    return [load_index(os.path.join(redcap_folder, file), id_field,
+                       cache_folder)
+            for file in csv_files]
@@ -0,0 +1,431 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import weakref
+import numpy as np
+
+from owcurate.Python.file.SignalTools import (STEP_SIGNALS, time_grid,
+                                              interpolate)
+from owcurate.Python.file.Progress import ProgressReporter
+
+
+class RecordingFile:
+
+    '''Base class defining the interface shared by device recording files.
+
+    Device specific classes (GENEActivFile, EDFFile) inherit from this class
+    so that code which processes windows of data (pdf summaries, metrics,
+    checks) can be written once and used with any device. Data in each file
+    is stored in fixed size records (pages in GENEActiv .bin files, data
+    records in EDF files) and windows are selected by record number.
+
+    Attributes
+    ----------
+    file_path : str
+        the path to the data file
+    header : dict
+        keys and values from the file header
+    signals : list
+        names of the signals stored in the file
+    sample_rates : dict
+        sample rate (Hz) of each signal
+    record_count : int
+        number of records in the file
+    record_samples : dict
+        number of samples of each signal in one record
+    progress : ProgressReporter
+        reports progress of long running methods and warnings
+    cache : ScratchCache
+        local scratch disk cache that data is read from (or None)
+    read_path : str
+        path data is read from (a local copy of file_path if cache is used)
+
+    Methods
+    -------
+    read()
+        reads the file header (and data if required by the device)
+
+    local_path()
+        returns the path data should be read from
+
+    read_window(signal, start = 1, end = -1, calibrate = True)
+        returns the values of one signal for a window of records
+
+    read_signals(signals = None, start = 1, end = -1, calibrate = True)
+        returns the values of several signals for a window of records
+
+    record_times(start = 1, end = -1)
+        returns the start time of each record in a window
+
+    sample_times(signal, start = 1, end = -1, correct_drift = False)
+        returns the time of each sample of a signal in a window
+
+    correct_times(times)
+        adjusts device clock times for clock drift
+
+    iter_resampled(sample_rate, signals = None, start = 1, end = -1,
+                   correct_drift = False, calibrate = True, chunk_records = 900)
+        yields signals resampled to an exact sample rate one chunk at a time
+
+    resample(sample_rate, signals = None, start = 1, end = -1,
+             correct_drift = False, calibrate = True, chunk_records = 900)
+        returns signals resampled to an exact sample rate
+
+    '''
+
+
+    def __init__(self, file_path, progress = None, cache = None):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the data file
+        progress : ProgressReporter
+            reports progress and warnings (default = None = warnings and
+            throttled progress are passed to the 'owcurate' logger)
+        cache : ScratchCache
+            local scratch disk cache for copies of remote files
+            (default = None = read directly from file_path)
+        '''
+
+        self.file_path = file_path       # path to data file
+        self.header = {}                 # header dictionary
+        self.signals = []                # names of signals in file
+        self.sample_rates = {}           # sample rate of each signal
+        self.record_count = None         # number of records in file
+        self.record_samples = {}         # samples per record of each signal
+
+        # progress and warnings
+        self.progress = (progress if progress is not None
+                         else ProgressReporter())
+
+        # optional local copy
+        self.cache = cache
+        self.read_path = file_path
+
+
+    def read(self):
+
+        '''reads the file header (and data if required by the device)
+
+        Returns
+        -------
+        bool
+            True if file exists and was read, False if file does not exist
+        '''
+
+        raise NotImplementedError
+
+
+    def local_path(self):
+
+        '''returns the path data should be read from
+
+        Returns
+        -------
+        str
+            path to local copy of the file if a cache is used (the file is
+            copied to the cache if needed and pinned until this object is
+            deleted), otherwise file_path
+        '''
+
+        if self.cache is None: return self.file_path
+
+        # copy is pinned while this object exists since it is reopened for
+        # each pass of the data
+        read_path, pin_path = self.cache.pinned_path(self.file_path)
+        if pin_path is not None:
+            weakref.finalize(self, self.cache.unpin, pin_path)
+
+        return read_path
+
+
+    def read_window(self, signal, start = 1, end = -1, calibrate = True):
+
+        '''returns the values of one signal for a window of records
+
+        Parameters
+        ----------
+        signal : str
+            name of the signal (one of the items in signals)
+        start : int
+            first record of window (coerced to be > 0, default = 1)
+        end : int
+            last record of window (coerced to be between start and last
+            record, default = -1 = read all records)
+        calibrate : bool
+            should values be converted to physical units? (default = True)
+
+        Returns
+        -------
+        ndarray
+            one value for each sample of the signal in the window
+        '''
+
+        raise NotImplementedError
+
+
+    def record_times(self, start = 1, end = -1):
+
+        '''returns the start time of each record in a window
+
+        Parameters
+        ----------
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            start time of each record in the window
+        '''
+
+        raise NotImplementedError
+
+
+    def check_window(self, start = 1, end = -1):
+
+        '''coerces start and end records into the range of the file
+
+        Parameters
+        ----------
+        start : int
+            first record of window
+        end : int
+            last record of window (-1 = last record)
+
+        Returns
+        -------
+        tuple
+            coerced (start, end) record numbers
+        '''
+
+        if start < 1: start = 1
+        elif start > self.record_count: start = self.record_count
+
+        if end == -1 or end > self.record_count: end = self.record_count
+        elif end < start: end = start
+
+        return start, end
+
+
+    def read_signals(self, signals = None, start = 1, end = -1,
+                     calibrate = True):
+
+        '''returns the values of several signals for a window of records
+
+        Parameters
+        ----------
+        signals : list
+            names of signals to read (default = None = all signals)
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+        calibrate : bool
+            should values be converted to physical units? (default = True)
+
+        Returns
+        -------
+        dict
+            one ndarray for each signal read
+        '''
+
+        if signals is None: signals = self.signals
+
+        return {signal : self.read_window(signal, start = start, end = end,
+                                          calibrate = calibrate)
+                for signal in signals}
+
+
+    def correct_times(self, times):
+
+        '''adjusts device clock times for clock drift
+
+        Devices that record clock drift override this method, times are
+        returned unchanged by default.
+
+        Parameters
+        ----------
+        times : ndarray (datetime64[us])
+            times from the device clock
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            drift corrected times
+        '''
+
+        return times
+
+
+    def sample_times(self, signal, start = 1, end = -1,
+                     correct_drift = False):
+
+        '''returns the time of each sample of a signal in a window
+
+        Sample times are anchored to the start time of the record that
+        contains them so that gaps between records are preserved.
+
+        Parameters
+        ----------
+        signal : str
+            name of the signal
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+        correct_drift : bool
+            should times be adjusted for clock drift? (default = False)
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            time of each sample of the signal in the window
+        '''
+
+        record_starts = self.record_times(start = start, end = end)
+
+        # offset of each sample from the start of its record
+        samples = self.record_samples[signal]
+        offsets = np.round(np.arange(samples) * 1e6 /
+                           self.sample_rates[signal]).astype('timedelta64[us]')
+
+        times = (record_starts[:, np.newaxis] + offsets).ravel()
+
+        if correct_drift:
+            times = self.correct_times(times)
+
+        return times
+
+
+    def iter_resampled(self, sample_rate, signals = None, start = 1, end = -1,
+                       correct_drift = False, calibrate = True,
+                       chunk_records = 900):
+
+        '''yields signals resampled to an exact sample rate one chunk at a time
+
+        Samples are placed at their record-anchored (and optionally drift
+        corrected) times and linearly interpolated onto an evenly spaced
+        grid that starts at the first sample of the window. Signals in
+        STEP_SIGNALS hold their previous value. Grid times in a gap between
+        samples longer than 1.5 sample periods (e.g. a discontinuity
+        between records) are set to nan. Each chunk of records is read
+        and interpolated separately (with the following record to
+        interpolate across the chunk edge) so memory use is bounded by the
+        chunk size.
+
+        Parameters
+        ----------
+        sample_rate : float
+            target sample rate (Hz)
+        signals : list
+            names of signals to resample (default = None = all signals)
+        start : int
+            first record of window (default = 1)
+        end : int
+            last record of window (default = -1 = last record)
+        correct_drift : bool
+            should times be adjusted for clock drift? (default = False)
+        calibrate : bool
+            should values be converted to physical units? (default = True)
+        chunk_records : int
+            number of records read at a time (default = 900)
+
+        Yields
+        ------
+        tuple
+            grid times (ndarray (datetime64[us])) and resampled signals
+            (dict of ndarray)
+        '''
+
+        if signals is None: signals = self.signals
+
+        start, end = self.check_window(start, end)
+
+        # record start times (and end of last record) for the window
+        signal = self.signals[0]
+        record_duration = np.timedelta64(
+            int(round(self.record_samples[signal] * 1e6 /
+                      self.sample_rates[signal])), 'us')
+        record_starts = self.record_times(start = start, end = end)
+        record_starts = np.append(record_starts,
+                                  record_starts[-1] + record_duration)
+
+        if correct_drift:
+            record_starts = self.correct_times(record_starts)
+
+        # grid index of the first grid time at or after each record start
+        elapsed = (record_starts - record_starts[0]).astype(np.int64) / 1e6
+        record_grid = np.ceil(np.round(elapsed * sample_rate, 6)).astype(int)
+
+        for chunk_start in range(start, end + 1, chunk_records):
+
+            chunk_end = min(chunk_start + chunk_records - 1, end)
+
+            first = record_grid[chunk_start - start]
+            count = record_grid[chunk_end - start + 1] - first
+
+            if count < 1: continue
+
+            grid_times = time_grid(record_starts[0], sample_rate, count,
+                                   first = first)
+
+            # include the next record to interpolate across chunk edge
+            read_end = min(chunk_end + 1, end)
+
+            data = self.read_signals(signals, start = chunk_start,
+                                     end = read_end, calibrate = calibrate)
+
+            resampled = {}
+
+            for signal in signals:
+
+                times = self.sample_times(signal, start = chunk_start,
+                                          end = read_end,
+                                          correct_drift = correct_drift)
+
+                method = 'previous' if signal in STEP_SIGNALS else 'linear'
+
+                # grid times in gaps between records are not interpolated
+                # (allowing for jitter in sample times)
+                max_gap = 1.5 / self.sample_rates[signal]
+
+                resampled[signal] = interpolate(times, data[signal],
+                                                grid_times, method = method,
+                                                max_gap = max_gap,
+                                                fill_edges = True)
+
+            yield grid_times, resampled
+
+
+    def resample(self, sample_rate, signals = None, start = 1, end = -1,
+                 correct_drift = False, calibrate = True, chunk_records = 900):
+
+        '''returns signals resampled to an exact sample rate
+
+        See iter_resampled for parameters.
+
+        Returns
+        -------
+        dict
+            grid times ('time') and one ndarray for each resampled signal
+        '''
+
+        chunks = list(self.iter_resampled(sample_rate, signals = signals,
+                                          start = start, end = end,
+                                          correct_drift = correct_drift,
+                                          calibrate = calibrate,
+                                          chunk_records = chunk_records))
+
+        resampled = {'time' : np.concatenate([times for times, data
+                                              in chunks])}
+
+        for signal in chunks[0][1]:
+            resampled[signal] = np.concatenate([data[signal] for times, data
+                                                in chunks])
+
+        return resampled
@@ -0,0 +1,289 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import glob
+import shutil
+import hashlib
+import tempfile
+
+
+class ScratchCache:
+
+    '''Class for keeping local copies of remote data files on scratch disk.
+
+    Files are copied from a (slow) network share to a local cache folder the
+    first time they are used and the local copy is used after that. Copies
+    are keyed on the path, size and modification time of the remote file so
+    a changed file is copied again. When the cache is larger than max_bytes
+    the least recently used copies are deleted.
+
+    Several worker processes can share one cache folder: copies are written
+    to a temporary file and renamed into place so a partial copy is never
+    used, and copies deleted by another process are copied again. Copies
+    that are being read are pinned (see pinned_path) with a pin file next to
+    the copy and are not deleted until every pin is removed, so a reader
+    that reopens its copy (e.g. to stream pages) never finds it deleted.
+    Pins left by processes that no longer exist are removed.
+
+    Attributes
+    ----------
+    cache_folder : str
+        path to local folder where copies are stored
+    max_bytes : int
+        maximum total size of copies in the cache
+
+    Methods
+    -------
+    local_path(file_path)
+        returns the path to a local copy of a file (copying it if needed)
+
+    pinned_path(file_path)
+        returns the path to a local copy of a file and pins the copy
+
+    unpin(pin_path)
+        removes a pin so the copy can be deleted
+
+    evict(keep = None)
+        deletes least recently used copies until the cache fits in max_bytes
+
+    '''
+
+
+    def __init__(self, cache_folder, max_bytes = 50e9):
+
+        '''
+        Parameters
+        ----------
+        cache_folder : str
+            path to local folder where copies are stored (created if it does
+            not exist)
+        max_bytes : int
+            maximum total size of copies in the cache (default = 50e9)
+        '''
+
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.cache_folder, exist_ok = True)
+
+
+    def copy_path(self, file_path):
+
+        '''returns the path of the local copy of a file in the cache
+
+        Parameters
+        ----------
+        file_path : str
+            path to the remote file
+
+        Returns
+        -------
+        str
+            path the copy is stored at (None if the file does not exist)
+        '''
+
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        # copy is keyed on path, size and modification time
+        key = hashlib.sha1(f'{os.path.abspath(file_path)}|{file_stat.st_size}|'
+                           f'{file_stat.st_mtime_ns}'.encode()).hexdigest()
+
+        return os.path.join(self.cache_folder,
+                            key[:16] + '_' + os.path.basename(file_path))
+
+
+    def local_path(self, file_path):
+
+        '''returns the path to a local copy of a file (copying it if needed)
+
+        Parameters
+        ----------
+        file_path : str
+            path to the remote file
+
+        Returns
+        -------
+        str
+            path to the local copy (or file_path if the file does not exist)
+        '''
+
+        cache_path = self.copy_path(file_path)
+        if cache_path is None: return file_path
+
+        # mark existing copy as recently used
+        try:
+            os.utime(cache_path)
+            return cache_path
+        except FileNotFoundError:
+            pass
+
+        # copy to temporary file and rename into place
+        temp_fd, temp_path = tempfile.mkstemp(dir = self.cache_folder,
+                                              suffix = '.tmp')
+
+        try:
+            with os.fdopen(temp_fd, 'wb') as temp_file, \
+                 open(file_path, 'rb') as remote_file:
+                shutil.copyfileobj(remote_file, temp_file, 16 * 1024 * 1024)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        self.evict(keep = cache_path)
+
+        return cache_path
+
+
+    def pinned_path(self, file_path):
+
+        '''returns the path to a local copy of a file and pins the copy
+
+        The copy is pinned before it is looked up or copied so no other
+        process can delete it in between. The copy is not deleted by evict
+        until the pin is removed with unpin (or the process ends).
+
+        Parameters
+        ----------
+        file_path : str
+            path to the remote file
+
+        Returns
+        -------
+        local_path : str
+            path to the local copy (or file_path if the file does not exist)
+        pin_path : str
+            path to the pin file (None if the file does not exist)
+        '''
+
+        cache_path = self.copy_path(file_path)
+        if cache_path is None: return file_path, None
+
+        # pin file name holds the process id to find pins left by a crash
+        pin_fd, pin_path = tempfile.mkstemp(
+            dir = self.cache_folder, suffix = '.pin',
+            prefix = f'{os.path.basename(cache_path)}.{os.getpid()}.')
+        os.close(pin_fd)
+
+        try:
+            return self.local_path(file_path), pin_path
+        except BaseException:
+            self.unpin(pin_path)
+            raise
+
+
+    def unpin(self, pin_path):
+
+        '''removes a pin so the copy can be deleted
+
+        Parameters
+        ----------
+        pin_path : str
+            path to the pin file (returned by pinned_path)
+
+        Returns
+        -------
+        None
+        '''
+
+        try:
+            os.remove(pin_path)
+        except FileNotFoundError:
+            pass
+
+
+    def is_pinned(self, cache_path):
+
+        '''returns whether a copy is pinned by a running process
+
+        Pins of processes that no longer exist are removed (processes are
+        only checked on POSIX systems, elsewhere every pin is kept).
+
+        Parameters
+        ----------
+        cache_path : str
+            path to the copy
+
+        Returns
+        -------
+        bool
+            True if the copy has a pin
+        '''
+
+        pinned = False
+
+        for pin_path in glob.glob(glob.escape(cache_path) + '.*.pin'):
+
+            pid = os.path.basename(pin_path)[
+                len(os.path.basename(cache_path)) + 1:].split('.')[0]
+
+            if os.name == 'posix' and pid.isdigit():
+                try:
+                    os.kill(int(pid), 0)
+                except ProcessLookupError:
+                    self.unpin(pin_path)
+                    continue
+                except PermissionError:
+                    pass
+
+            pinned = True
+
+        return pinned
+
+
+    def evict(self, keep = None):
+
+        '''deletes least recently used copies until the cache fits in
+        max_bytes
+
+        Pinned copies are not deleted (see pinned_path).
+
+        Parameters
+        ----------
+        keep : str
+            path to a copy that should not be deleted (default = None)
+
+        Returns
+        -------
+        int
+            number of copies deleted
+        '''
+
+        copies = []
+
+        for entry in os.scandir(self.cache_folder):
+
+            # skip copies in progress and pins
+            if entry.name.endswith(('.tmp', '.pin')): continue
+
+            try:
+                entry_stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            copies.append((entry_stat.st_mtime, entry_stat.st_size,
+                           entry.path))
+
+        total_bytes = sum(copy[1] for copy in copies)
+        deleted = 0
+
+        # delete oldest copies first
+        for mtime, size, path in sorted(copies):
+
+            if total_bytes <= self.max_bytes: break
+            if path == keep or self.is_pinned(path): continue
+
+            # copy may have been deleted by another process
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= size
+
+        return deleted
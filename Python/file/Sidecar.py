@@ -0,0 +1,160 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import pickle
+import tempfile
+
+
+# extension added to the data file name to name its sidecar file
+SIDECAR_EXTENSION = '.owc'
+
+
+class Sidecar:
+
+    '''Class for caching values calculated from a data file in a sidecar
+    file.
+
+    Values that take a pass over a whole recording to calculate (e.g.
+    button events or calibration coefficients) are stored by key in one
+    sidecar file per data file so they are only calculated once. Stored
+    values are used only if the data file has the same size and
+    modification time as when they were stored, otherwise they are
+    discarded. The sidecar is written to a temporary file and renamed so
+    other processes never read a partial sidecar, and values that cannot be
+    stored (e.g. the data folder is read-only) are simply not cached.
+
+    Attributes
+    ----------
+    file_path : str
+        path to the data file
+    sidecar_path : str
+        path to the sidecar file
+
+    Methods
+    -------
+    load()
+        returns all values stored for the current data file
+
+    get(key, default = None)
+        returns a stored value
+
+    set(key, value)
+        stores a value
+
+    '''
+
+
+    def __init__(self, file_path, sidecar_folder = None):
+
+        '''
+        Parameters
+        ----------
+        file_path : str
+            path to the data file
+        sidecar_folder : str
+            folder where the sidecar file is stored (default = None = the
+            folder of the data file)
+        '''
+
+        self.file_path = file_path
+
+        if sidecar_folder is None:
+            sidecar_folder = os.path.dirname(os.path.abspath(file_path))
+
+        self.sidecar_path = os.path.join(
+            sidecar_folder, os.path.basename(file_path) + SIDECAR_EXTENSION)
+
+
+    def stamp(self):
+
+        '''returns the size and modification time of the data file'''
+
+        file_stat = os.stat(self.file_path)
+
+        return (file_stat.st_size, file_stat.st_mtime_ns)
+
+
+    def load(self):
+
+        '''returns all values stored for the current data file
+
+        Returns
+        -------
+        dict
+            stored values by key (empty if there is no sidecar or the data
+            file changed since values were stored)
+        '''
+
+        try:
+            with open(self.sidecar_path, 'rb') as sidecar_file:
+                stored = pickle.load(sidecar_file)
+            stamp = self.stamp()
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+        if stored.get('stamp') != stamp: return {}
+
+        return stored['values']
+
+
+    def get(self, key, default = None):
+
+        '''returns a stored value
+
+        Parameters
+        ----------
+        key : str
+            name of the value
+        default
+            returned if no value is stored (default = None)
+
+        Returns
+        -------
+        object
+            stored value or default
+        '''
+
+        return self.load().get(key, default)
+
+
+    def set(self, key, value):
+
+        '''stores a value (replacing any value stored with the same key)
+
+        Parameters
+        ----------
+        key : str
+            name of the value
+        value : object
+            value to store (must be picklable)
+
+        Returns
+        -------
+        bool
+            True if the value was stored, False if the sidecar could not be
+            written
+        '''
+
+        values = self.load()
+        values[key] = value
+
+        try:
+
+            stamp = self.stamp()
+            temp_fd, temp_path = tempfile.mkstemp(
+                dir = os.path.dirname(self.sidecar_path), suffix = '.tmp')
+
+        except OSError:
+            return False
+
+        try:
+            with os.fdopen(temp_fd, 'wb') as temp_file:
+                pickle.dump({'stamp' : stamp, 'values' : values}, temp_file,
+                            protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.sidecar_path)
+        except OSError:
+            os.remove(temp_path)
+            return False
+
+        return True
@@ -0,0 +1,605 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import numpy as np
+
+
+# signals that hold their value between samples (not interpolated)
+STEP_SIGNALS = ['button']
+
+
+def time_grid(start_time, sample_rate, count, first = 0):
+
+    '''creates evenly spaced sample times
+
+    Parameters
+    ----------
+    start_time : datetime64
+        time of sample 0 of the grid
+    sample_rate : float
+        sample rate of the grid (Hz)
+    count : int
+        number of sample times to create
+    first : int
+        index of the first sample time to create (default = 0)
+
+    Returns
+    -------
+    ndarray (datetime64[us])
+        sample times first to first + count - 1 of the grid
+    '''
+
+    offsets = np.round(np.arange(first, first + count) * 1e6 /
+                       sample_rate).astype('timedelta64[us]')
+
+    return np.datetime64(start_time, 'us') + offsets
+
+
+def interpolate(times, values, grid_times, method = 'linear', max_gap = None,
+                fill_edges = False):
+
+    '''interpolates irregularly timed samples onto new sample times
+
+    Parameters
+    ----------
+    times : ndarray (datetime64[us])
+        time of each sample (increasing)
+    values : ndarray
+        value of each sample
+    grid_times : ndarray (datetime64[us])
+        times at which to interpolate values
+    method : str
+        'linear' interpolation or 'previous' sample value (for step
+        signals such as button presses) (default = 'linear')
+    max_gap : float
+        longest gap between samples (seconds) to interpolate across, grid
+        times in longer gaps are set to nan (default = None = interpolate
+        across all gaps)
+    fill_edges : bool
+        should grid times before the first or after the last sample take
+        the value of that sample? otherwise they are set to nan
+        (default = False)
+
+    Returns
+    -------
+    ndarray
+        interpolated value at each grid time
+    '''
+
+    # convert times to seconds relative to the first grid time
+    origin = grid_times[0]
+    x = (times - origin).astype(np.int64) / 1e6
+    grid_x = (grid_times - origin).astype(np.int64) / 1e6
+
+    if method == 'previous':
+        index = np.searchsorted(x, grid_x, side = 'right') - 1
+        grid_values = np.asarray(values, dtype = float)[index.clip(0)]
+    else:
+        grid_values = np.interp(grid_x, x, values)
+
+    # grid times outside of samples or in gaps between samples
+    outside = np.zeros(len(grid_x), dtype = bool)
+
+    if not fill_edges:
+        outside |= (grid_x < x[0]) | (grid_x > x[-1])
+
+    if max_gap is not None:
+        after = np.searchsorted(x, grid_x, side = 'left').clip(1, len(x) - 1)
+        outside |= (((x[after] - x[after - 1]) > max_gap) &
+                    (x[after] != grid_x))
+
+    grid_values[outside] = np.nan
+
+    return grid_values
+
+
+def lowpass_taps(cutoff, taps):
+
+    '''designs a linear phase low-pass FIR filter (Hamming windowed sinc)
+
+    Parameters
+    ----------
+    cutoff : float
+        cutoff frequency as a fraction of the sample rate (0 to 0.5)
+    taps : int
+        number of filter coefficients (odd)
+
+    Returns
+    -------
+    ndarray
+        filter coefficients (normalized to unity gain at 0 Hz)
+    '''
+
+    n = np.arange(taps) - (taps - 1) / 2
+    coefficients = np.sinc(2 * cutoff * n) * np.hamming(taps)
+
+    return coefficients / coefficients.sum()
+
+
+class FIRDecimator:
+
+    '''Class for low-pass filtering and decimating a signal one chunk at a
+    time.
+
+    Output sample k is the filtered value at input sample k * factor (the
+    same samples kept by taking every factor-th sample) so the output is
+    aligned with a simple stride. Input samples needed by the filter are
+    carried between chunks so the result does not depend on how the signal
+    is split into chunks. The signal is extended with its first and last
+    values at the start and end.
+
+    Attributes
+    ----------
+    factor : int
+        decimation factor
+    coefficients : ndarray
+        FIR filter coefficients
+
+    Methods
+    -------
+    process(values, final = False)
+        filters and decimates the next chunk of the signal
+
+    '''
+
+
+    def __init__(self, factor, taps = None):
+
+        '''
+        Parameters
+        ----------
+        factor : int
+            decimation factor
+        taps : int
+            number of filter coefficients (default = None = 20 * factor + 1)
+        '''
+
+        if taps is None: taps = 20 * factor + 1
+
+        self.factor = factor
+        self.coefficients = lowpass_taps(0.5 / factor, taps)
+
+        self.half = (taps - 1) // 2      # samples needed on either side
+        self.buffer = None               # input samples carried over
+        self.buffer_start = None         # input index of first buffer sample
+        self.next_center = 0             # input index of next output sample
+
+
+    def process(self, values, final = False):
+
+        '''filters and decimates the next chunk of the signal
+
+        Parameters
+        ----------
+        values : ndarray
+            next chunk of input samples
+        final : bool
+            is this the last chunk of the signal? (default = False)
+
+        Returns
+        -------
+        ndarray
+            decimated samples that can be calculated from input so far
+        '''
+
+        values = np.asarray(values, dtype = float)
+
+        # extend start of signal with first value
+        if self.buffer is None:
+            self.buffer = np.full(self.half, values[0])
+            self.buffer_start = -self.half
+
+        samples = np.concatenate([self.buffer, values])
+
+        # extend end of signal with last value
+        if final:
+            samples = np.concatenate([samples,
+                                      np.full(self.half, samples[-1])])
+
+        samples_end = self.buffer_start + len(samples)
+
+        # input indices of output samples with enough input to filter
+        centers = np.arange(self.next_center, samples_end - self.half,
+                            self.factor)
+
+        # wait for more input if no output samples can be calculated
+        if not len(centers):
+            self.buffer = samples
+            return np.empty(0)
+
+        windows = np.lib.stride_tricks.sliding_window_view(
+            samples, len(self.coefficients))
+        decimated = (windows[centers - self.half - self.buffer_start] @
+                     self.coefficients[::-1])
+
+        # carry over samples needed for following outputs
+        self.next_center = centers[-1] + self.factor
+        keep_start = self.next_center - self.half
+        self.buffer = samples[keep_start - self.buffer_start:]
+        self.buffer_start = keep_start
+
+        return decimated
+
+
+class RepeatedValues:
+
+    '''Class for a signal sampled once per record viewed at the sample rate
+    of another signal.
+
+    Only one value per record is stored. Values are repeated for each
+    sample of the record when the object is indexed, iterated or converted
+    to an ndarray (np.asarray) so a full length array is only created when
+    it is needed (e.g. GENEActiv temperature is stored once per page but
+    viewed alongside the 300 measurements of each page).
+
+    Attributes
+    ----------
+    values : ndarray
+        one value per record
+    repeats : int
+        number of samples per record
+
+    '''
+
+
+    def __init__(self, values, repeats):
+
+        '''
+        Parameters
+        ----------
+        values : ndarray
+            one value per record
+        repeats : int
+            number of samples per record
+        '''
+
+        self.values = np.asarray(values)
+        self.repeats = int(repeats)
+
+
+    def __len__(self):
+
+        return len(self.values) * self.repeats
+
+
+    def __getitem__(self, index):
+
+        # map sample indices to record indices
+        if isinstance(index, slice):
+            samples = range(len(self))[index]
+            index = np.arange(samples.start, samples.stop, samples.step)
+        elif isinstance(index, (int, np.integer)):
+            index = range(len(self))[index]
+        else:
+            index = np.asarray(index)
+            index = np.where(index < 0, index + len(self), index)
+
+        return self.values[index // self.repeats]
+
+
+    def __iter__(self):
+
+        for value in self.values:
+            for repeat in range(self.repeats):
+                yield value
+
+
+    def __array__(self, dtype = None, copy = None):
+
+        values = np.repeat(self.values, self.repeats)
+
+        return values if dtype is None else values.astype(dtype)
+
+
+    def tolist(self):
+
+        '''returns the repeated values as a list'''
+
+        return np.repeat(self.values, self.repeats).tolist()
+
+
+class TimeBins:
+
+    '''Class for accumulating the minimum, maximum, sum and count of signals
+    in fixed length time bins one chunk at a time.
+
+    Bins are counted from origin (by default midnight before the first
+    sample with a time) so bin k covers origin + k * bin_seconds to origin + (k + 1) *
+    bin_seconds. Each chunk is reduced over runs of samples in the same bin
+    (times may jump forwards or backwards between runs) so each sample is
+    only visited once and the full recording is never held in memory. Bins
+    with no samples have a count of zero and NaN minimum, maximum and mean.
+
+    Attributes
+    ----------
+    bin_seconds : float
+        length of each bin in seconds
+    origin : datetime64[us]
+        start time of bin 0
+    counts : ndarray
+        number of samples in each bin
+    stats : dict
+        'min', 'max' and 'sum' ndarray (one value per bin) of each signal
+
+    Methods
+    -------
+    add(times, values)
+        adds a chunk of samples to the bins
+
+    bin_times()
+        returns the start time of each bin
+
+    get(signal, stat)
+        returns 'min', 'max', 'sum' or 'mean' of a signal in each bin
+
+    combine(factor)
+        returns bins combining each factor consecutive bins
+
+    '''
+
+
+    def __init__(self, bin_seconds = 60, origin = None):
+
+        '''
+        Parameters
+        ----------
+        bin_seconds : float
+            length of each bin in seconds (default = 60)
+        origin : datetime64
+            start time of bin 0 (default = None = midnight before the first
+            sample added)
+        '''
+
+        self.bin_seconds = bin_seconds
+        self.bin_width = np.timedelta64(int(round(bin_seconds * 1e6)), 'us')
+        self.origin = (None if origin is None else
+                       np.datetime64(origin, 'us'))
+
+        self.size = 0                     # number of bins used
+        self.counts = np.zeros(0, dtype = np.int64)
+        self.stats = {}
+
+
+    def grow(self, size):
+
+        '''allocates space for at least size bins (doubling capacity)'''
+
+        if size <= len(self.counts): return
+
+        capacity = max(size, 2 * len(self.counts))
+        fill = {'min' : np.inf, 'max' : -np.inf, 'sum' : 0}
+
+        self.counts = np.concatenate(
+            [self.counts, np.zeros(capacity - len(self.counts), np.int64)])
+
+        for stats in self.stats.values():
+            for stat, values in stats.items():
+                stats[stat] = np.concatenate(
+                    [values, np.full(capacity - len(values), fill[stat])])
+
+
+    def add(self, times, values):
+
+        '''adds a chunk of samples to the bins
+
+        Parameters
+        ----------
+        times : ndarray (datetime64)
+            time of each sample
+        values : dict
+            ndarray of values of each signal (same length as times);
+            signals should be the same in each chunk
+
+        Returns
+        -------
+        None
+        '''
+
+        times = np.asarray(times, dtype = 'datetime64[us]')
+        valid = ~np.isnat(times)
+        if not valid.any(): return
+
+        if self.origin is None:
+            self.origin = times[valid][0].astype('datetime64[D]').astype(
+                'datetime64[us]')
+
+        # bin of each sample (samples before origin or without a time are
+        # dropped)
+        with np.errstate(invalid = 'ignore'):
+            bins = (times - self.origin) // self.bin_width
+        keep = valid & (bins >= 0)
+        if not keep.all():
+            bins = bins[keep]
+            values = {signal : np.asarray(signal_values)[keep]
+                      for signal, signal_values in values.items()}
+            if not len(bins): return
+
+        # runs of consecutive samples in the same bin
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+        run_bins = bins[starts]
+
+        self.grow(int(run_bins.max()) + 1)
+        self.size = max(self.size, int(run_bins.max()) + 1)
+
+        np.add.at(self.counts, run_bins,
+                  np.diff(np.append(starts, len(bins))))
+
+        for signal, signal_values in values.items():
+
+            if signal not in self.stats:
+                self.stats[signal] = {
+                    'min' : np.full(len(self.counts), np.inf),
+                    'max' : np.full(len(self.counts), -np.inf),
+                    'sum' : np.zeros(len(self.counts))}
+
+            stats = self.stats[signal]
+            signal_values = np.asarray(signal_values, dtype = float)
+
+            np.minimum.at(stats['min'], run_bins,
+                          np.minimum.reduceat(signal_values, starts))
+            np.maximum.at(stats['max'], run_bins,
+                          np.maximum.reduceat(signal_values, starts))
+            np.add.at(stats['sum'], run_bins,
+                      np.add.reduceat(signal_values, starts))
+
+
+    def bin_times(self):
+
+        '''returns the start time of each bin
+
+        Returns
+        -------
+        ndarray (datetime64[us])
+            start time of each bin
+        '''
+
+        if self.origin is None: return np.empty(0, dtype = 'datetime64[us]')
+
+        return self.origin + np.arange(self.size) * self.bin_width
+
+
+    def get(self, signal, stat):
+
+        '''returns 'min', 'max', 'sum' or 'mean' of a signal in each bin
+
+        Parameters
+        ----------
+        signal : str
+            name of signal
+        stat : str
+            'min', 'max', 'sum' or 'mean'
+
+        Returns
+        -------
+        ndarray
+            value of stat in each bin (NaN for min, max and mean of bins
+            with no samples)
+        '''
+
+        counts = self.counts[:self.size]
+
+        if stat == 'mean':
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                return np.where(counts > 0, self.stats[signal]['sum']
+                                [:self.size] / counts, np.nan)
+
+        values = self.stats[signal][stat][:self.size]
+
+        return values if stat == 'sum' else np.where(counts > 0, values,
+                                                     np.nan)
+
+
+    def combine(self, factor):
+
+        '''returns bins combining each factor consecutive bins
+
+        Parameters
+        ----------
+        factor : int
+            number of bins combined into each new bin (e.g. 60 to combine
+            minutes into hours)
+
+        Returns
+        -------
+        TimeBins
+            bins of bin_seconds * factor from the same origin
+        '''
+
+        combined = TimeBins(self.bin_seconds * factor, self.origin)
+        combined.size = -(-self.size // factor)
+
+        # pad to a whole number of new bins and reduce each row
+        padded = combined.size * factor
+        self.grow(padded)
+
+        combined.counts = self.counts[:padded].reshape(-1, factor).sum(1)
+
+        for signal, stats in self.stats.items():
+            combined.stats[signal] = {
+                'min' : stats['min'][:padded].reshape(-1, factor).min(1),
+                'max' : stats['max'][:padded].reshape(-1, factor).max(1),
+                'sum' : stats['sum'][:padded].reshape(-1, factor).sum(1)}
+
+        return combined
+
+
+def sphere_calibration(points, max_iterations = 1000, tolerance = 1e-10,
+                       max_weight = 100):
+
+    '''fits an offset and scale of each accelerometer axis so that points
+    measured while the device was still lie on the unit sphere
+
+    Each iteration scales the points with the current offsets and scales,
+    projects them onto the unit sphere and fits a weighted linear
+    regression of the projected values on the scaled values of each axis
+    (all axes at once), which updates that axis's offset and scale. Points
+    far from the sphere are given less weight in the next iteration.
+    Iterations stop when the weighted mean squared distance from the sphere
+    changes by less than tolerance.
+
+    Parameters
+    ----------
+    points : ndarray
+        mean acceleration (g) of each still epoch (epochs, 3)
+    max_iterations : int
+        maximum number of iterations (default = 1000)
+    tolerance : float
+        change in weighted mean squared distance from the sphere at which
+        iterations stop (default = 1e-10)
+    max_weight : float
+        maximum weight of a point (weights are the inverse of the distance
+        from the sphere, default = 100)
+
+    Returns
+    -------
+    offset : ndarray
+        value added to each axis before scaling (g)
+    scale : ndarray
+        factor each axis is multiplied by after the offset is added
+    error_before : float
+        mean distance of points from the unit sphere (g) before calibration
+    error_after : float
+        mean distance of points from the unit sphere (g) after calibration
+    '''
+
+    points = np.asarray(points, dtype = float)
+
+    offset = np.zeros(points.shape[1])
+    scale = np.ones(points.shape[1])
+    weights = np.ones(len(points))
+    previous = np.inf
+
+    for iteration in range(max_iterations):
+
+        current = (points + offset) * scale
+        closest = current / np.linalg.norm(current, axis = 1, keepdims = True)
+
+        # weighted least squares fit of closest = intercept + slope * current
+        weight_sum = weights.sum()
+        current_mean = weights @ current / weight_sum
+        closest_mean = weights @ closest / weight_sum
+        current_dev = current - current_mean
+
+        slope = ((weights @ (current_dev * (closest - closest_mean))) /
+                 (weights @ (current_dev * current_dev)))
+        intercept = closest_mean - slope * current_mean
+
+        offset += intercept / (scale * slope)
+        scale *= slope
+
+        # distance of recalibrated points from their projections
+        current = (points + offset) * scale
+        distance = np.linalg.norm(current - closest, axis = 1)
+        residual = weights @ (distance * distance) / weight_sum
+
+        with np.errstate(divide = 'ignore'):
+            weights = np.minimum(1 / distance, max_weight)
+
+        if abs(residual - previous) < tolerance: break
+        previous = residual
+
+    error_before = np.abs(np.linalg.norm(points, axis = 1) - 1).mean()
+    error_after = np.abs(np.linalg.norm((points + offset) * scale,
+                                        axis = 1) - 1).mean()
+
+    return offset, scale, error_before, error_after
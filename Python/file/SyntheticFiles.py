@@ -0,0 +1,351 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+# Functions for writing synthetic GENEActiv .bin and EDF .edf files with known
+# signal content. Every value is a function of its sample number so reference
+# values for any window can be calculated without reading the file, allowing
+# decoders to be verified bit-exact and benchmarked on files of any length.
+
+import datetime as dt
+import numpy as np
+
+from owcurate.Python.file.EDFFile import EDFWriter
+
+
+# default header calibration values
+CALIBRATION = {'x gain' : 25548, 'x offset' : -1089,
+               'y gain' : 25729, 'y offset' : -3264,
+               'z gain' : 25342, 'z offset' : 2224,
+               'Volts' : 300, 'Lux' : 800}
+
+# default start time of synthetic recordings
+START_TIME = dt.datetime(2019, 8, 12, 10)
+
+# default EDF signals (label, sample rate, physical dimension, physical min,
+# physical max) similar to a Bittium Faros recording
+EDF_SIGNALS = [('ECG', 250, 'uV', -32768, 32767),
+               ('Accelerometer_X', 25, 'mg', -4096, 4095),
+               ('Accelerometer_Y', 25, 'mg', -4096, 4095),
+               ('Accelerometer_Z', 25, 'mg', -4096, 4095)]
+
+
+def ga_reference(start, end, frequency = 75):
+
+    '''returns the digital values written to pages start to end of a
+    synthetic GENEActiv .bin file
+
+    Accelerometer values are a sine wave (x), a sequence that cycles through
+    every 12 bit value (y) and a sawtooth (z), light cycles through every 10
+    bit value and the button is pressed at every 1000th measurement.
+    Temperature and battery voltage change from page to page.
+
+    Parameters
+    ----------
+    start : int
+        first page
+    end : int
+        last page
+    frequency : int
+        measurement frequency (Hz) (default = 75)
+
+    Returns
+    -------
+    dict
+        ndarray of digital values for each measurement signal (accel_x,
+        accel_y, accel_z, light, button) and each page signal (temp,
+        battery)
+    '''
+
+    # measurement and page numbers (from 0)
+    n = np.arange((start - 1) * 300, end * 300, dtype = np.int64)
+    page = np.arange(start - 1, end)
+
+    return {'accel_x' : np.round(2047 * np.sin(2 * np.pi * n /
+                                                frequency)).astype(np.int16),
+            'accel_y' : ((n * 1021) % 4096 - 2048).astype(np.int16),
+            'accel_z' : (n % 4096 - 2048).astype(np.int16),
+            'light'   : ((n * 7) % 1024).astype(np.int16),
+            'button'  : (n % 1000 == 0).astype(np.int16),
+            'temp'    : (250 + np.round(100 * np.sin(page / 900))) / 10,
+            'battery' : (420 - page // 1000) / 100}
+
+
+def encode_pages(data):
+
+    '''encodes digital measurement values as hexadecimal page data
+
+    This is the inverse of GENEActivFile.decode_pages.
+
+    Parameters
+    ----------
+    data : dict
+        ndarray of digital values for accel_x, accel_y, accel_z, light and
+        button (a multiple of 300 measurements)
+
+    Returns
+    -------
+    list
+        hexadecimal data line (str) for each page
+    '''
+
+    meas = np.zeros(len(data['accel_x']), dtype = np.uint64)
+
+    # pack signals into 48 bits (accelerometers as 12 bit two's complement)
+    for signal, shift in (('accel_x', 36), ('accel_y', 24), ('accel_z', 12)):
+        meas |= (data[signal].astype(np.int64) & 0xFFF).astype(np.uint64) << \
+            np.uint64(shift)
+    meas |= data['light'].astype(np.uint64) << np.uint64(2)
+    meas |= data['button'].astype(np.uint64) << np.uint64(1)
+
+    # take the last 6 bytes of each measurement as big-endian bytes
+    meas_bytes = meas.astype('>u8').view(np.uint8).reshape(-1, 8)[:, 2:]
+    hex_data = meas_bytes.tobytes().hex().upper()
+
+    return [hex_data[i:i + 3600] for i in range(0, len(hex_data), 3600)]
+
+
+def write_ga_bin(bin_path, pages, frequency = 75, calibration = CALIBRATION,
+                 start_time = START_TIME, clock_drift = 0.0,
+                 chunk_pages = 1000):
+
+    '''writes a synthetic GENEActiv .bin file
+
+    The file has a 59 line header and 10 line pages with the digital values
+    returned by ga_reference. Pages are generated one chunk at a time so
+    files of any length can be written in bounded memory.
+
+    Parameters
+    ----------
+    bin_path : str
+        path to .bin file to create
+    pages : int
+        number of pages (300 measurements each)
+    frequency : int
+        measurement frequency (Hz) (default = 75)
+    calibration : dict
+        gain, offset, Volts and Lux header values (default = CALIBRATION)
+    start_time : datetime
+        time of the first measurement (default = START_TIME)
+    clock_drift : float
+        clock drift (seconds) written to Extract Notes (default = 0.0)
+    chunk_pages : int
+        number of pages generated at a time (default = 1000)
+
+    Returns
+    -------
+    None
+    '''
+
+    def format_time(time):
+        return (time.strftime('%Y-%m-%d %H:%M:%S:') +
+                f'{time.microsecond // 1000:03d}')
+
+    extract_time = start_time + dt.timedelta(seconds = pages * 300 /
+                                             frequency)
+    period_hours = int(np.ceil(pages * 300 / frequency / 3600))
+
+    header = ['Device Identity',
+              'Device Unique Serial Code:000000',
+              'Device Type:GENEActiv',
+              'Device Model:1.1',
+              'Device Firmware:synthetic',
+              'Calibration Date:' + format_time(start_time),
+              '',
+              'Configuration Info',
+              f'Measurement Frequency:{frequency} Hz',
+              f'Measurement Period:{period_hours} Hours',
+              'Start Time:' + format_time(start_time),
+              'Study Centre:',
+              'Study Code:',
+              'Investigator ID:',
+              'Exercise Type:',
+              'Config Operator ID:',
+              'Config Time:' + format_time(start_time),
+              'Config Notes:',
+              'Extract Operator ID:',
+              'Extract Time:' + format_time(extract_time),
+              f'Extract Notes:clock drift {clock_drift}s',
+              '',
+              'Trial Info',
+              'Location Code:LW',
+              'Subject Code:0000',
+              '',
+              'Calibration Data']
+    header += [f'{key}:{value}' for key, value in calibration.items()]
+    header += ['',
+               'Accelerometer Units:g',
+               'Light Meter Units:lux',
+               'Temperature Sensor Units:deg. C',
+               '',
+               'Memory Status']
+    header += [''] * (57 - len(header))
+    header += [f'Number of Pages:{pages}', '']
+
+    with open(bin_path, 'w', encoding = 'utf-8') as bin_file:
+
+        bin_file.write('\n'.join(header) + '\n')
+
+        for chunk_start in range(1, pages + 1, chunk_pages):
+
+            chunk_end = min(chunk_start + chunk_pages - 1, pages)
+
+            data = ga_reference(chunk_start, chunk_end, frequency)
+            hex_lines = encode_pages(data)
+
+            page_lines = []
+
+            for i, hex_line in enumerate(hex_lines):
+
+                sequence = chunk_start - 1 + i
+                page_time = start_time + dt.timedelta(
+                    microseconds = round(sequence * 300 * 1e6 / frequency))
+
+                page_lines += ['Recorded Data',
+                               'Device Unique Serial Code:000000',
+                               f'Sequence Number:{sequence}',
+                               'Page Time:' + format_time(page_time),
+                               'Unassigned',
+                               f"Temperature:{data['temp'][i]:.1f}",
+                               f"Battery voltage:{data['battery'][i]:.2f}",
+                               'Device Status:Recording',
+                               f'Measurement Frequency:{frequency}.0',
+                               hex_line]
+
+            bin_file.write('\n'.join(page_lines) + '\n')
+
+
+def edf_reference(signal_number, samples, start, end):
+
+    '''returns the digital values written to data records start to end of
+    one signal of a synthetic .edf file
+
+    Each signal is a different sequence that cycles through every 16 bit
+    value.
+
+    Parameters
+    ----------
+    signal_number : int
+        position of the signal in the file (from 0)
+    samples : int
+        samples of the signal per data record
+    start : int
+        first data record
+    end : int
+        last data record
+
+    Returns
+    -------
+    ndarray
+        digital values
+    '''
+
+    n = np.arange((start - 1) * samples, end * samples, dtype = np.int64)
+
+    return ((n * (2 * signal_number + 1) * 40503 + signal_number * 9973)
+            % 65536 - 32768).astype(np.int16)
+
+
+def write_edf(edf_path, records, signals = EDF_SIGNALS,
+              record_duration = 1, start_time = START_TIME,
+              chunk_records = 3600):
+
+    '''writes a synthetic EDF .edf file
+
+    Data records contain the digital values returned by edf_reference and
+    are generated one chunk at a time so files of any length can be written
+    in bounded memory.
+
+    Parameters
+    ----------
+    edf_path : str
+        path to .edf file to create
+    records : int
+        number of data records
+    signals : list
+        (label, sample rate, physical dimension, physical min, physical max)
+        of each signal (default = EDF_SIGNALS)
+    record_duration : int
+        duration of each data record in seconds (default = 1)
+    start_time : datetime
+        start date and time of the recording (default = START_TIME)
+    chunk_records : int
+        number of data records generated at a time (default = 3600)
+
+    Returns
+    -------
+    None
+    '''
+
+    labels = [signal[0] for signal in signals]
+    record_samples = [int(signal[1] * record_duration) for signal in signals]
+
+    header = {'version' : 0,
+              'patient_id' : 'X X X X',
+              'recording_id' : 'Startdate ' +
+                               start_time.strftime('%d-%b-%Y').upper() +
+                               ' X X synthetic',
+              'start_date' : start_time.strftime('%d.%m.%y'),
+              'start_time' : start_time.strftime('%H.%M.%S'),
+              'dur_record' : record_duration,
+              'sig_labels' : labels,
+              'sig_phys_dim' : [signal[2] for signal in signals],
+              'sig_phys_min' : [signal[3] for signal in signals],
+              'sig_phys_max' : [signal[4] for signal in signals],
+              'sig_dig_min' : [-32768] * len(signals),
+              'sig_dig_max' : [32767] * len(signals),
+              'sig_record_samples' : record_samples}
+
+    with EDFWriter(edf_path, header) as edf:
+
+        for chunk_start in range(1, records + 1, chunk_records):
+
+            chunk_end = min(chunk_start + chunk_records - 1, records)
+
+            edf.write_records({label : edf_reference(i, samples,
+                                                     chunk_start, chunk_end)
+                               for i, (label, samples)
+                               in enumerate(zip(labels, record_samples))})
+
+
+def verify_file(recording_file, start = 1, end = -1):
+
+    '''compares digital values read from a synthetic file with the
+    reference values
+
+    Parameters
+    ----------
+    recording_file : RecordingFile
+        GENEActivFile or EDFFile object (already read) of a file written by
+        write_ga_bin or write_edf
+    start : int
+        first record to compare (default = 1)
+    end : int
+        last record to compare (default = -1 = last record)
+
+    Returns
+    -------
+    dict
+        number of values that do not match the reference for each signal
+    '''
+
+    start, end = recording_file.check_window(start, end)
+
+    mismatches = {}
+
+    for signal_number, signal in enumerate(recording_file.signals):
+
+        values = recording_file.read_window(signal, start = start, end = end,
+                                            calibrate = False)
+
+        if 'Measurement Frequency' in recording_file.header:
+            frequency = int(recording_file.header['Measurement Frequency']
+                            [:-3])
+            reference = ga_reference(start, end, frequency)[signal]
+        else:
+            reference = edf_reference(signal_number,
+                                      recording_file.record_samples[signal],
+                                      start, end)
+
+        mismatches[signal] = int(np.count_nonzero(values != reference))
+
+    return mismatches
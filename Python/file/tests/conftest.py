@@ -0,0 +1,18 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import sys
+import types
+
+
+# modules are imported as owcurate.Python... (the repository is normally
+# cloned as a folder named owcurate) so the repository is registered as the
+# owcurate package whatever its folder is named
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                         '..', '..', '..'))
+
+if 'owcurate' not in sys.modules:
+    owcurate = types.ModuleType('owcurate')
+    owcurate.__path__ = [REPO_PATH]
+    sys.modules['owcurate'] = owcurate
@@ -0,0 +1,157 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import datetime as dt
+import numpy as np
+import pytest
+
+from owcurate.Python.file.EDFFile import (EDFFile, EDFWriter,
+                                          ANNOTATION_LABEL,
+                                          record_annotations, parse_onsets)
+from owcurate.Python.file.GENEActivFile import (GENEActivFile, MEAS_SIGNALS,
+                                                parse_page_times)
+from owcurate.Python.file.SyntheticFiles import (write_edf, write_ga_bin,
+                                                 ga_reference, verify_file,
+                                                 START_TIME)
+
+
+def edf_plus_header(reserved):
+
+    '''returns the header of an EDF+ file with one data signal (4 samples
+    per 1 s record) and the annotation signal'''
+
+    return {'version' : 0,
+            'patient_id' : 'X X X X',
+            'recording_id' : 'Startdate 12-AUG-2019 X X X',
+            'start_date' : START_TIME.strftime('%d.%m.%y'),
+            'start_time' : START_TIME.strftime('%H.%M.%S'),
+            'reserved' : reserved,
+            'dur_record' : 1,
+            'sig_labels' : ['signal', ANNOTATION_LABEL],
+            'sig_phys_dim' : ['mV', ''],
+            'sig_phys_min' : [-10.0, -1],
+            'sig_phys_max' : [10.0, 1],
+            'sig_dig_min' : [-1000, -32768],
+            'sig_dig_max' : [1000, 32767],
+            'sig_record_samples' : [4, 16]}
+
+
+def test_write_edf_round_trip(tmp_path):
+
+    edf_path = str(tmp_path / 'synthetic.edf')
+    write_edf(edf_path, 30, chunk_records = 7)
+
+    edf_file = EDFFile(edf_path)
+    edf_file.read()
+
+    assert edf_file.record_count == 30
+    assert edf_file.edf_plus is None
+    assert edf_file.start_datetime == START_TIME
+    assert not any(verify_file(edf_file).values())
+
+    record_times = edf_file.record_times()
+    assert record_times[-1] == np.datetime64(START_TIME + dt.timedelta(
+        seconds = 29), 'us')
+
+
+def test_writer_removed_on_error(tmp_path):
+
+    edf_path = str(tmp_path / 'error.edf')
+
+    with pytest.raises(ValueError):
+        with EDFWriter(edf_path, edf_plus_header('EDF+C')):
+            raise ValueError
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_record_annotations():
+
+    onsets = np.array([0, 0.25, 4.5, 86400.123, -3])
+
+    annotations = record_annotations(onsets)
+
+    assert annotations.shape == (5, 16)
+    assert annotations[1].tobytes().startswith(b'+0.25\x14\x14\x00\x00')
+    np.testing.assert_allclose(parse_onsets(annotations), onsets)
+
+
+def test_edf_plus_onsets(tmp_path):
+
+    edf_path = str(tmp_path / 'discontinuous.edf')
+    onsets = np.array([0.25, 1.25, 5.25])
+    values = np.arange(12) * 100
+
+    header = edf_plus_header('EDF+C')
+
+    with EDFWriter(edf_path, header) as edf:
+        edf.write_records({'signal' : values,
+                           ANNOTATION_LABEL : record_annotations(onsets)})
+
+        # reserved field is rewritten when the file is closed
+        edf.header['reserved'] = 'EDF+D'
+
+    edf_file = EDFFile(edf_path)
+    edf_file.read()
+
+    assert edf_file.edf_plus == 'EDF+D'
+    assert edf_file.signals == ['signal']
+    assert edf_file.start_datetime == START_TIME + dt.timedelta(
+        seconds = 0.25)
+
+    np.testing.assert_array_equal(
+        edf_file.record_times(),
+        np.datetime64(START_TIME, 'us') +
+        (onsets * 1e6).astype('timedelta64[us]'))
+    np.testing.assert_allclose(edf_file.record_onsets(2, 3), onsets[1:])
+    np.testing.assert_array_equal(
+        edf_file.read_window('signal', calibrate = False), values)
+    np.testing.assert_allclose(edf_file.read_window('signal'), values / 100)
+
+
+@pytest.mark.parametrize('gap', [0, 4])
+def test_export_edf_round_trip(tmp_path, gap):
+
+    bin_path = str(tmp_path / 'synthetic.bin')
+    start_time = START_TIME + dt.timedelta(seconds = 0.25)
+    write_ga_bin(bin_path, 40, start_time = start_time)
+
+    # pages 20 onwards start gap seconds late
+    if gap:
+        with open(bin_path) as bin_file:
+            text = bin_file.read()
+        for page in range(40, 19, -1):
+            page_time = start_time + dt.timedelta(seconds = 4 * (page - 1))
+            text = text.replace(
+                page_time.strftime('Page Time:%Y-%m-%d %H:%M:%S:%f')[:-3],
+                (page_time + dt.timedelta(seconds = gap)).strftime(
+                    'Page Time:%Y-%m-%d %H:%M:%S:%f')[:-3])
+        with open(bin_path, 'w') as bin_file:
+            bin_file.write(text)
+
+    ga_file = GENEActivFile(bin_path)
+    ga_file.read()
+    edf_path = ga_file.export_edf(str(tmp_path), chunk_pages = 7)
+
+    edf_file = EDFFile(edf_path)
+    edf_file.read()
+
+    assert edf_file.edf_plus == ('EDF+D' if gap else 'EDF+C')
+    assert edf_file.signals == ga_file.signals
+    assert edf_file.start_datetime == start_time
+    assert edf_file.record_count == 40
+
+    page_times = parse_page_times(ga_file.data_packet[3::10])
+    np.testing.assert_array_equal(edf_file.record_times(),
+                                  page_times.astype('datetime64[us]'))
+
+    # digital values are written unchanged
+    reference = ga_reference(1, 40)
+    for signal in MEAS_SIGNALS:
+        np.testing.assert_array_equal(
+            edf_file.read_window(signal, calibrate = False),
+            reference[signal])
+    np.testing.assert_array_equal(
+        edf_file.read_window('temp', calibrate = False),
+        np.round(reference['temp'] * 10))
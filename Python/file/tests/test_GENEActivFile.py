@@ -0,0 +1,65 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import numpy as np
+
+from owcurate.Python.file.GENEActivFile import (GENEActivFile, decode_pages,
+                                                MEAS_SIGNALS)
+from owcurate.Python.file.SyntheticFiles import (ga_reference, encode_pages,
+                                                 write_ga_bin, verify_file)
+
+
+# measurements written by hand (12 hex characters each) and their values
+KNOWN_WORDS = {'000000000000' : (0, 0, 0, 0, 0),
+               'FFF8007FFFFE' : (-1, -2048, 2047, 1023, 1),
+               '0017FF800004' : (1, 2047, -2048, 1, 0),
+               '7FF0000807FC' : (2047, 0, 128, 511, 0)}
+
+
+def test_decode_known_words():
+
+    words = list(KNOWN_WORDS)
+    hex_line = ''.join(words[index % len(words)] for index in range(300))
+
+    data = decode_pages([hex_line, hex_line.lower()])
+
+    expected = np.array([KNOWN_WORDS[words[index % len(words)]]
+                         for index in range(600)])
+
+    for column, signal in enumerate(MEAS_SIGNALS):
+        np.testing.assert_array_equal(data[signal], expected[:, column])
+
+
+def test_decode_encoded_pages():
+
+    reference = ga_reference(1, 20)
+
+    data = decode_pages(encode_pages(reference))
+
+    for signal in MEAS_SIGNALS:
+        np.testing.assert_array_equal(data[signal], reference[signal])
+
+
+def test_decode_into_out():
+
+    reference = ga_reference(3, 4)
+    out = {signal : np.zeros(900, dtype = np.int16)
+           for signal in MEAS_SIGNALS}
+
+    data = decode_pages(encode_pages(reference), out = out)
+
+    for signal in MEAS_SIGNALS:
+        assert np.shares_memory(data[signal], out[signal])
+        np.testing.assert_array_equal(data[signal], reference[signal])
+
+
+def test_read_synthetic_file(tmp_path):
+
+    bin_path = str(tmp_path / 'synthetic.bin')
+    write_ga_bin(bin_path, 50, chunk_pages = 7)
+
+    ga_file = GENEActivFile(bin_path)
+    ga_file.read()
+
+    assert ga_file.pagecount == 50
+    assert not any(verify_file(ga_file).values())
@@ -0,0 +1,123 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import re
+import zlib
+import numpy as np
+import pytest
+
+from owcurate.Python.file.PDFWriter import PDFWriter
+
+
+def parse_pdf(pdf_path):
+
+    '''checks the structure of a pdf file and returns its objects
+
+    The trailer must end with the %%EOF marker, every cross-reference entry
+    must point to its object and every stream must have its stated length
+    and decompress.
+    '''
+
+    with open(pdf_path, 'rb') as pdf_file:
+        data = pdf_file.read()
+
+    assert data.startswith(b'%PDF-1.4\n')
+
+    trailer = re.search(rb'trailer\n<< /Size (\d+) /Root (\d+) 0 R >>\n'
+                        rb'startxref\n(\d+)\n%%EOF\n$', data)
+    assert trailer is not None
+
+    size, root, xref_offset = [int(value) for value in trailer.groups()]
+
+    xref = re.match(rb'xref\n0 (\d+)\n', data[xref_offset:])
+    assert xref is not None and int(xref.group(1)) == size
+
+    entries = xref_offset + xref.end()
+    objects = {}
+
+    for obj_id in range(1, size):
+
+        entry = data[entries + 20 * obj_id : entries + 20 * (obj_id + 1)]
+        assert entry.endswith(b' 00000 n \n')
+
+        offset = int(entry[:10])
+        assert data[offset:].startswith(b'%d 0 obj\n' % obj_id)
+
+        body = data[offset : data.index(b'\nendobj\n', offset)]
+
+        stream = re.search(rb'/Length (\d+) >>\nstream\n', body)
+        if stream is not None:
+            start = offset + stream.end()
+            length = int(stream.group(1))
+            assert data[start + length : start + length + 10] == b'\nendstream'
+            zlib.decompress(data[start : start + length])
+
+        objects[obj_id] = body
+
+    assert b'/Type /Catalog' in objects[root]
+
+    return objects
+
+
+def page_count(objects):
+
+    '''returns the /Count of the page tree'''
+
+    return int(re.search(rb'/Count (\d+)', objects[1]).group(1))
+
+
+def write_pdf(pdf_path):
+
+    '''writes a pdf with text, wrapped text, an image and an inserted page'''
+
+    with PDFWriter(pdf_path) as pdf:
+
+        pdf.add_page()
+        pdf.text('title (with parentheses) \\ and backslash', 10, 16.7,
+                 size = 16, align = 'center')
+        pdf.text_block('\n'.join(f'line {line}' for line in range(100)),
+                       11, 20)
+
+        pdf.add_page()
+        pdf.image(np.zeros((20, 30, 4), dtype = np.uint8), 1, 13)
+
+        pdf.add_page(index = 0)
+        pdf.text('first page', 10, 10)
+
+        return pdf.page_count
+
+
+def test_pdf_parses(tmp_path):
+
+    pdf_path = str(tmp_path / 'test.pdf')
+    pages = write_pdf(pdf_path)
+
+    objects = parse_pdf(pdf_path)
+
+    assert page_count(objects) == pages
+    assert pages > 3
+
+
+def test_pdf_opens_in_pypdf(tmp_path):
+
+    pypdf = pytest.importorskip('pypdf')
+
+    pdf_path = str(tmp_path / 'test.pdf')
+    pages = write_pdf(pdf_path)
+
+    reader = pypdf.PdfReader(pdf_path, strict = True)
+
+    assert len(reader.pages) == pages
+    assert 'first page' in reader.pages[0].extract_text()
+
+
+def test_pdf_removed_on_error(tmp_path):
+
+    pdf_path = tmp_path / 'test.pdf'
+
+    with pytest.raises(ValueError):
+        with PDFWriter(str(pdf_path)) as pdf:
+            pdf.text('text', 10, 10)
+            raise ValueError
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,131 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import datetime as dt
+import numpy as np
+
+from owcurate.Python.file.PageScan import (PageScan, BAD_SEQUENCE,
+                                           BAD_LENGTH, BAD_HEX, BAD_TIME,
+                                           BAD_INTERVAL, PAGE_OK,
+                                           HEADER_LINES, PAGE_LINES,
+                                           find_discontinuities)
+from owcurate.Python.file.SyntheticFiles import write_ga_bin, START_TIME
+
+
+def edit_pages(bin_path, edits):
+
+    '''applies edits to the lines of pages of a .bin file
+
+    edits is a list of (page, line offset within page, function of the
+    line text) with pages numbered from 1
+    '''
+
+    with open(bin_path) as bin_file:
+        lines = bin_file.read().split('\n')
+
+    for page, offset, edit in edits:
+        index = HEADER_LINES + (page - 1) * PAGE_LINES + offset
+        lines[index] = edit(lines[index])
+
+    with open(bin_path, 'w') as bin_file:
+        bin_file.write('\n'.join(lines))
+
+
+def shift_time(seconds):
+
+    '''returns an edit that moves a page time line by seconds'''
+
+    def edit(line):
+        time = dt.datetime.strptime(line[10:], '%Y-%m-%d %H:%M:%S:%f')
+        time += dt.timedelta(seconds = seconds)
+        return 'Page Time:' + time.strftime('%Y-%m-%d %H:%M:%S:%f')[:-3]
+
+    return edit
+
+
+def corrupt_file(bin_path, pages = 30):
+
+    '''writes a synthetic file with one problem of each kind
+
+    page 5 has a character that is not hexadecimal, page 10 a short data
+    line, page 15 no sequence number, page 20 a page time before page 19
+    and pages 25 onwards start 4 seconds late
+    '''
+
+    write_ga_bin(bin_path, pages)
+
+    edit_pages(bin_path,
+               [(5, 9, lambda line: line[:10] + 'G' + line[11:]),
+                (10, 9, lambda line: line[:-12]),
+                (15, 2, lambda line: 'Sequence Number:'),
+                (20, 3, shift_time(-60))] +
+               [(page, 3, shift_time(4)) for page in range(25, pages + 1)])
+
+
+def test_page_flags(tmp_path):
+
+    bin_path = str(tmp_path / 'corrupt.bin')
+    corrupt_file(bin_path)
+
+    scan = PageScan(bin_path)
+    scan.scan()
+
+    expected = np.full(30, PAGE_OK, dtype = np.uint8)
+    expected[[4, 9, 14, 19, 24]] = [BAD_HEX, BAD_LENGTH, BAD_SEQUENCE,
+                                    BAD_TIME, BAD_INTERVAL]
+
+    assert scan.pagecount == 30
+    np.testing.assert_array_equal(scan.status, expected)
+    np.testing.assert_array_equal(scan.decodable(),
+                                  expected & (BAD_HEX | BAD_LENGTH) == 0)
+
+    report = scan.report()
+    assert report['bad_pages'] == 5
+    assert report['pagecount_match']
+
+
+def test_scan_chunks(tmp_path):
+
+    bin_path = str(tmp_path / 'corrupt.bin')
+    corrupt_file(bin_path)
+
+    # pages split across chunks give the same result
+    whole = PageScan(bin_path)
+    whole.scan()
+    chunked = PageScan(bin_path)
+    chunked.scan(chunk_bytes = 1000)
+
+    np.testing.assert_array_equal(chunked.status, whole.status)
+    np.testing.assert_array_equal(chunked.page_times, whole.page_times)
+
+
+def test_discontinuities(tmp_path):
+
+    bin_path = str(tmp_path / 'corrupt.bin')
+    corrupt_file(bin_path)
+
+    scan = PageScan(bin_path)
+    scan.scan()
+
+    # pages 5 and 10 are not decodable so the pages after them (numbered
+    # 5 and 9 of the decodable pages) start a page late, page 20 (18)
+    # is 60 s early and page 21 (19) returns, page 25 (23) is 4 s late
+    discontinuities = scan.discontinuities()
+
+    np.testing.assert_array_equal(discontinuities['page'],
+                                  [5, 9, 18, 19, 23])
+    np.testing.assert_allclose(discontinuities['gap'],
+                               [4, 4, -60, 60, 4])
+
+
+def test_find_discontinuities():
+
+    page_times = (np.datetime64(START_TIME, 'ms') +
+                  np.array([0, 4000, 8020, 16000, 20000, 19000],
+                           dtype = 'timedelta64[ms]'))
+
+    # 20 ms is within the default tolerance
+    discontinuities = find_discontinuities(page_times, 75)
+
+    np.testing.assert_array_equal(discontinuities['page'], [4, 6])
+    np.testing.assert_allclose(discontinuities['gap'], [3.98, -5])
@@ -0,0 +1,46 @@
+# Authors: Kit Beyer
+# Date: October 2019
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                         '..', '..', '..'))
+
+# modules used by header-only tools and worker processes
+READER_MODULES = ['owcurate.Python.file.GENEActivFile',
+                  'owcurate.Python.GENEActiv.GENEActivReader']
+
+# modules that should only be imported when plotting or creating DataFrames
+LAZY_MODULES = ['matplotlib', 'fpdf', 'pandas']
+
+
+def imported_lazy_modules(module):
+
+    '''returns the lazy modules loaded by importing a module in a new
+    interpreter (the repository is registered as the owcurate package as in
+    conftest.py)'''
+
+    code = ('import sys, json, types\n'
+            "owcurate = types.ModuleType('owcurate')\n"
+            f'owcurate.__path__ = [{REPO_PATH!r}]\n'
+            "sys.modules['owcurate'] = owcurate\n"
+            f'import {module}\n'
+            f'print(json.dumps([name for name in {LAZY_MODULES!r} '
+            'if name in sys.modules]))\n')
+
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output = True, text = True, check = True)
+
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize('module', READER_MODULES)
+def test_reader_imports_are_lazy(module):
+
+    assert imported_lazy_modules(module) == []
@@ -5,13 +5,51 @@ sys.path.append('/Users/kbeyer/repos')
 
 import os
 import re
+import logging
 import owcurate.Python.file.GENEActivFile as ga
+from owcurate.Python.file.Instrumentation import StageTimer
+from owcurate.Python.file.Progress import ProgressReporter
+from owcurate.Python.file.Prefetch import Prefetcher, read_file
+from owcurate.Python.file.ScratchCache import ScratchCache
 import time
 from pprint import pprint
 
 # correct clock drift?
 correct_drift = True
 
+# correct accelerometer calibration with still periods? (fitted once per
+# file and stored in a sidecar file)
+autocalibrate = False
+
+# folder for sidecar files (None = next to each bin file, which writes to
+# the bin folder)
+sidecar_folder = None
+
+# check integrity of every page when reading each file? (problems are shown
+# as warnings)
+scan_pages = True
+
+# record time and memory used by each stage of each file as JSON lines?
+# (None = do not record)
+stage_log = None
+
+# record the peak memory of each file in the stage log? (traces memory
+# allocations, which slows processing down; otherwise only the peak of the
+# whole process is recorded)
+trace_memory = False
+
+# number of files read from bin_folder ahead of the file being processed
+# (each is held in memory until it is processed)
+prefetch_files = 1
+
+# keep local copies of bin files in this folder? (None = do not copy)
+scratch_folder = None
+scratch_bytes = 50e9
+
+# display warnings and progress (at most every 10 seconds) from each file
+logging.basicConfig(level = logging.INFO, format = '%(message)s')
+progress = ProgressReporter(min_interval = 10)
+
 # set folder paths
 
 #bin_folder = ('/Volumes/nimbal$/Data/ReMiNDD/Raw data/GENEActiv/')
@@ -47,8 +85,18 @@ print('****** ENSURE COMPUTER DOES NOT SLEEP WHILE SCRIPT IS RUNNING ******\n')
 file_count = 1
 start = time.time()
 
-# loop through bin files
-for bin_path in bin_paths:
+# copy bin files to scratch folder in the background (files are then read
+# from the local copy) or read them into memory in the background
+if scratch_folder is None:
+    cache = None
+    prefetch = read_file
+else:
+    cache = ScratchCache(scratch_folder, scratch_bytes)
+    prefetch = lambda bin_path: cache.local_path(bin_path) and None
+
+# loop through bin files (next files are read in the background)
+for bin_path, contents in Prefetcher(bin_paths, max_files = prefetch_files,
+                                     read_func = prefetch):
 
     print(f'File {file_count}\n',
           '---------------\n',
@@ -56,16 +104,40 @@ for bin_path in bin_paths:
           sep = '')
 
 
+    # file could not be read in the background (read it as usual)
+    if isinstance(contents, Exception):
+        progress.warning(f'Could not prefetch {bin_path}: {contents!r}',
+                         file_path = bin_path)
+        contents = None
+
     # initialize bin file object    
-    ga_file = ga.GENEActivFile(bin_path)
+    timer = StageTimer(stage_log, enabled = stage_log is not None,
+                       trace_memory = trace_memory)
+    ga_file = ga.GENEActivFile(bin_path, timer = timer, progress = progress,
+                               cache = cache, sidecar_folder = sidecar_folder)
+
+    # read bin file and create pdf summary (bad pages are skipped when
+    # reading, any other problem skips the file so the batch can finish)
+    try:
+
+        print(f'Reading file ...')
+        ga_file.read(contents = contents, scan = scan_pages)
+
+        if autocalibrate:
+            print('Autocalibrating ...')
+            ga_file.autocalibrate()
+
+        # create pdf cummary
+        print('Creating pdf ...')
+        ga_file.create_pdf(pdf_folder, correct_drift = correct_drift)
+
+    except Exception as error:
 
-    # read bin file
-    print(f'Reading file ...')
-    ga_file.read()
+        progress.warning(f'Skipped {bin_path}: {error!r}',
+                         file_path = bin_path)
 
-    # create pdf cummary
-    print('Creating pdf ...')
-    ga_file.create_pdf(pdf_folder, correct_drift = correct_drift)
+    # write stage times for file
+    timer.emit(file_path = bin_path)
 
     # get time difference
     end = time.time()
@@ -0,0 +1,76 @@
+import sys
+sys.path.append('/Users/kbeyer/repos')
+
+import os
+import csv
+import time
+import multiprocessing
+from owcurate.Python.file.PageScan import read_page_health
+from owcurate.Python.file.SignalTools import TimeBins
+
+# number of files to read at the same time
+processes = 4
+
+# hours of pages averaged in each row
+bin_hours = 1
+
+# set folder and file paths
+
+bin_folder = ('/Users/kbeyer/repos/test_data/testin/')
+csv_path = ('/Users/kbeyer/repos/test_data/testout/device_health.csv')
+
+
+def file_health(bin_path):
+
+    '''returns the rows of the health table of a GENEActiv .bin file (mean,
+    minimum and maximum temperature and battery voltage of each bin) from
+    the page time, temperature and battery voltage lines only'''
+
+    health = read_page_health(bin_path)
+
+    bins = TimeBins(bin_hours * 60 * 60)
+    bins.add(health['time'], {'temperature' : health['temperature'],
+                              'battery' : health['battery']})
+
+    columns = [bins.bin_times(), bins.counts[:bins.size]]
+    columns += [bins.get(signal, stat)
+                for signal in ['temperature', 'battery']
+                for stat in ['mean', 'min', 'max']]
+
+    # skip bins without pages (e.g. before the recording started)
+    bin_file = os.path.basename(bin_path)
+    return [[bin_file, str(row[0]), row[1]] +
+            [f'{value:.2f}' for value in row[2:]]
+            for row in zip(*columns) if row[1]]
+
+
+if __name__ == '__main__':
+
+    bin_paths = sorted(os.path.join(bin_folder, file)
+                       for file in os.listdir(bin_folder)
+                       if file.endswith('.bin'))
+
+    num_files = len(bin_paths)
+    file_text = 'file' if num_files == 1 else 'files'
+    print(f'Reading health of {num_files} {file_text} ...\n')
+
+    start = time.time()
+
+    with multiprocessing.Pool(processes) as pool, \
+         open(csv_path, 'w', newline = '') as csv_file:
+
+        writer = csv.writer(csv_file)
+        writer.writerow(['file', 'time', 'pages',
+                         'temperature_mean', 'temperature_min',
+                         'temperature_max', 'battery_mean', 'battery_min',
+                         'battery_max'])
+
+        # rows of each file in order
+        for file_count, rows in enumerate(pool.imap(file_health, bin_paths),
+                                          1):
+            writer.writerows(rows)
+
+            elapsed = time.strftime('%H:%M:%S',
+                                    time.gmtime(time.time() - start))
+            print(f'{file_count} of {num_files} completed. '
+                  f'Elapsed time: {elapsed}')
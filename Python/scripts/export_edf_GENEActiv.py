@@ -0,0 +1,63 @@
+import sys
+sys.path.append('/Users/kbeyer/repos')
+
+import os
+import time
+import logging
+import multiprocessing
+import owcurate.Python.file.GENEActivFile as ga
+
+# number of files to convert at the same time
+processes = 4
+
+# display warnings from each file (progress within files is not displayed
+# because files are converted at the same time)
+logging.basicConfig(level = logging.WARNING, format = '%(message)s')
+
+# set folder paths
+
+bin_folder = ('/Users/kbeyer/repos/test_data/testin/')
+edf_folder = ('/Users/kbeyer/repos/test_data/testout/')
+
+
+def export_file(bin_path):
+
+    '''reads the header of a GENEActiv .bin file and streams its pages to
+    a .edf file in edf_folder'''
+
+    ga_file = ga.GENEActivFile(bin_path)
+    ga_file.read(header_only = True)
+
+    return ga_file.export_edf(edf_folder)
+
+
+if __name__ == '__main__':
+
+    # list bin files in folder that do not have an edf file
+    edf_files = [os.path.splitext(file)[0] for file in os.listdir(edf_folder)
+                 if file.endswith('.edf')]
+
+    bin_paths = [os.path.join(bin_folder, file)
+                 for file in os.listdir(bin_folder)
+                 if file.endswith('.bin')
+                 and os.path.splitext(file)[0] not in edf_files]
+
+    # count files and print message
+    num_files = len(bin_paths)
+    file_text = 'file' if num_files == 1 else 'files'
+    print(f'Converting {num_files} {file_text} to edf ...\n')
+
+    start = time.time()
+
+    # convert files in parallel
+    with multiprocessing.Pool(processes) as pool:
+
+        for file_count, edf_path in enumerate(
+                pool.imap_unordered(export_file, bin_paths), 1):
+
+            elapsed = time.strftime('%H:%M:%S',
+                                    time.gmtime(time.time() - start))
+
+            print(f'{file_count} of {num_files} completed: {edf_path}\n',
+                  f'Elapsed time: {elapsed}\n',
+                  sep = '')